@@ -25,6 +25,12 @@ from app.models.product import Product, Category
 from app.models.collection import Collection, CollectionItem
 from app.models.order import Order, OrderItem
 from app.models.chat import ChatSession, ChatMessage
+from app.models.stock_reservation import StockReservation
+from app.models.idempotency_key import IdempotencyKey
+from app.models.product_stats import ProductStats
+from app.models.related_product import ProductCoPurchase, RelatedProduct
+from app.models.recommendation import ProductSimilarity, UserRecommendation
+from app.models.product_like import ProductLike
 
 # this is the Alembic Config object
 config = context.config
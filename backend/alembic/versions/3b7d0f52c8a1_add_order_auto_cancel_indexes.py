@@ -0,0 +1,35 @@
+"""add_order_auto_cancel_indexes
+
+Revision ID: 3b7d0f52c8a1
+Revises: ec6d94638cc2
+Create Date: 2026-10-19 11:04:27.552310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d0f52c8a1'
+down_revision: Union[str, None] = 'ec6d94638cc2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Indexes for the unpaid-order auto-cancel sweeper"""
+    op.create_index(
+        'ix_orders_unpaid_created_at',
+        'orders',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('pending', 'awaiting_payment') AND is_paid = false"),
+    )
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index('ix_orders_unpaid_created_at', table_name='orders')
@@ -0,0 +1,57 @@
+"""add_user_recommendations
+
+Revision ID: 4a9e2d7c1b08
+Revises: f1c6a8e3d492
+Create Date: 2026-10-19 21:31:09.642817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a9e2d7c1b08'
+down_revision: Union[str, None] = 'f1c6a8e3d492'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Item-item similarity from likes and purchases, and materialized per-user recommendations"""
+    op.create_table(
+        'product_similarities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('similar_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['similar_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'similar_id', name='uq_product_similarities_pair')
+    )
+    op.create_index('ix_product_similarities_id', 'product_similarities', ['id'], unique=False)
+    op.create_table(
+        'user_recommendations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'product_id', name='uq_user_recommendations_user_product')
+    )
+    op.create_index('ix_user_recommendations_id', 'user_recommendations', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_recommendations_id', table_name='user_recommendations')
+    op.drop_table('user_recommendations')
+    op.drop_index('ix_product_similarities_id', table_name='product_similarities')
+    op.drop_table('product_similarities')
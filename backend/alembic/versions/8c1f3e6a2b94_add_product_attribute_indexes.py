@@ -0,0 +1,57 @@
+"""add_product_attribute_indexes
+
+Revision ID: 8c1f3e6a2b94
+Revises: 5e2a9c4b7d10
+Create Date: 2026-10-19 16:05:48.207113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1f3e6a2b94'
+down_revision: Union[str, None] = '5e2a9c4b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DIMENSION_AXES = ('length', 'width', 'height')
+
+
+def dimension_cm(axis: str) -> str:
+    # Must stay identical to app.models.product.dimension_cm
+    return (
+        f"(CASE WHEN ((dimensions ->> '{axis}') ~ '^[0-9]+([.][0-9]+)?$') "
+        f"THEN CAST(dimensions ->> '{axis}' AS FLOAT) * "
+        "CASE WHEN (lower(dimensions ->> 'unit') = 'mm') THEN 0.1 "
+        "WHEN (lower(dimensions ->> 'unit') = 'm') THEN 100.0 ELSE 1.0 END END)"
+    )
+
+
+def upgrade() -> None:
+    """Expression indexes for the spec / dimension filters of the product list"""
+    for name in ('material', 'color'):
+        op.create_index(
+            f'ix_products_specs_{name}',
+            'products',
+            [sa.text(f"(specs ->> '{name}')")],
+            unique=False,
+            postgresql_where=sa.text('is_active'),
+        )
+    for axis in DIMENSION_AXES:
+        op.create_index(
+            f'ix_products_{axis}_cm',
+            'products',
+            [sa.text(dimension_cm(axis))],
+            unique=False,
+            postgresql_where=sa.text('is_active'),
+        )
+
+
+def downgrade() -> None:
+    for axis in reversed(DIMENSION_AXES):
+        op.drop_index(f'ix_products_{axis}_cm', table_name='products')
+    op.drop_index('ix_products_specs_color', table_name='products')
+    op.drop_index('ix_products_specs_material', table_name='products')
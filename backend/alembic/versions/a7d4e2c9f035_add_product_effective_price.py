@@ -0,0 +1,46 @@
+"""add_product_effective_price
+
+Revision ID: a7d4e2c9f035
+Revises: 8c1f3e6a2b94
+Create Date: 2026-10-19 17:12:33.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d4e2c9f035'
+down_revision: Union[str, None] = '8c1f3e6a2b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Generated effective_price (what the customer pays) and indexes for sorted product pages"""
+    op.add_column(
+        'products',
+        sa.Column(
+            'effective_price',
+            sa.Float(),
+            sa.Computed('COALESCE(NULLIF(sale_price, 0), price)', persisted=True),
+            nullable=True,
+        )
+    )
+    op.create_index(
+        'ix_products_active_category_price',
+        'products',
+        ['is_active', 'category_id', 'effective_price', 'id'],
+        unique=False,
+    )
+    op.create_index('ix_products_active_price', 'products', ['is_active', 'effective_price', 'id'], unique=False)
+    op.create_index('ix_products_active_created', 'products', ['is_active', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_active_created', table_name='products')
+    op.drop_index('ix_products_active_price', table_name='products')
+    op.drop_index('ix_products_active_category_price', table_name='products')
+    op.drop_column('products', 'effective_price')
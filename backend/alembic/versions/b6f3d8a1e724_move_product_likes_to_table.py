@@ -0,0 +1,90 @@
+"""move_product_likes_to_table
+
+Revision ID: b6f3d8a1e724
+Revises: 4a9e2d7c1b08
+Create Date: 2026-10-19 22:48:13.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f3d8a1e724'
+down_revision: Union[str, None] = '4a9e2d7c1b08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Likes move from the products.likes array to product_likes, counted in product_stats.like_count"""
+    op.create_table(
+        'product_likes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'product_id', name='uq_product_likes_user_product')
+    )
+    op.create_index('ix_product_likes_id', 'product_likes', ['id'], unique=False)
+    op.create_index('ix_product_likes_product_id', 'product_likes', ['product_id'], unique=False)
+    op.add_column(
+        'product_stats',
+        sa.Column('like_count', sa.BigInteger(), server_default='0', nullable=False)
+    )
+
+    # products.likes came from create_all, not from a migration: only move what exists
+    product_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('products')}
+    if 'likes' not in product_columns:
+        return
+
+    # The array may hold duplicates and ids of deleted users
+    op.execute("""
+        INSERT INTO product_likes (user_id, product_id, created_at, updated_at)
+        SELECT DISTINCT liked.user_id, p.id, now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM products p
+        CROSS JOIN LATERAL unnest(p.likes) AS liked(user_id)
+        JOIN users u ON u.id = liked.user_id
+    """)
+    # Products without stats yet get the log_score of their likes as of now:
+    # popularity_service.log_score(5.0 * likes, now) with the default 72 h half-life
+    op.execute("""
+        INSERT INTO product_stats (
+            product_id, view_count, cart_count, purchase_count, like_count, log_score, created_at, updated_at
+        )
+        SELECT product_id, 0, 0, 0, count(*),
+               log(2.0, 5.0 * count(*))
+                   + extract(epoch FROM (now() AT TIME ZONE 'utc') - timestamp '2025-01-01') / 3600 / 72,
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM product_likes
+        GROUP BY product_id
+        ON CONFLICT (product_id) DO UPDATE SET like_count = EXCLUDED.like_count
+    """)
+    op.drop_column('products', 'likes')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'products',
+        sa.Column('likes', postgresql.ARRAY(sa.Integer()), nullable=True)
+    )
+    op.execute("""
+        UPDATE products p SET likes = liked.user_ids
+        FROM (
+            SELECT product_id, array_agg(user_id ORDER BY id) AS user_ids
+            FROM product_likes
+            GROUP BY product_id
+        ) liked
+        WHERE liked.product_id = p.id
+    """)
+    op.drop_column('product_stats', 'like_count')
+    op.drop_index('ix_product_likes_product_id', table_name='product_likes')
+    op.drop_index('ix_product_likes_id', table_name='product_likes')
+    op.drop_table('product_likes')
@@ -0,0 +1,45 @@
+"""add_coupon_expiry_index
+
+Revision ID: c5e1f7a3d916
+Revises: b6f3d8a1e724
+Create Date: 2026-10-19 23:41:06.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e1f7a3d916'
+down_revision: Union[str, None] = 'b6f3d8a1e724'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _coupon_indexes():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('coupons'):
+        return None
+    return {index['name'] for index in inspector.get_indexes('coupons')}
+
+
+def upgrade() -> None:
+    """Partial index for the coupon expiry sweep (status is stored by enum name)"""
+    # coupons came from create_all, not from a migration: it may be missing or already indexed
+    indexes = _coupon_indexes()
+    if indexes is None or 'ix_coupons_active_valid_until' in indexes:
+        return
+    op.create_index(
+        'ix_coupons_active_valid_until',
+        'coupons',
+        ['valid_until'],
+        unique=False,
+        postgresql_where=sa.text("status = 'ACTIVE'"),
+    )
+
+
+def downgrade() -> None:
+    if 'ix_coupons_active_valid_until' in (_coupon_indexes() or ()):
+        op.drop_index('ix_coupons_active_valid_until', table_name='coupons')
@@ -0,0 +1,49 @@
+"""add_product_stats
+
+Revision ID: d3b8f1a6c527
+Revises: a7d4e2c9f035
+Create Date: 2026-10-19 18:40:12.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b8f1a6c527'
+down_revision: Union[str, None] = 'a7d4e2c9f035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """View / add-to-cart / purchase counters and the decayed popularity score"""
+    op.create_table(
+        'product_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('view_count', sa.BigInteger(), nullable=False),
+        sa.Column('cart_count', sa.BigInteger(), nullable=False),
+        sa.Column('purchase_count', sa.BigInteger(), nullable=False),
+        sa.Column('log_score', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id')
+    )
+    op.create_index('ix_product_stats_id', 'product_stats', ['id'], unique=False)
+    op.create_index(
+        'ix_product_stats_log_score',
+        'product_stats',
+        [sa.text('log_score DESC'), 'product_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_stats_log_score', table_name='product_stats')
+    op.drop_index('ix_product_stats_id', table_name='product_stats')
+    op.drop_table('product_stats')
@@ -0,0 +1,68 @@
+"""add_stock_reservations
+
+Revision ID: ec6d94638cc2
+Revises: 9a14795af9bb
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ec6d94638cc2'
+down_revision: Union[str, None] = '9a14795af9bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Soft stock holds between checkout start and order creation"""
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.CheckConstraint('quantity > 0', name='ck_stock_reservations_quantity_positive'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_reservations_id', 'stock_reservations', ['id'], unique=False)
+    op.create_index('ix_stock_reservations_token', 'stock_reservations', ['token'], unique=False)
+    op.create_index('ix_stock_reservations_user_id', 'stock_reservations', ['user_id'], unique=False)
+    # Available-to-sell: index-only scan over the live holds of a product
+    op.create_index(
+        'ix_stock_reservations_active_product',
+        'stock_reservations',
+        ['product_id', 'expires_at'],
+        unique=False,
+        postgresql_include=['quantity'],
+        postgresql_where=sa.text("status = 'active'")
+    )
+    op.create_index(
+        'ix_stock_reservations_active_expiry',
+        'stock_reservations',
+        ['expires_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_reservations_active_expiry', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_active_product', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_user_id', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_token', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_id', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
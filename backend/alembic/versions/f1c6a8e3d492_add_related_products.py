@@ -0,0 +1,63 @@
+"""add_related_products
+
+Revision ID: f1c6a8e3d492
+Revises: d3b8f1a6c527
+Create Date: 2026-10-19 20:05:47.310582
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a8e3d492'
+down_revision: Union[str, None] = 'd3b8f1a6c527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Order co-occurrence counts and the precomputed "frequently bought together" neighbors"""
+    op.create_table(
+        'product_co_purchases',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('other_id', sa.Integer(), nullable=False),
+        sa.Column('order_count', sa.BigInteger(), nullable=False),
+        sa.Column('last_order_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['other_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'other_id', name='uq_product_co_purchases_pair')
+    )
+    op.create_index('ix_product_co_purchases_id', 'product_co_purchases', ['id'], unique=False)
+    op.create_index(
+        'ix_product_co_purchases_last_order_id', 'product_co_purchases', ['last_order_id'], unique=False
+    )
+    op.create_table(
+        'related_products',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('related_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('order_count', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['related_id'], ['products.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'related_id', name='uq_related_products_pair')
+    )
+    op.create_index('ix_related_products_id', 'related_products', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_related_products_id', table_name='related_products')
+    op.drop_table('related_products')
+    op.drop_index('ix_product_co_purchases_last_order_id', table_name='product_co_purchases')
+    op.drop_index('ix_product_co_purchases_id', table_name='product_co_purchases')
+    op.drop_table('product_co_purchases')
@@ -6,12 +6,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_admin_user
 from app.models.user import User
-from app.models.coupon import Coupon, CouponStatus
+from app.models.coupon import Coupon, CouponStatus, CouponType
 from app.services.coupon_service import (
     validate_and_apply_coupon,
-    get_user_coupons
+    get_user_coupons,
+    issue_bulk_coupons,
+    expire_coupons
 )
 from pydantic import BaseModel, Field
 
@@ -32,6 +34,22 @@ class CouponValidateResponse(BaseModel):
     code: str = None
 
 
+class CouponBulkIssueRequest(BaseModel):
+    user_ids: List[int] | None = Field(None, max_length=100000, description="Recipients; omit for every active customer")
+    discount_type: CouponType = CouponType.FIXED
+    discount_value: float = Field(..., gt=0)
+    max_discount_amount: float | None = Field(None, gt=0)
+    min_order_amount: float = Field(0, ge=0)
+    valid_days: int = Field(30, ge=1, le=365)
+    description: str | None = None
+    prefix: str = Field("LUXE", pattern="^[A-Z0-9]{1,12}$", description="Code prefix, e.g. campaign name")
+
+
+class CouponBulkIssueResponse(BaseModel):
+    issued: int
+    skipped_user_ids: List[int]
+
+
 class CouponResponse(BaseModel):
     id: int
     code: str
@@ -112,3 +130,37 @@ def validate_coupon(
         discount=result["discount"],
         code=request.code.upper() if result["valid"] else None
     )
+
+
+@router.post("/bulk", response_model=CouponBulkIssueResponse, status_code=status.HTTP_201_CREATED)
+def issue_coupons_in_bulk(
+    request: CouponBulkIssueRequest,
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Issue one coupon per user for a campaign (admin only)
+    
+    Codes are generated in memory and inserted in batches in one transaction.
+    Unknown or inactive user ids are returned in skipped_user_ids.
+    """
+    return issue_bulk_coupons(
+        db,
+        discount_type=request.discount_type,
+        discount_value=request.discount_value,
+        valid_days=request.valid_days,
+        user_ids=request.user_ids,
+        max_discount_amount=request.max_discount_amount,
+        min_order_amount=request.min_order_amount,
+        description=request.description,
+        prefix=request.prefix
+    )
+
+
+@router.post("/expire")
+def expire_past_due_coupons(
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Mark all past-due coupons as expired now (admin only; also runs on a schedule)"""
+    return {"expired": expire_coupons(db)}
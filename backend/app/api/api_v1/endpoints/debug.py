@@ -0,0 +1,73 @@
+"""
+Debug Endpoints - runtime diagnostics (admin only)
+"""
+from fastapi import APIRouter, Depends, Query
+
+from app.core.profiling import query_registry
+from app.core.scheduler import scheduler
+from app.services.checkout_queue import checkout_queue
+from app.api.deps import get_current_admin_user
+from app.models.user import User
+
+router = APIRouter()
+
+
+@router.get("/queries")
+def get_query_fingerprints(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total", pattern="^(total|count|max|mean)$"),
+    admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get the most expensive SQL query fingerprints since startup (admin only)
+
+    Sort by:
+        - total: cumulative time spent in the statement
+        - count: number of executions
+        - max: slowest single execution
+        - mean: average execution time
+    """
+    return {
+        "fingerprints": query_registry.top(limit=limit, sort=sort),
+        "tracked": len(query_registry),
+        "dropped": query_registry.dropped,
+    }
+
+
+@router.delete("/queries")
+def reset_query_fingerprints(
+    admin: User = Depends(get_current_admin_user)
+):
+    """Reset the aggregated query statistics (admin only)"""
+    query_registry.reset()
+    return {"message": "Query statistics reset"}
+
+
+@router.get("/scheduler")
+def get_scheduler_status(
+    history: bool = Query(True),
+    admin: User = Depends(get_current_admin_user)
+):
+    """
+    Scheduled jobs of the worker serving this request (admin only)
+
+    Only the leader worker runs leader-only jobs, so counters on other
+    workers stay at zero for those.
+    """
+    return scheduler.status(history=history)
+
+
+@router.post("/scheduler/{job_name}/run")
+def run_scheduled_job(
+    job_name: str,
+    admin: User = Depends(get_current_admin_user)
+):
+    """Run a job now on this worker, even if it is not the leader (admin only)"""
+    scheduler.trigger(job_name)
+    return {"message": f"Job {job_name} started"}
+
+
+@router.get("/checkout-queue")
+def get_checkout_queue_stats(admin: User = Depends(get_current_admin_user)):
+    """Checkout queue of the worker serving this request: depth per lane and outcomes (admin only)"""
+    return checkout_queue.stats()
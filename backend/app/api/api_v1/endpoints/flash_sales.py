@@ -0,0 +1,58 @@
+"""
+Flash Sale Endpoints (admin)
+"""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.api.deps import get_current_admin_user
+from app.models.user import User
+from app.services.flash_sale_service import FlashSaleService
+
+router = APIRouter()
+
+
+@router.get("")
+def get_flash_sales(
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Products on flash sale with their Redis counters (admin only)
+    
+    Returns per product:
+        - available: units left in Redis
+        - pending: units sold but not yet written back to products.stock
+        - db_stock: products.stock as currently stored
+        - drift: db_stock - pending - available (should be 0)
+    """
+    return FlashSaleService.get_status(db)
+
+
+@router.post("/flush")
+def flush_flash_sales(
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Write pending flash-sale deltas to Postgres now (admin only)"""
+    return {"flushed": FlashSaleService.flush(db)}
+
+
+@router.post("/{product_id}")
+def start_flash_sale(
+    product_id: int,
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Move a product's stock into Redis counters (admin only)"""
+    return FlashSaleService.start(db, product_id)
+
+
+@router.delete("/{product_id}")
+def stop_flash_sale(
+    product_id: int,
+    admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """End the flash sale and write the remaining units back to products.stock (admin only)"""
+    return FlashSaleService.stop(db, product_id)
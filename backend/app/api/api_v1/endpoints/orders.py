@@ -1,13 +1,24 @@
 """
 Order Endpoints
 """
-from fastapi import APIRouter, Depends, Query
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.core.database import get_db
-from app.schemas.order import OrderResponse, OrderCreate, OrderUpdate, OrderListResponse
+from app.core.exceptions import NotFoundException
+from app.schemas.order import (
+    OrderResponse, OrderCreate, OrderUpdate, OrderListResponse,
+    StockReservationCreate, StockReservationResponse, CheckoutTicketResponse
+)
+from app.services.checkout_queue import checkout_queue, FINISHED
+from app.services.idempotency_service import IdempotencyService
 from app.services.order_service import OrderService
+from app.services.stock_reservation_service import StockReservationService
 from app.api.deps import get_current_user, get_current_admin_user, get_current_admin_or_staff_user
 from app.models.user import User
 from app.models.order import OrderStatus
@@ -15,15 +26,104 @@ from app.models.order import OrderStatus
 router = APIRouter()
 
 
-@router.post("", response_model=OrderResponse, status_code=201)
+STREAM_POLL_S = 0.5
+STREAM_MAX_S = 60.0  # clients reconnect after this
+
+
+@router.post(
+    "",
+    response_model=OrderResponse,
+    status_code=201,
+    responses={202: {"model": CheckoutTicketResponse, "description": "Checkout queued (peak mode)"}}
+)
 def create_order(
     data: OrderCreate,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create new order"""
-    order = OrderService.create_order(db, current_user.id, data)
-    return order
+    """
+    Create new order
+
+    Send an ``Idempotency-Key`` header (e.g. a UUID per checkout attempt) to
+    make retries safe: a repeat returns the order created the first time.
+
+    While the checkout queue is on (peak events) the answer is 202 with a
+    ticket instead; follow it at /orders/checkout/{ticket_id}. 503 with
+    Retry-After means the queue is full.
+    """
+    with IdempotencyService.begin(db, idempotency_key, current_user.id, request, data) as slot:
+        if slot.replay:
+            return slot.replay
+        if checkout_queue.running:
+            return slot.complete(checkout_queue.submit(current_user.id, data, db), status_code=202)
+        order = OrderService.create_order(db, current_user.id, data)
+        return slot.complete(OrderResponse.model_validate(order), status_code=201)
+
+
+@router.post("/reservations", response_model=StockReservationResponse, status_code=201)
+def create_reservation(
+    data: StockReservationCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start checkout: hold stock for the items for a few minutes.
+    Pass the returned token as reservation_token when creating the order.
+    """
+    return StockReservationService.reserve(db, current_user.id, data.items)
+
+
+@router.delete("/reservations/{token}", status_code=204)
+def release_reservation(
+    token: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Leave checkout: release the held stock"""
+    StockReservationService.release(db, current_user.id, token)
+
+
+@router.get("/checkout/{ticket_id}", response_model=CheckoutTicketResponse)
+def get_checkout_ticket(
+    ticket_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Status of a queued checkout; ``order`` is set once completed"""
+    return checkout_queue.get(ticket_id, current_user.id)
+
+
+@router.get("/checkout/{ticket_id}/events")
+async def stream_checkout_ticket(
+    ticket_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events for a queued checkout: one ``data:`` line per change
+    of status or position, the last one when it completes or fails.
+    """
+    ticket = checkout_queue.get(ticket_id, current_user.id)
+    user_id = current_user.id
+    db.close()  # don't hold a connection for the whole stream
+
+    async def events():
+        current, last = ticket, None
+        deadline = asyncio.get_running_loop().time() + STREAM_MAX_S
+        while True:
+            if current != last:
+                yield f"data: {json.dumps(current)}\n\n"
+                last = current
+            if current["status"] in FINISHED or asyncio.get_running_loop().time() > deadline:
+                return
+            await asyncio.sleep(STREAM_POLL_S)
+            try:
+                current = checkout_queue.get(ticket_id, user_id)
+            except NotFoundException:
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @router.get("/my-orders", response_model=OrderListResponse)
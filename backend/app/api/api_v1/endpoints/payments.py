@@ -1,30 +1,47 @@
 """
 Payment Endpoints - MoMo and VNPAY Integration
 """
-from fastapi import APIRouter, Depends, Request, BackgroundTasks
+import logging
+from functools import partial
+
+from typing import Optional
+
+from anyio import from_thread
+from fastapi import APIRouter, Depends, Header, Request, BackgroundTasks
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.core.config import settings
 from app.services.payment_service import PaymentService
 from app.services.order_service import OrderService
+from app.services.idempotency_service import IdempotencyService
 from app.models.order import OrderStatus
 from app.api.deps import get_current_user
 from app.models.user import User
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/create")
-async def create_payment(
+def create_payment(
     payload: dict,
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Unified create payment endpoint
     Body: { order_id: int, gateway: str }
+    Header: Idempotency-Key (optional) - a retry returns the first response
     """
+    with IdempotencyService.begin(db, idempotency_key, current_user.id, request, payload) as slot:
+        if slot.replay:
+            return slot.replay
+        return slot.complete(_create_payment(payload, request, current_user, db))
+
+
+def _create_payment(payload: dict, request: Request, current_user: User, db: Session) -> dict:
     order_id = int(payload.get("order_id", 0))
     gateway = (payload.get("gateway") or "vnpay").lower()
 
@@ -48,13 +65,14 @@ async def create_payment(
         raise BadRequestException(f"Order status '{order.status}' is not eligible for payment")
 
     if gateway == "momo":
-        payment_data = await PaymentService.create_momo_payment(
+        payment_data = from_thread.run(partial(
+            PaymentService.create_momo_payment,
             order_id=order.id,
             amount=order.total_amount,
             order_info=f"Payment for order #{order.id}",
             return_url=f"{settings.FRONTEND_BASE_URL}/payment/return?provider=momo",
             notify_url=f"http://localhost:8000/api/v1/payments/momo/notify"
-        )
+        ))
         # Normalize MoMo response to unified shape
         # MoMo sandbox returns JSON with keys like 'payUrl' or 'payUrl' (varies by API)
         payment_url = None
@@ -97,12 +115,21 @@ async def create_payment(
 
 
 @router.post("/momo/create")
-async def create_momo_payment(
+def create_momo_payment(
     order_id: int,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create MoMo payment request"""
+    """Create MoMo payment request (Idempotency-Key header supported)"""
+    with IdempotencyService.begin(db, idempotency_key, current_user.id, request) as slot:
+        if slot.replay:
+            return slot.replay
+        return slot.complete(_create_momo_payment(order_id, current_user, db))
+
+
+def _create_momo_payment(order_id: int, current_user: User, db: Session):
     # Get order
     order = OrderService.get_order_by_id(db, order_id)
     
@@ -126,14 +153,15 @@ async def create_momo_payment(
     if order.status not in [OrderStatus.PENDING, OrderStatus.AWAITING_PAYMENT, OrderStatus.CONFIRMED]:
         raise BadRequestException(f"Order status '{order.status}' is not eligible for payment")
     
-    # Create payment
-    payment_data = await PaymentService.create_momo_payment(
+    # Create payment (async HTTP client, run on the event loop from this worker thread)
+    payment_data = from_thread.run(partial(
+        PaymentService.create_momo_payment,
         order_id=order.id,
         amount=order.total_amount,
         order_info=f"Payment for order #{order.id}",
         return_url=f"{settings.FRONTEND_BASE_URL}/payment/return",
         notify_url=f"http://localhost:8000/api/v1/payments/momo/notify"
-    )
+    ))
     
     return payment_data
 
@@ -155,12 +183,19 @@ async def momo_payment_notify(
     if data.get("resultCode") == 0:
         # Payment successful
         order_id = int(data.get("orderId", "").replace("ORD", ""))
-        order = OrderService.get_order_by_id(db, order_id)
+        # Locked: the auto-cancel sweeper may be cancelling this order right now
+        order = OrderService.get_order_by_id(db, order_id, for_update=True)
         
         # CRITICAL: Idempotency check - prevent double processing
         if order.is_paid:
             return {"resultCode": 0, "message": "Already processed"}
         
+        # Stock of a cancelled order is already back on sale; needs a manual refund
+        if order.status == OrderStatus.CANCELLED:
+            db.rollback()
+            logger.warning("MoMo payment received for cancelled order %s, refund required", order_id)
+            return {"resultCode": 0, "message": "Order cancelled"}
+        
         # Update payment status
         order.is_paid = True
         order.status = OrderStatus.CONFIRMED
@@ -173,10 +208,18 @@ async def momo_payment_notify(
 def create_vnpay_payment(
     order_id: int,
     request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create VNPAY payment URL"""
+    """Create VNPAY payment URL (Idempotency-Key header supported)"""
+    with IdempotencyService.begin(db, idempotency_key, current_user.id, request) as slot:
+        if slot.replay:
+            return slot.replay
+        return slot.complete(_create_vnpay_payment(order_id, request, current_user, db))
+
+
+def _create_vnpay_payment(order_id: int, request: Request, current_user: User, db: Session) -> dict:
     # Get order
     order = OrderService.get_order_by_id(db, order_id)
     
@@ -229,12 +272,17 @@ async def vnpay_payment_return(
     if data.get("vnp_ResponseCode") == "00":
         # Payment successful
         order_id = int(data.get("vnp_TxnRef"))
-        order = OrderService.get_order_by_id(db, order_id)
+        order = OrderService.get_order_by_id(db, order_id, for_update=True)
         
         # CRITICAL: Idempotency check - prevent double processing
         if order.is_paid:
             return {"success": True, "message": "Already processed"}
         
+        if order.status == OrderStatus.CANCELLED:
+            db.rollback()
+            logger.warning("VNPay payment received for cancelled order %s, refund required", order_id)
+            return {"success": False, "message": "Order was cancelled, payment will be refunded"}
+        
         # Update payment status
         order.is_paid = True
         order.status = OrderStatus.CONFIRMED
@@ -3,22 +3,40 @@ Product Endpoints
 """
 from fastapi import APIRouter, Depends, Query, Path
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional, Union
 
 from app.core.database import get_db
 from app.schemas.product import (
     ProductResponse, ProductCreate, ProductUpdate, ProductListResponse,
-    CategoryResponse, CategoryCreate, CategoryUpdate
+    ProductCardResponse, ProductCardListResponse,
+    CategoryResponse, CategoryCreate, CategoryUpdate, CategoryTreeNode, SuggestionItem, SuggestionResponse,
+    LikeStatus, LikedProductsResponse
 )
+from app.services.category_tree_service import CategoryTreeService
+from app.services.like_service import LikeService
+from app.services.popularity_service import PopularityService
 from app.services.product_service import ProductService
-from app.api.deps import get_current_admin_user
+from app.services.recommendation_service import RecommendationService
+from app.services.stock_reservation_service import StockReservationService
+from app.services.suggestion_service import SuggestionService
+from app.api.deps import get_current_admin_user, get_current_user
 from app.models.user import User
 
 router = APIRouter()
 
 
 # Public endpoints
-@router.get("", response_model=ProductListResponse)
+VIEW = Query("full", pattern="^(card|full)$", description="card: grid fields only (no description, images, specs)")
+
+
+def product_view(products, view: str) -> list:
+    """Serialize for ``view`` (card models are built from the card columns only)"""
+    if view == "card":
+        return [ProductCardResponse.model_validate(product) for product in products]
+    return products
+
+
+@router.get("", response_model=Union[ProductListResponse, ProductCardListResponse])
 def get_products(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
@@ -28,20 +46,78 @@ def get_products(
     is_featured: Optional[bool] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
+    material: Optional[List[str]] = Query(None, description="specs.material, any of (repeat the parameter)"),
+    color: Optional[List[str]] = Query(None, description="specs.color, any of (repeat the parameter)"),
+    min_length: Optional[float] = Query(None, ge=0, description="cm"),
+    max_length: Optional[float] = Query(None, ge=0, description="cm"),
+    min_width: Optional[float] = Query(None, ge=0, description="cm"),
+    max_width: Optional[float] = Query(None, ge=0, description="cm"),
+    min_height: Optional[float] = Query(None, ge=0, description="cm"),
+    max_height: Optional[float] = Query(None, ge=0, description="cm"),
+    sort: Optional[str] = Query(None, pattern="^(price_asc|price_desc|newest|popular)$"),
+    facets: bool = Query(False, description="Also return per-category, price band, material and color counts"),
+    view: str = VIEW,
     db: Session = Depends(get_db)
 ):
-    """Get all products with filters"""
-    products, total = ProductService.get_products(
+    """Get all products with filters (``category_id`` includes its sub-categories)"""
+    products, total, facet_counts = ProductService.get_products(
         db, skip=skip, limit=limit,
         category_id=category_id,
         collection_id=collection_id,
         search=search,
         is_featured=is_featured,
         min_price=min_price,
-        max_price=max_price
+        max_price=max_price,
+        materials=material,
+        colors=color,
+        dimensions={
+            axis: bounds for axis, bounds in (
+                ("length", (min_length, max_length)),
+                ("width", (min_width, max_width)),
+                ("height", (min_height, max_height)),
+            ) if bounds != (None, None)
+        },
+        sort=sort,
+        with_facets=facets,
+        view=view
     )
     
-    return ProductListResponse(products=products, total=total)
+    if view == "card":
+        return ProductCardListResponse(products=product_view(products, view), total=total, facets=facet_counts)
+    return ProductListResponse(products=products, total=total, facets=facet_counts)
+
+
+@router.get("/popular", response_model=Union[List[ProductResponse], List[ProductCardResponse]])
+def get_popular_products(
+    limit: int = Query(12, ge=1, le=50),
+    category_id: Optional[int] = Query(None),
+    view: str = VIEW,
+    db: Session = Depends(get_db)
+):
+    """Most popular products (views, add-to-carts and purchases, recent ones weigh more)"""
+    return product_view(PopularityService.get_popular(db, limit=limit, category_id=category_id, view=view), view)
+
+
+@router.get("/suggestions", response_model=SuggestionResponse)
+def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """Autocomplete: products, categories and collections whose words start with those of ``q``"""
+    return SuggestionResponse(suggestions=[
+        SuggestionItem(type=s.type, id=s.id, name=s.name, slug=s.slug)
+        for s in SuggestionService.suggest(q, limit)
+    ])
+
+
+@router.get("/liked", response_model=LikedProductsResponse)
+def get_liked_products(
+    ids: List[int] = Query([], max_length=100, description="Product ids of the page (repeat the parameter)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Which of ``ids`` the current user has liked (one call per listing page)"""
+    return LikedProductsResponse(product_ids=LikeService.liked_ids(db, current_user.id, ids))
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
@@ -51,6 +127,7 @@ def get_product(
 ):
     """Get product by ID"""
     product = ProductService.get_product_by_id(db, product_id)
+    PopularityService.record("view", [product.id])
     return product
 
 
@@ -61,9 +138,52 @@ def get_product_by_slug(
 ):
     """Get product by slug"""
     product = ProductService.get_product_by_slug(db, slug)
+    PopularityService.record("view", [product.id])
     return product
 
 
+@router.get("/{product_id}/related", response_model=Union[List[ProductResponse], List[ProductCardResponse]])
+def get_related_products(
+    product_id: int = Path(..., gt=0),
+    limit: int = Query(8, ge=1, le=20),
+    view: str = VIEW,
+    db: Session = Depends(get_db)
+):
+    """Frequently bought together (precomputed from orders)"""
+    return product_view(RecommendationService.get_related(db, product_id, limit=limit, view=view), view)
+
+
+@router.post("/{product_id}/like", response_model=LikeStatus)
+def like_product(
+    product_id: int = Path(..., gt=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Like a product (idempotent)"""
+    like_count = LikeService.like(db, current_user.id, product_id)
+    return LikeStatus(product_id=product_id, liked=True, like_count=like_count)
+
+
+@router.delete("/{product_id}/like", response_model=LikeStatus)
+def unlike_product(
+    product_id: int = Path(..., gt=0),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Remove a like (idempotent)"""
+    like_count = LikeService.unlike(db, current_user.id, product_id)
+    return LikeStatus(product_id=product_id, liked=False, like_count=like_count)
+
+
+@router.get("/{product_id}/availability")
+def get_product_availability(
+    product_id: int = Path(..., gt=0),
+    db: Session = Depends(get_db)
+):
+    """Available-to-sell: stock minus units held by live checkouts"""
+    return StockReservationService.get_availability(db, product_id)
+
+
 # Admin endpoints
 @router.post("", response_model=ProductResponse)
 def create_product(
@@ -107,6 +227,12 @@ def get_categories(db: Session = Depends(get_db)):
     return categories
 
 
+@router.get("/categories/tree", response_model=List[CategoryTreeNode])
+def get_category_tree(db: Session = Depends(get_db)):
+    """Categories nested under their parents (served from memory)"""
+    return CategoryTreeService.get(db).tree
+
+
 @router.post("/categories/", response_model=CategoryResponse)
 def create_category(
     data: CategoryCreate,
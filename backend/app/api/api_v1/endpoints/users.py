@@ -3,15 +3,17 @@ User Management Endpoints
 """
 from fastapi import APIRouter, Depends, Query, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Union
 
 from app.core.database import get_db
+from app.schemas.product import ProductCardResponse, ProductResponse
 from app.schemas.user import UserResponse, UserUpdate, AdminUserUpdate, UserListResponse, PasswordChange, LoyaltyInfo
 from app.api.deps import get_current_user, get_current_admin_user
 from app.models.user import User
 from app.core.exceptions import NotFoundException
 from app.core.security import verify_password, get_password_hash
 from app.services.loyalty_service import LoyaltyService
+from app.services.recommendation_service import RecommendationService
 
 router = APIRouter()
 
@@ -32,6 +34,20 @@ def get_my_loyalty(
     return LoyaltyService.get_loyalty_info(current_user)
 
 
+@router.get("/me/recommendations", response_model=Union[List[ProductResponse], List[ProductCardResponse]])
+def get_my_recommendations(
+    limit: int = Query(12, ge=1, le=24),
+    view: str = Query("full", pattern="^(card|full)$", description="card: grid fields only"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Products picked for the current user from their likes and purchases"""
+    products = RecommendationService.get_for_user(db, current_user.id, limit=limit, view=view)
+    if view == "card":
+        return [ProductCardResponse.model_validate(product) for product in products]
+    return products
+
+
 @router.put("/me", response_model=UserResponse)
 def update_my_profile(
     data: UserUpdate,
@@ -5,7 +5,7 @@ from app.api.api_v1.endpoints import (
     chat, chatbot, upload, addresses, collections,
     cart, dashboard, banners,
     users_admin, addresses_admin, contact, notifications,
-    stock_receipts, coupons
+    stock_receipts, coupons, flash_sales, debug
 )
 
 api_router = APIRouter()
@@ -33,3 +33,5 @@ api_router.include_router(banners.router, prefix="/banners", tags=["Banners"])
 api_router.include_router(contact.router, prefix="/contact", tags=["Contact"])
 api_router.include_router(stock_receipts.router, prefix="/stock-receipts", tags=["Stock Receipts"])
 api_router.include_router(coupons.router, prefix="/coupons", tags=["Coupons"])
+api_router.include_router(flash_sales.router, prefix="/flash-sales", tags=["Flash Sales"])
+api_router.include_router(debug.router, prefix="/debug", tags=["Debug"])
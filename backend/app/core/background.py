@@ -0,0 +1,44 @@
+"""
+Background work
+
+``submit`` hands one-off work (e.g. notification emails) to a shared thread
+pool so jobs don't wait on SMTP. Periodic jobs live in ``app.core.scheduler``.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _run_logged(func: Callable, args: tuple, kwargs: dict):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background job %s failed", getattr(func, "__qualname__", func))
+
+
+def submit(func: Callable, *args, **kwargs) -> Future:
+    """Run ``func`` on the shared background pool; exceptions are logged"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="background")
+    return _executor.submit(_run_logged, func, args, kwargs)
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Finish queued jobs (lifespan shutdown)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
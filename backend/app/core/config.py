@@ -16,7 +16,66 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
-    
+    REDIS_SOCKET_TIMEOUT_S: float = 0.5
+    
+    # Flash sale (hot-SKU stock counters in Redis, written back to Postgres in batches)
+    FLASH_SALE_ENABLED: bool = False
+    FLASH_SALE_FLUSH_INTERVAL_S: float = 1.0
+    
+    # Stock reservations (soft holds between checkout start and order creation)
+    STOCK_RESERVATION_TTL_MINUTES: int = 15
+    STOCK_RESERVATION_SWEEP_INTERVAL_S: float = 60.0
+    STOCK_RESERVATION_RETENTION_DAYS: int = 7
+    
+    # Auto-cancel of unpaid online-payment orders (their stock goes back on sale)
+    ORDER_AUTO_CANCEL_ENABLED: bool = True
+    ORDER_PAYMENT_TIMEOUT_MINUTES: int = 30
+    ORDER_AUTO_CANCEL_INTERVAL_S: float = 60.0
+    ORDER_AUTO_CANCEL_PAYMENT_METHODS: Union[List[str], str] = ["momo", "vnpay", "bank_transfer"]
+    
+    # Scheduler (periodic maintenance jobs; one leader worker runs them)
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TIMEZONE: str = "Asia/Ho_Chi_Minh"  # for cron expressions
+    SCHEDULER_WORKERS: int = 4
+    SCHEDULER_LEADER_CHECK_S: float = 5.0
+    SCHEDULER_HISTORY_SIZE: int = 50  # recent runs kept per job
+    NOTIFICATION_LOG_RETENTION_DAYS: int = 90
+    
+    # Pricing (bundle price cache; invalidated through Redis versions)
+    PRICING_CACHE_TTL_S: float = 300.0
+    
+    # Idempotency-Key support (safe retries of order creation / payment init)
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    IDEMPOTENCY_WAIT_S: float = 30.0  # how long a duplicate waits for the first request
+    
+    # Checkout queue (peak events: POST /orders answers 202 + ticket, a fixed pool creates orders)
+    CHECKOUT_QUEUE_ENABLED: bool = False
+    CHECKOUT_QUEUE_WORKERS: int = 4  # concurrent checkouts; keep well below the DB pool size
+    CHECKOUT_QUEUE_MAX_PENDING: int = 1000  # beyond this POST /orders answers 503
+    CHECKOUT_QUEUE_TICKET_TTL_S: float = 600.0
+    
+    # Popularity (view / add-to-cart / purchase counters, buffered per worker and flushed in batches)
+    POPULARITY_FLUSH_INTERVAL_S: float = 5.0
+    POPULARITY_HALF_LIFE_HOURS: float = 72.0  # an event counts half as much after this long
+    
+    # Search suggestions (in-memory prefix index per worker)
+    SUGGEST_SYNC_INTERVAL_S: float = 5.0  # how soon other workers see a catalog change
+    SUGGEST_REBUILD_INTERVAL_S: float = 600.0  # full reload, refreshes popularity ranking
+    
+    # Category tree (in memory per worker, used for descendant-inclusive filtering)
+    CATEGORY_TREE_SYNC_INTERVAL_S: float = 5.0  # how soon other workers see a category change
+    CATEGORY_TREE_REBUILD_INTERVAL_S: float = 600.0  # fallback reload (categories written outside the API)
+    
+    # "Frequently bought together" (order co-occurrence, precomputed top-K per product)
+    RELATED_TOP_K: int = 20
+    RELATED_MIN_CO_ORDERS: int = 2  # pairs bought together less often are noise
+    RELATED_UPDATE_INTERVAL_S: float = 900.0  # new orders; a full recount runs nightly
+    
+    # Personalized recommendations (likes + purchases, rebuilt nightly)
+    RECOMMENDATION_TOP_N: int = 24  # stored per user
+    RECOMMENDATION_SIMILAR_K: int = 50  # neighbors kept per product
+    RECOMMENDATION_MIN_COMMON_USERS: int = 2
+    RECOMMENDATION_MAX_USER_ITEMS: int = 30  # strongest / most recent interactions per user
     
     # Security
     SECRET_KEY: str = "your-super-secret-jwt-key-change-in-production"
@@ -28,6 +87,25 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     
+    # SQL Profiling
+    SQL_ECHO: bool = False  # Dump every statement to stdout (very noisy)
+    SQL_PROFILING_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SQL_FINGERPRINT_LIMIT: int = 1000  # Max distinct query fingerprints kept in memory
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_DEBUG_SAMPLING: str = ""  # e.g. "app.services.order_service=0.1,app.services.chat_service=0.5"
+    
+    # Tracing
+    TRACING_ENABLED: bool = False
+    TRACE_EXPORTER: str = "jsonl"  # jsonl | otlp
+    TRACE_FILE_PATH: str = "logs/traces.jsonl"
+    OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACE_SERVICE_NAME: str = "luxefurniture-backend"
+    TRACE_SAMPLE_RATIO: float = 1.0  # Fraction of new traces recorded (decided at the root span)
+    
     # CORS
     ALLOWED_ORIGINS: Union[List[str], str] = [
         "http://localhost:3000",
@@ -97,7 +175,7 @@ class Settings(BaseSettings):
         env_file_encoding='utf-8'
     )
 
-    @field_validator("ALLOWED_ORIGINS", "ALLOWED_EXTENSIONS", mode="before")
+    @field_validator("ALLOWED_ORIGINS", "ALLOWED_EXTENSIONS", "ORDER_AUTO_CANCEL_PAYMENT_METHODS", mode="before")
     @classmethod
     def parse_list_from_str(cls, v: Any) -> List[str]:
         if isinstance(v, str):
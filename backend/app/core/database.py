@@ -7,6 +7,7 @@ from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from app.core.config import settings
+from app.core.profiling import install_query_profiler
 
 # Create database engine
 engine = create_engine(
@@ -14,9 +15,12 @@ engine = create_engine(
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
-    echo=settings.DEBUG
+    echo=settings.SQL_ECHO
 )
 
+if settings.SQL_PROFILING_ENABLED:
+    install_query_profiler(engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
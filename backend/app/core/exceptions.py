@@ -32,3 +32,13 @@ class ConflictException(HTTPException):
     """409 Conflict Exception"""
     def __init__(self, detail: str = "Resource conflict"):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class ServiceUnavailableException(HTTPException):
+    """503 Service Unavailable Exception (overload; client should retry later)"""
+    def __init__(self, detail: str = "Service temporarily unavailable", retry_after: int = 5):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
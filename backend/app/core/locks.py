@@ -0,0 +1,132 @@
+"""
+PostgreSQL advisory locks
+
+Cluster-wide mutual exclusion for background jobs: when several API workers
+run the same periodic job, only the one holding the lock does the work.
+``LeaderLock`` keeps a lock for the life of the process (scheduler leader).
+"""
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit key for a lock name"""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@contextmanager
+def try_advisory_lock(name: str, engine: Optional[Engine] = None) -> Iterator[bool]:
+    """
+    Try to take a session-level advisory lock without waiting.
+
+    Yields True when this process holds the lock for the duration of the
+    block, False when another session has it. The lock lives on a dedicated
+    connection, so it also goes away if the process dies. Databases other
+    than PostgreSQL (SQLite in tests) always get the lock.
+    """
+    if engine is None:
+        from app.core.database import engine
+
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+
+    key = lock_key(name)
+    with engine.connect() as conn:
+        acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar())
+        conn.commit()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                    conn.commit()
+                except Exception:
+                    # Connection is gone; the server already dropped the lock
+                    logger.warning("Failed to release advisory lock %s", name, exc_info=True)
+
+
+class LeaderLock:
+    """
+    Long-lived advisory lock for leader election.
+
+    ``refresh`` tries to take the lock when not held and pings the connection
+    when held; it returns whether this process is the leader. If the leader
+    process dies or loses its connection, the server drops the lock and the
+    next ``refresh`` of another worker wins it.
+    """
+
+    def __init__(self, name: str, engine: Optional[Engine] = None):
+        self.name = name
+        self._engine = engine
+        self._key = lock_key(name)
+        self._conn = None
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from app.core.database import engine
+            self._engine = engine
+        return self._engine
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None or self.engine.dialect.name != "postgresql"
+
+    def refresh(self) -> bool:
+        if self.engine.dialect.name != "postgresql":
+            return True
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except Exception:
+                logger.warning("Lost leader lock %s", self.name, exc_info=True)
+                self._discard()
+        try:
+            conn = self.engine.connect()
+        except Exception:
+            logger.warning("Cannot connect to take leader lock %s", self.name, exc_info=True)
+            return False
+        try:
+            acquired = bool(conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self._key}).scalar())
+            conn.commit()
+        except Exception:
+            logger.warning("Failed to take leader lock %s", self.name, exc_info=True)
+            acquired = False
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        logger.info("Became leader for %s", self.name)
+        return True
+
+    def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._key})
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+        except Exception:
+            logger.warning("Failed to release leader lock %s", self.name, exc_info=True)
+            self._discard()
+
+    def _discard(self) -> None:
+        # Never hand a connection that may still hold the lock back to the pool
+        try:
+            self._conn.invalidate()
+        except Exception:
+            pass
+        self._conn = None
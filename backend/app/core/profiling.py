@@ -0,0 +1,194 @@
+"""
+SQL Profiling - per-request query statistics and slow-query log
+"""
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql.slow")
+
+# Literal / placeholder patterns used to turn a statement into a fingerprint
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def fingerprint_statement(statement: str) -> str:
+    """
+    Normalize a SQL statement so that queries differing only by literal
+    values share one fingerprint (e.g. ``WHERE id = 1`` / ``WHERE id = 2``).
+    """
+    fp = _STRING_RE.sub("?", statement)
+    fp = _PARAM_RE.sub("?", fp)
+    fp = _NUMBER_RE.sub("?", fp)
+    fp = _IN_LIST_RE.sub("IN (...)", fp)
+    fp = _VALUES_RE.sub(r"VALUES \1, ...", fp)
+    return _WHITESPACE_RE.sub(" ", fp).strip()
+
+
+@dataclass
+class RequestQueryStats:
+    """Statements executed while serving a single request"""
+    path: str = ""
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_ms: float = 0.0
+    slowest_statement: Optional[str] = None
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_statement = statement
+
+    def server_timing(self, app_ms: float) -> str:
+        """Render the stats as a ``Server-Timing`` header value"""
+        return (
+            f'db;dur={self.total_ms:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_ms:.2f}, "
+            f"app;dur={app_ms:.2f}"
+        )
+
+
+class QueryFingerprintRegistry:
+    """Process-wide aggregation of query timings keyed by fingerprint"""
+
+    SORT_KEYS = {
+        "total": "total_ms",
+        "count": "count",
+        "max": "max_ms",
+        "mean": "mean_ms",
+    }
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self.dropped = 0
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str, duration_ms: float) -> None:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self.dropped += 1
+                    return
+                entry = {"fingerprint": fingerprint, "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+                self._entries[fingerprint] = entry
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            if duration_ms > entry["max_ms"]:
+                entry["max_ms"] = duration_ms
+
+    def top(self, limit: int = 20, sort: str = "total") -> List[dict]:
+        """Return the ``limit`` most expensive fingerprints"""
+        key = self.SORT_KEYS.get(sort, "total_ms")
+        with self._lock:
+            rows = [
+                {**entry, "mean_ms": entry["total_ms"] / entry["count"]}
+                for entry in self._entries.values()
+            ]
+        rows.sort(key=lambda row: row[key], reverse=True)
+        return rows[:limit]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.dropped = 0
+
+
+query_registry = QueryFingerprintRegistry(max_entries=settings.SQL_FINGERPRINT_LIMIT)
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_request_stats", default=None)
+
+
+def get_request_query_stats() -> Optional[RequestQueryStats]:
+    """Stats for the request currently being served (None outside a request)"""
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    fingerprint = fingerprint_statement(statement)
+    query_registry.record(fingerprint, duration_ms)
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(fingerprint, duration_ms)
+
+    if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            duration_ms,
+            stats.path if stats else "<no request>",
+            fingerprint,
+        )
+
+
+def _handle_error(exception_context):
+    # A statement the driver rejects never reaches after_cursor_execute; drop
+    # its start time so later timings on this (pooled) connection pair up
+    conn = exception_context.connection
+    if (
+        conn is not None
+        and exception_context.statement is not None
+        and isinstance(exception_context.sqlalchemy_exception, DBAPIError)
+    ):
+        started = conn.info.get("query_start_time")
+        if started:
+            started.pop()
+
+
+def install_query_profiler(engine: Engine) -> None:
+    """Attach the timing hooks to an engine (idempotent)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class SQLProfilerMiddleware(BaseHTTPMiddleware):
+    """
+    Collect per-request SQL statistics.
+    Adds a ``Server-Timing`` header outside production.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        stats = RequestQueryStats(path=request.url.path)
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_stats.reset(token)
+
+        if settings.ENVIRONMENT != "production":
+            app_ms = (time.perf_counter() - started) * 1000
+            response.headers["Server-Timing"] = stats.server_timing(app_ms)
+        return response
@@ -0,0 +1,60 @@
+"""
+Shared Redis client
+
+One lazily created connection pool per process. When Redis cannot be
+reached ``get_redis()`` returns None and callers fall back to their
+non-Redis path; the connection is retried after a short back-off instead
+of on every call.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from redis import Redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_S = 30.0
+
+_client: Optional[Redis] = None
+_retry_at: float = 0.0
+_lock = threading.Lock()
+
+
+def get_redis() -> Optional[Redis]:
+    """Return the shared client, or None while Redis is unavailable"""
+    global _client, _retry_at
+    if _client is not None:
+        return _client
+    if time.monotonic() < _retry_at:
+        return None
+
+    with _lock:
+        if _client is not None:
+            return _client
+        try:
+            client = Redis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_S,
+            )
+            client.ping()
+            _client = client
+        except Exception as exc:
+            logger.warning("Redis not available (%s), retrying in %.0fs", exc, RETRY_AFTER_S)
+            _retry_at = time.monotonic() + RETRY_AFTER_S
+        return _client
+
+
+def reset_redis() -> None:
+    """Drop the cached client (tests, or after a failover)"""
+    global _client, _retry_at
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _retry_at = 0.0
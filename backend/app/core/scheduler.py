@@ -0,0 +1,364 @@
+"""
+Job Scheduler - periodic maintenance work inside the API process
+
+Every worker runs a ``Scheduler``; only the one holding the
+``scheduler:leader`` advisory lock runs leader-only jobs (the default). When
+the leader exits or loses its database connection the lock is dropped and
+another worker takes over within SCHEDULER_LEADER_CHECK_S.
+
+Jobs run every ``interval`` seconds or on a 5-field ``cron`` expression
+(minute hour day-of-month month day-of-week, in SCHEDULER_TIMEZONE), on a
+small thread pool. A job never overlaps with itself: a tick that finds the
+previous run still going is counted as skipped. ``jitter`` adds a random
+delay of up to that many seconds to each run.
+
+Each job keeps its last SCHEDULER_HISTORY_SIZE runs plus counters, exposed
+at /debug/scheduler.
+
+Usage (from the lifespan or a service module):
+    scheduler.add_job("coupon-expiry", run_coupon_expiry, cron="*/15 * * * *")
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Set
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.locks import LeaderLock
+
+logger = logging.getLogger(__name__)
+
+# (low, high) of minute, hour, day of month, month, day of week (0 and 7 = Sunday)
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(spec: str, low: int, high: int) -> Set[int]:
+    values: Set[int] = set()
+    for part in spec.split(","):
+        span, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = (int(v) for v in span.split("-", 1))
+        else:
+            start = int(span)
+            end = high if "/" in part else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"Invalid cron field '{spec}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard 5-field cron expression (numbers, ``*``, ranges, lists and steps)"""
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(spec, low, high) for spec, (low, high) in zip(fields, _CRON_FIELDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        # Like cron: when both day fields are restricted, either one matching is enough
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """First matching minute strictly after ``dt`` (keeps ``dt``'s tzinfo)"""
+        dt = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(100_000):
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression never matches: '{self.expression}'")
+
+
+@dataclass
+class JobRun:
+    """One execution of a job"""
+    started_at: str
+    duration_ms: float
+    status: str  # ok | failed
+    result: object = None
+    error: Optional[str] = None
+
+
+class Job:
+    """A registered job with its schedule, counters and recent runs"""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        interval: Optional[float] = None,
+        cron: Optional[str] = None,
+        jitter: float = 0.0,
+        leader_only: bool = True,
+        run_on_stop: bool = False,
+        history_size: int = 50,
+    ):
+        if (interval is None) == (cron is None):
+            raise ValueError(f"Job {name} needs exactly one of interval or cron")
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Job {name} interval must be positive")
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.cron = CronSchedule(cron) if cron else None
+        self.jitter = jitter
+        self.leader_only = leader_only
+        self.run_on_stop = run_on_stop  # one last run at shutdown (e.g. flush pending writes)
+
+        self.next_run: float = 0.0  # epoch seconds
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.history: deque = deque(maxlen=history_size)
+
+    @property
+    def schedule(self) -> str:
+        return f"cron {self.cron.expression}" if self.cron else f"every {self.interval:g}s"
+
+    def schedule_next(self, now: float, tz: ZoneInfo) -> None:
+        if self.cron:
+            base = self.cron.next_after(datetime.fromtimestamp(now, tz)).timestamp()
+        else:
+            base = now + self.interval
+        self.next_run = base + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def record(self, run: JobRun) -> None:
+        self.runs += 1
+        if run.status != "ok":
+            self.failures += 1
+        self.total_ms += run.duration_ms
+        self.max_ms = max(self.max_ms, run.duration_ms)
+        self.history.append(run)
+
+    def snapshot(self, history: bool = True) -> dict:
+        last = self.history[-1] if self.history else None
+        data = {
+            "name": self.name,
+            "schedule": self.schedule,
+            "leader_only": self.leader_only,
+            "running": self.running,
+            "next_run_at": datetime.utcfromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "mean_ms": round(self.total_ms / self.runs, 2) if self.runs else None,
+            "max_ms": round(self.max_ms, 2),
+            "last_status": last.status if last else None,
+            "last_started_at": last.started_at if last else None,
+            "last_error": last.error if last else None,
+        }
+        if history:
+            data["history"] = [asdict(run) for run in reversed(self.history)]
+        return data
+
+
+def _loggable(result: object) -> object:
+    if result is None or isinstance(result, (bool, int, float, str, dict, list)):
+        return result
+    return repr(result)
+
+
+class Scheduler:
+    """Runs registered jobs on a background thread; see module docstring"""
+
+    def __init__(
+        self,
+        leader_lock: Optional[LeaderLock] = None,
+        timezone: str = "UTC",
+        workers: int = 4,
+        leader_check_interval: float = 5.0,
+        history_size: int = 50,
+    ):
+        self.leader_lock = leader_lock
+        self.tz = ZoneInfo(timezone)
+        self.workers = workers
+        self.leader_check_interval = leader_check_interval
+        self.history_size = history_size
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._next_leader_check = 0.0
+
+    # ----- registration ------------------------------------------------------
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], object],
+        *,
+        interval: Optional[float] = None,
+        cron: Optional[str] = None,
+        jitter: float = 0.0,
+        leader_only: bool = True,
+        run_on_stop: bool = False,
+    ) -> Job:
+        """Register (or replace) a job; exactly one of ``interval`` / ``cron``"""
+        job = Job(name, func, interval=interval, cron=cron, jitter=jitter, leader_only=leader_only,
+                  run_on_stop=run_on_stop, history_size=self.history_size)
+        job.schedule_next(time.time(), self.tz)
+        with self._lock:
+            self._jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def remove_job(self, name: str) -> None:
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def get_job(self, name: str) -> Job:
+        job = self._jobs.get(name)
+        if job is None:
+            raise NotFoundException(f"Job {name} not found")
+        return job
+
+    # ----- running -----------------------------------------------------------
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scheduler")
+        return self._executor
+
+    def _execute(self, job: Job) -> None:
+        started = time.perf_counter()
+        started_at = datetime.utcnow().isoformat()
+        try:
+            result = job.func()
+            run = JobRun(started_at, 0.0, "ok", result=_loggable(result))
+        except Exception as exc:
+            logger.exception("Scheduled job %s failed", job.name)
+            run = JobRun(started_at, 0.0, "failed", error=f"{type(exc).__name__}: {exc}")
+        run.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        with self._lock:
+            job.record(run)
+            job.running = False
+        logger.debug("Scheduled job %s finished in %.1fms (%s)", job.name, run.duration_ms, run.status)
+
+    def _dispatch(self, job: Job) -> bool:
+        """Start ``job`` on the pool unless it is still running (caller holds _lock)"""
+        if job.running:
+            job.skipped += 1
+            return False
+        job.running = True
+        self._pool().submit(self._execute, job)
+        return True
+
+    def trigger(self, name: str) -> None:
+        """Run a job now on this worker, regardless of leadership (admin)"""
+        with self._lock:
+            job = self.get_job(name)
+            if not self._dispatch(job):
+                raise BadRequestException(f"Job {name} is already running")
+
+    def run_pending(self, now: Optional[float] = None) -> float:
+        """Dispatch due jobs; returns seconds until the next thing to do"""
+        now = time.time() if now is None else now
+        if now >= self._next_leader_check:
+            self.is_leader = self.leader_lock.refresh() if self.leader_lock else True
+            self._next_leader_check = now + self.leader_check_interval
+
+        wait = self._next_leader_check - now
+        with self._lock:
+            for job in self._jobs.values():
+                if job.next_run <= now:
+                    if self.is_leader or not job.leader_only:
+                        self._dispatch(job)
+                    job.schedule_next(now, self.tz)
+                wait = min(wait, job.next_run - now)
+        return max(wait, 0.0)
+
+    def _loop(self) -> None:
+        while not self._stopping:
+            try:
+                wait = self.run_pending()
+            except Exception:
+                logger.exception("Scheduler tick failed")
+                wait = self.leader_check_interval
+            self._wakeup.wait(wait)
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._next_leader_check = 0.0
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Scheduler started on %s with %s jobs", self.worker_id, len(self._jobs))
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop ticking, wait for running jobs, do run_on_stop jobs, give up leadership"""
+        was_running = self._thread is not None
+        if was_running:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._executor is not None:  # also used by trigger() when never started
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if was_running:
+            for job in list(self._jobs.values()):
+                if job.run_on_stop:
+                    job.running = True
+                    self._execute(job)
+        if self.leader_lock:
+            self.leader_lock.release()
+        self.is_leader = False
+
+    def status(self, history: bool = True) -> dict:
+        with self._lock:
+            jobs = [job.snapshot(history=history) for job in self._jobs.values()]
+        return {
+            "worker": self.worker_id,
+            "running": self._thread is not None,
+            "leader": self.is_leader,
+            "jobs": jobs,
+        }
+
+
+scheduler = Scheduler(
+    leader_lock=LeaderLock("scheduler:leader"),
+    timezone=settings.SCHEDULER_TIMEZONE,
+    workers=settings.SCHEDULER_WORKERS,
+    leader_check_interval=settings.SCHEDULER_LEADER_CHECK_S,
+    history_size=settings.SCHEDULER_HISTORY_SIZE,
+)
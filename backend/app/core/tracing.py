@@ -0,0 +1,367 @@
+"""
+Tracing - lightweight in-process spans with batched JSONL / OTLP export
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import httpx
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass
+class Span:
+    """A timed unit of work inside a trace"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    sampled: bool = True
+    start_ns: int = 0
+    end_ns: int = 0
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        if self.sampled:
+            self.status = "error"
+            self.attributes["exception.type"] = type(exc).__name__
+            self.attributes["exception.message"] = str(exc)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def get_current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def get_current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+class JsonlFileExporter:
+    """Append spans to a local file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as fh:
+            for span in spans:
+                fh.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class OTLPHttpExporter:
+    """Post spans to an OTLP/HTTP collector using the JSON encoding"""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> dict:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _encode(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "app.core.tracing"},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_id or "",
+                            "name": span.name,
+                            "kind": 1,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+                            "status": {"code": 2 if span.status == "error" else 1},
+                        }
+                        for span in spans
+                    ],
+                }],
+            }]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        response = self._client.post(self.endpoint, json=self._encode(spans))
+        response.raise_for_status()
+
+    def shutdown(self) -> None:
+        self._client.close()
+
+
+# ---------------------------------------------------------------------------
+# Batch processor
+# ---------------------------------------------------------------------------
+
+class BatchSpanProcessor:
+    """
+    Buffer finished spans and export them from a background thread.
+    Spans are dropped (and counted) when the buffer is full so tracing
+    never blocks a request.
+    """
+
+    def __init__(self, exporter, max_queue_size: int = 2048, batch_size: int = 256, schedule_delay: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(max_queue_size)
+        self._thread = threading.Thread(target=self._worker, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception:
+            logger.warning("Failed to export %d spans", len(batch), exc_info=True)
+
+    def _worker(self) -> None:
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.schedule_delay
+        while True:
+            try:
+                span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                span = False
+            if span is None:
+                break
+            if span:
+                batch.append(span)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._export(batch)
+                    batch = []
+                deadline = time.monotonic() + self.schedule_delay
+        # Shutdown sentinel: drain whatever is left
+        while True:
+            try:
+                span = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if span:
+                batch.append(span)
+        if batch:
+            self._export(batch)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self.exporter.shutdown()
+
+
+_processor: Optional[BatchSpanProcessor] = None
+
+
+def setup_tracing() -> None:
+    """Start the span export pipeline (no-op when tracing is disabled)"""
+    global _processor
+    if _processor is not None or not settings.TRACING_ENABLED:
+        return
+    if settings.TRACE_EXPORTER == "otlp":
+        exporter = OTLPHttpExporter(settings.OTLP_ENDPOINT, settings.TRACE_SERVICE_NAME)
+    else:
+        exporter = JsonlFileExporter(settings.TRACE_FILE_PATH)
+    _processor = BatchSpanProcessor(exporter)
+
+
+def shutdown_tracing() -> None:
+    """Flush buffered spans and stop the exporter thread"""
+    global _processor
+    if _processor is not None:
+        _processor.shutdown()
+        _processor = None
+
+
+# ---------------------------------------------------------------------------
+# Span API
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def start_span(
+    name: str,
+    trace_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    sampled: Optional[bool] = None,
+    **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Open a child of the current span (or a new root span).
+    The sampling decision is made once at the root and inherited by
+    every child, so unsampled traces cost only a context-var lookup.
+    """
+    if _processor is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    if parent is not None:
+        if not parent.sampled:
+            yield parent
+            return
+        trace_id, parent_id, sampled = parent.trace_id, parent.span_id, True
+    elif sampled is None:
+        sampled = random.random() < settings.TRACE_SAMPLE_RATIO
+
+    span = Span(
+        name=name,
+        trace_id=trace_id or _new_trace_id(),
+        span_id=_new_span_id(),
+        parent_id=parent_id,
+        sampled=sampled,
+        attributes=attributes if sampled else {},
+    )
+    token = _current_span.set(span)
+    span.start_ns = time.time_ns()
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        if span.sampled and _processor is not None:
+            _processor.on_end(span)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator wrapping a sync or async function in a span"""
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def traced_class(cls: type) -> type:
+    """Class decorator applying :func:`traced` to every method (dunders excluded)"""
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("__"):
+            continue
+        if isinstance(value, staticmethod):
+            setattr(cls, attr, staticmethod(traced(f"{cls.__name__}.{attr}")(value.__func__)))
+        elif isinstance(value, classmethod):
+            setattr(cls, attr, classmethod(traced(f"{cls.__name__}.{attr}")(value.__func__)))
+        elif callable(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def parse_traceparent(value: Optional[str]):
+    """Parse a W3C ``traceparent`` header into (trace_id, parent_id, sampled)"""
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if not match:
+        return None, None, None
+    trace_id, parent_id, flags = match.groups()
+    return trace_id, parent_id, bool(int(flags, 16) & 0x01)
+
+
+class TracingMiddleware(BaseHTTPMiddleware):
+    """Open a root span per request, continuing an incoming ``traceparent``"""
+
+    async def dispatch(self, request: Request, call_next):
+        trace_id, parent_id, sampled = parse_traceparent(request.headers.get(TRACEPARENT_HEADER))
+        with start_span(
+            f"{request.method} {request.url.path}",
+            trace_id=trace_id,
+            parent_id=parent_id,
+            sampled=sampled,
+            **{"http.method": request.method, "http.target": request.url.path}
+        ) as span:
+            response = await call_next(request)
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.status = "error"
+            return response
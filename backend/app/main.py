@@ -9,25 +9,40 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, SessionLocal
+from app.core.profiling import SQLProfilerMiddleware
+from app.core.logging_config import setup_logging, shutdown_logging, RequestIdMiddleware
+from app.core.tracing import setup_tracing, shutdown_tracing, TracingMiddleware
 from app.api.api_v1.router import api_router
+from app.core.background import shutdown_executor
+from app.core.scheduler import scheduler
+from app.services.category_tree_service import CategoryTreeService
+from app.services.checkout_queue import checkout_queue
+from app.services.coupon_service import run_coupon_expiry
+from app.services.flash_sale_service import FlashSaleService
+from app.services.idempotency_service import IdempotencyService
+from app.services.notification_service import NotificationService
+from app.services.order_service import OrderService
+from app.services.popularity_service import PopularityService
+from app.services.recommendation_service import RecommendationService
+from app.services.stock_reservation_service import StockReservationService
+from app.services.suggestion_service import SuggestionService
 
 # Import all models to register with SQLAlchemy Base
 from app.models import user, product, order, cart, chat, address, banner  # noqa
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging (JSON lines, written off the request thread)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging()
+    setup_tracing()
     logger.info("Starting up LuxeFurniture Backend...")
-    logger.info(f"Environment: {settings.ENVIRONMENT}")
-    logger.info(f"Database: {settings.DATABASE_URL.split('@')[-1]}")
+    logger.info("Environment: %s", settings.ENVIRONMENT)
+    logger.info("Database: %s", settings.DATABASE_URL.split('@')[-1])
 
     # Auto-create tables in development
     if settings.ENVIRONMENT == "development":
@@ -38,10 +53,87 @@ async def lifespan(app: FastAPI):
         try:
             init_db()
         except Exception as e:
-            logger.error(f"Failed to initialize database: {e}")
+            logger.error("Failed to initialize database: %s", e)
+
+    scheduler.add_job(
+        "stock-reservation-sweeper",
+        StockReservationService.run_sweep,
+        interval=settings.STOCK_RESERVATION_SWEEP_INTERVAL_S,
+        jitter=5,
+    )
+    if settings.FLASH_SALE_ENABLED:
+        # Write-behind of flash-sale stock counters; flush once more on shutdown
+        scheduler.add_job(
+            "flash-sale-flusher",
+            FlashSaleService.flush_pending,
+            interval=settings.FLASH_SALE_FLUSH_INTERVAL_S,
+            run_on_stop=True,
+        )
+        # Units a release could not give back to Redis (per worker)
+        scheduler.add_job(
+            "flash-sale-release-retry",
+            FlashSaleService.retry_releases,
+            interval=settings.FLASH_SALE_FLUSH_INTERVAL_S,
+            leader_only=False,
+            run_on_stop=True,
+        )
+    if settings.ORDER_AUTO_CANCEL_ENABLED:
+        # Unpaid online-payment orders past ORDER_PAYMENT_TIMEOUT_MINUTES
+        scheduler.add_job(
+            "order-auto-cancel",
+            OrderService.run_auto_cancel,
+            interval=settings.ORDER_AUTO_CANCEL_INTERVAL_S,
+            jitter=5,
+        )
+    scheduler.add_job("coupon-expiry", run_coupon_expiry, cron="*/15 * * * *")
+    scheduler.add_job("notification-log-purge", NotificationService.run_log_purge, cron="30 3 * * *")
+    scheduler.add_job("idempotency-key-purge", IdempotencyService.run_purge, cron="15 * * * *")
+    scheduler.add_job("related-products-rebuild", RecommendationService.run_rebuild, cron="45 2 * * *")
+    scheduler.add_job("user-recommendations-rebuild", RecommendationService.run_personalized, cron="15 3 * * *")
+    scheduler.add_job(
+        "related-products-update",
+        RecommendationService.run_update,
+        interval=settings.RELATED_UPDATE_INTERVAL_S,
+        jitter=30,
+    )
+    # Every worker flushes its own buffered product events, and once more on shutdown
+    scheduler.add_job(
+        "popularity-flush",
+        PopularityService.flush_pending,
+        interval=settings.POPULARITY_FLUSH_INTERVAL_S,
+        leader_only=False,
+        run_on_stop=True,
+    )
+    # Autocomplete index: built now, rebuilt on catalog changes in other workers
+    try:
+        with SessionLocal() as db:
+            logger.info("Suggestion index: %s entries", SuggestionService.rebuild(db))
+    except Exception as e:
+        logger.error("Failed to build suggestion index: %s", e)  # suggestion-sync retries
+    scheduler.add_job(
+        "suggestion-sync",
+        SuggestionService.run_sync,
+        interval=settings.SUGGEST_SYNC_INTERVAL_S,
+        leader_only=False,
+    )
+    scheduler.add_job(
+        "category-tree-sync",
+        CategoryTreeService.run_sync,
+        interval=settings.CATEGORY_TREE_SYNC_INTERVAL_S,
+        leader_only=False,
+    )
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
+    if settings.CHECKOUT_QUEUE_ENABLED:
+        checkout_queue.start()
 
     yield
     logger.info("Shutting down LuxeFurniture Backend...")
+    checkout_queue.stop()  # finishes queued checkouts; their notifications go to the executor
+    scheduler.stop()
+    shutdown_executor()
+    shutdown_tracing()
+    shutdown_logging()
 
 
 # Create app
@@ -65,6 +157,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL statistics (Server-Timing header + slow query log)
+if settings.SQL_PROFILING_ENABLED:
+    app.add_middleware(SQLProfilerMiddleware)
+
+# Root span per request (continues an incoming W3C traceparent)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Request correlation id (outermost so every log line of the request carries it)
+app.add_middleware(RequestIdMiddleware)
+
 # Static
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -93,7 +196,7 @@ async def health_check():
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
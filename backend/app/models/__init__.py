@@ -14,6 +14,12 @@ from app.models.address import Address
 from app.models.banner import Banner
 from app.models.notification import UserNotificationPreference, Notification, PushSubscription
 from app.models.coupon import Coupon, CouponType, CouponStatus
+from app.models.stock_reservation import StockReservation, ReservationStatus
+from app.models.idempotency_key import IdempotencyKey
+from app.models.product_stats import ProductStats
+from app.models.related_product import ProductCoPurchase, RelatedProduct
+from app.models.recommendation import ProductSimilarity, UserRecommendation
+from app.models.product_like import ProductLike
 
 __all__ = [
     "Base",
@@ -40,4 +46,13 @@ __all__ = [
     "Coupon",
     "CouponType",
     "CouponStatus",
+    "StockReservation",
+    "ReservationStatus",
+    "IdempotencyKey",
+    "ProductStats",
+    "ProductCoPurchase",
+    "RelatedProduct",
+    "ProductSimilarity",
+    "UserRecommendation",
+    "ProductLike",
 ]
@@ -1,7 +1,7 @@
 """
 Coupon/Voucher Model for promotional discounts
 """
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, Boolean, DateTime, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -54,6 +54,11 @@ class Coupon(Base):
     order = relationship("Order", foreign_keys=[order_id], backref="applied_coupon")
     source_order = relationship("Order", foreign_keys=[source_order_id], backref="generated_coupons")
     
+    __table_args__ = (
+        # Expiry sweep: active coupons by end date (enum stored by name)
+        Index("ix_coupons_active_valid_until", "valid_until", postgresql_where=text("status = 'ACTIVE'")),
+    )
+    
     def is_valid(self) -> bool:
         """Check if coupon is still valid"""
         if self.status != CouponStatus.ACTIVE:
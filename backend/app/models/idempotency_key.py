@@ -0,0 +1,25 @@
+"""
+Idempotency Key Model - stored responses of retried POST requests
+"""
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, UniqueConstraint
+
+from app.models.base import Base
+
+
+class IdempotencyKey(Base):
+    """Response of the first request sent with an ``Idempotency-Key`` header"""
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of method, path and body
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is running
+    response_body = Column(JSON, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.user_id}:{self.key}>"
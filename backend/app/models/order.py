@@ -1,7 +1,7 @@
 """
 Order and OrderItem Models - Enhanced for Furniture E-commerce
 """
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Text, Boolean, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -62,6 +62,15 @@ class Order(Base):
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Auto-cancel sweeper: open unpaid orders by age
+        Index(
+            "ix_orders_unpaid_created_at",
+            "created_at",
+            postgresql_where=text("status IN ('pending', 'awaiting_payment') AND is_paid = false"),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Order(id={self.id}, user_id={self.user_id}, total={self.total_amount}, status='{self.status}')>"
 
@@ -70,7 +79,7 @@ class OrderItem(Base):
     """Order Item Model"""
     __tablename__ = "order_items"
     
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     
     product_name = Column(String, nullable=False)       # Lưu tên sản phẩm lúc mua
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, JSON
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, JSON, Index, Computed, case, cast, literal, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import Grouping
 from app.core.database import Base
 
 # 1. DANH MỤC (Category) - VD: Sofa, Bàn ăn, Đèn
@@ -49,6 +49,8 @@ class Product(Base):
     # --- Thông tin bán hàng ---
     price = Column(Float, nullable=False)
     sale_price = Column(Float, nullable=True) # Giá khuyến mãi (nếu có)
+    # Giá khách thực trả (= pricing_service.unit_price), Postgres tự tính - dùng để lọc/sắp xếp
+    effective_price = Column(Float, Computed("COALESCE(NULLIF(sale_price, 0), price)", persisted=True))
     stock = Column(Integer, default=0) # Tồn kho
     is_active = Column(Boolean, default=True) # Còn bán hay không
     is_featured = Column(Boolean, default=False) # Sản phẩm nổi bật (hiện trang chủ)
@@ -59,9 +61,6 @@ class Product(Base):
     thumbnail_url = Column(String) # Ảnh đại diện
     images = Column(JSON, default=[]) # List các URL ảnh phụ: ["img1.jpg", "img2.jpg"]
     
-    # --- Social Features ---
-    likes = Column(ARRAY(Integer), default=list) # List of user IDs who liked this product
-
     # --- ĐẶC THÙ NỘI THẤT (Technical Specs) ---
     # Lưu kích thước: {"length": 200, "width": 80, "height": 75, "unit": "cm"}
     dimensions = Column(JSON, nullable=True) 
@@ -79,6 +78,78 @@ class Product(Base):
     category = relationship("Category", back_populates="products")
     collection = relationship("Collection", back_populates="products")
     order_items = relationship("OrderItem", back_populates="product")
+    # Bộ đếm (lượt xem, lượt thích...) - bảng product_stats, có thể chưa có dòng
+    stats = relationship("ProductStats", uselist=False, viewonly=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    @property
+    def like_count(self) -> int:
+        return self.stats.like_count if self.stats else 0
+
+
+# --- Sắp xếp danh sách sản phẩm ---
+# Sorted, filtered pages of /products are read straight off these (id breaks ties)
+Index("ix_products_active_category_price", Product.is_active, Product.category_id, Product.effective_price, Product.id)
+Index("ix_products_active_price", Product.is_active, Product.effective_price, Product.id)
+Index("ix_products_active_created", Product.is_active, Product.created_at, Product.id)
+
+
+# --- Lọc theo thông số (specs / dimensions JSON) ---
+# Constants are rendered inline (literal_execute) so the filters of the
+# product list match the expression indexes below exactly; a bound
+# parameter would not match an index expression.
+DIMENSION_AXES = ("length", "width", "height")
+
+
+def _inline(value):
+    return literal(value, literal_execute=True)
+
+
+def spec_attribute(name: str):
+    """``specs ->> 'name'``"""
+    return Product.specs.op("->>", return_type=String)(_inline(name))
+
+
+def _dimension(key: str):
+    return Product.dimensions.op("->>", return_type=String)(_inline(key))
+
+
+def dimension_cm(axis: str):
+    """A dimension in cm (``unit`` mm/m converted); NULL when missing or not a number"""
+    unit = func.lower(_dimension("unit"))
+    unit_factor = case(
+        (unit == _inline("mm"), _inline(0.1)),
+        (unit == _inline("m"), _inline(100.0)),
+        else_=_inline(1.0),
+    )
+    return Grouping(case(  # parenthesized: an index on it needs ((CASE ...))
+        (
+            _dimension(axis).regexp_match(_inline("^[0-9]+([.][0-9]+)?$")),
+            cast(_dimension(axis), Float) * unit_factor,
+        ),
+    ))
+
+
+Index("ix_products_specs_material", spec_attribute("material"), postgresql_where=text("is_active"))
+Index("ix_products_specs_color", spec_attribute("color"), postgresql_where=text("is_active"))
+for _axis in DIMENSION_AXES:
+    Index(f"ix_products_{_axis}_cm", dimension_cm(_axis), postgresql_where=text("is_active"))
+
+
+# --- Thẻ sản phẩm (?view=card) ---
+# Đủ cho một thẻ trong lưới sản phẩm; mô tả HTML, ảnh phụ, specs, dimensions không được tải
+CARD_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.slug,
+    Product.price,
+    Product.sale_price,
+    Product.effective_price,
+    Product.stock,
+    Product.short_description,
+    Product.thumbnail_url,
+    Product.category_id,
+    Product.is_featured,
+)
@@ -0,0 +1,22 @@
+"""
+Product Like Model - one row per (user, product) like
+"""
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+
+from app.models.base import Base
+
+
+class ProductLike(Base):
+    """A user liking a product; the count is kept in product_stats.like_count"""
+    __tablename__ = "product_likes"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    __table_args__ = (
+        # (user_id, product_id) also serves "which of these did I like" and the user's like list
+        UniqueConstraint("user_id", "product_id", name="uq_product_likes_user_product"),
+    )
+
+    def __repr__(self):
+        return f"<ProductLike {self.user_id}:{self.product_id}>"
@@ -0,0 +1,26 @@
+"""
+Product Stats Model - view / add-to-cart / purchase / like counters and popularity
+"""
+from sqlalchemy import Column, Integer, BigInteger, Float, ForeignKey, Index
+
+from app.models.base import Base
+
+
+class ProductStats(Base):
+    """Engagement counters of one product, written in batches by popularity_service"""
+    __tablename__ = "product_stats"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, unique=True)
+    view_count = Column(BigInteger, default=0, nullable=False)
+    cart_count = Column(BigInteger, default=0, nullable=False)
+    purchase_count = Column(BigInteger, default=0, nullable=False)
+    like_count = Column(BigInteger, default=0, nullable=False)  # exact: written with each like / unlike
+    # log2 of the time-decayed, weighted event total (see popularity_service); sort by it directly
+    log_score = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<ProductStats {self.product_id}>"
+
+
+# Homepage "popular" list and ?sort=popular
+Index("ix_product_stats_log_score", ProductStats.log_score.desc(), ProductStats.product_id)
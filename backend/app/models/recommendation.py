@@ -0,0 +1,35 @@
+"""
+Recommendation Models - item-item similarity and per-user recommendations
+"""
+from sqlalchemy import Column, Integer, Float, ForeignKey, UniqueConstraint
+
+from app.models.base import Base
+
+
+class ProductSimilarity(Base):
+    """Nearest neighbors of a product over the user-item matrix (likes and purchases)"""
+    __tablename__ = "product_similarities"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    similar_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)  # cosine of the two products' user vectors
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "similar_id", name="uq_product_similarities_pair"),
+    )
+
+
+class UserRecommendation(Base):
+    """Materialized top-N recommendations of a user, rebuilt by recommendation_service"""
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "product_id", name="uq_user_recommendations_user_product"),
+    )
+
+    def __repr__(self):
+        return f"<UserRecommendation {self.user_id}:{self.product_id}>"
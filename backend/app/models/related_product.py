@@ -0,0 +1,40 @@
+"""
+Related Product Models - "frequently bought together" from order co-occurrence
+"""
+from sqlalchemy import Column, Integer, BigInteger, Float, ForeignKey, UniqueConstraint
+
+from app.models.base import Base
+
+
+class ProductCoPurchase(Base):
+    """
+    Number of orders containing both products (one cell of the sparse
+    item-item matrix; product_id == other_id holds the orders of the product)
+    """
+    __tablename__ = "product_co_purchases"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    other_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    order_count = Column(BigInteger, nullable=False)
+    last_order_id = Column(Integer, nullable=False, index=True)  # newest order counted (job watermark)
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "other_id", name="uq_product_co_purchases_pair"),
+    )
+
+
+class RelatedProduct(Base):
+    """Top neighbors of a product, precomputed by recommendation_service"""
+    __tablename__ = "related_products"
+
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    related_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    score = Column(Float, nullable=False)  # cosine of the two products' order vectors
+    order_count = Column(BigInteger, nullable=False)  # orders with both
+
+    __table_args__ = (
+        UniqueConstraint("product_id", "related_id", name="uq_related_products_pair"),
+    )
+
+    def __repr__(self):
+        return f"<RelatedProduct {self.product_id}->{self.related_id}>"
@@ -0,0 +1,51 @@
+"""
+Stock Reservation Model - soft holds between checkout start and order creation
+"""
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index, CheckConstraint, text
+from sqlalchemy.orm import relationship
+import enum
+
+from app.models.base import Base
+
+
+class ReservationStatus(str, enum.Enum):
+    """Reservation status enumeration"""
+    ACTIVE = "active"           # Đang giữ hàng (đến expires_at)
+    COMMITTED = "committed"     # Đã chuyển thành đơn hàng
+    RELEASED = "released"       # Khách hủy / bắt đầu checkout mới
+    EXPIRED = "expired"         # Hết hạn, đã được sweeper dọn
+
+
+class StockReservation(Base):
+    """Time-limited hold of product units for one checkout"""
+    __tablename__ = "stock_reservations"
+
+    token = Column(String(64), nullable=False, index=True)  # Shared by all holds of one checkout
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), default=ReservationStatus.ACTIVE, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="SET NULL"), nullable=True)
+
+    product = relationship("Product")
+
+    __table_args__ = (
+        CheckConstraint("quantity > 0", name="ck_stock_reservations_quantity_positive"),
+        # Available-to-sell = stock - live holds: index-only scan per product
+        Index(
+            "ix_stock_reservations_active_product",
+            "product_id", "expires_at",
+            postgresql_include=["quantity"],
+            postgresql_where=text("status = 'active'"),
+        ),
+        # Sweeper: active holds past their expiry
+        Index(
+            "ix_stock_reservations_active_expiry",
+            "expires_at",
+            postgresql_where=text("status = 'active'"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<StockReservation(token={self.token}, product_id={self.product_id}, quantity={self.quantity}, status={self.status})>"
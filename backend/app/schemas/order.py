@@ -2,7 +2,7 @@
 Order Schemas - Enhanced for Furniture E-commerce
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Union
 from datetime import datetime
 
 from app.schemas.base import TimestampSchema
@@ -55,6 +55,24 @@ class OrderCreate(OrderBase):
     collections: Optional[List[OrderCollectionCreate]] = []  # Collections being purchased
     deposit_amount: Optional[float] = 0  # Số tiền cọc (nếu có)
     coupon_code: Optional[str] = None  # Mã giảm giá (nếu có)
+    reservation_token: Optional[str] = None  # Token giữ hàng từ POST /orders/reservations
+
+
+class StockReservationCreate(BaseModel):
+    """Checkout start: items to hold"""
+    items: List[OrderItemCreate]
+
+
+class StockReservationItem(BaseModel):
+    product_id: int
+    quantity: int
+
+
+class StockReservationResponse(BaseModel):
+    """Held items and when the hold lapses"""
+    token: str
+    expires_at: datetime
+    items: List[StockReservationItem]
 
 
 class OrderUpdate(BaseModel):
@@ -99,3 +117,17 @@ class OrderListResponse(BaseModel):
     """Order list response"""
     orders: List[OrderResponse]
     total: int
+
+
+class CheckoutTicketError(BaseModel):
+    status_code: int
+    detail: Union[str, list, dict]
+
+
+class CheckoutTicketResponse(BaseModel):
+    """Queued checkout (POST /orders while the checkout queue is on)"""
+    ticket_id: str
+    status: str  # queued | processing | completed | failed
+    position: Optional[int] = None  # checkouts ahead of this one in its lane
+    order: Optional[OrderResponse] = None  # set once completed
+    error: Optional[CheckoutTicketError] = None
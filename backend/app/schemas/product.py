@@ -39,6 +39,11 @@ class CategoryResponse(CategoryBase):
         from_attributes = True
 
 
+class CategoryTreeNode(CategoryResponse):
+    """Category with its sub-categories"""
+    children: List["CategoryTreeNode"] = []
+
+
 # ============================================================================
 # COLLECTION SCHEMAS (Bundle/Combo Support)
 # ============================================================================
@@ -153,14 +158,91 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(TimestampSchema, ProductBase):
     """Product response schema"""
+    effective_price: Optional[float] = None  # sale_price if set, else price
+    like_count: int = 0
     category: Optional[CategoryResponse] = None
     collection: Optional[CollectionResponse] = None
 
 
+class ProductCardResponse(BaseModel):
+    """Product grid card (``view=card``): no description, images, specs or relations"""
+    id: int
+    name: str
+    slug: str
+    price: float
+    sale_price: Optional[float] = None
+    effective_price: Optional[float] = None
+    stock: int = 0
+    short_description: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    category_id: Optional[int] = None
+    is_featured: bool = False
+    like_count: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class CategoryFacet(BaseModel):
+    id: int
+    name: Optional[str] = None
+    count: int
+
+
+class PriceRangeFacet(BaseModel):
+    min: float
+    max: Optional[float] = None  # None: open-ended top band
+    count: int
+
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Filter sidebar counts; each facet ignores its own filter"""
+    categories: List[CategoryFacet] = []
+    price_ranges: List[PriceRangeFacet] = []
+    materials: List[FacetValue] = []
+    colors: List[FacetValue] = []
+
+
 class ProductListResponse(BaseModel):
     """Product list response"""
     products: List[ProductResponse]
     total: int
+    facets: Optional[ProductFacets] = None  # only with ?facets=true
+
+
+class ProductCardListResponse(BaseModel):
+    """Product list response with ``view=card``"""
+    products: List[ProductCardResponse]
+    total: int
+    facets: Optional[ProductFacets] = None
+
+
+class SuggestionItem(BaseModel):
+    type: str  # product | category | collection
+    id: int
+    name: str
+    slug: Optional[str] = None
+
+
+class SuggestionResponse(BaseModel):
+    """Search-box autocomplete, most popular first"""
+    suggestions: List[SuggestionItem]
+
+
+class LikeStatus(BaseModel):
+    product_id: int
+    liked: bool
+    like_count: int
+
+
+class LikedProductsResponse(BaseModel):
+    """Which of the requested products the current user has liked"""
+    product_ids: List[int]
 
 
 class CollectionWithProductsResponse(CollectionBase):
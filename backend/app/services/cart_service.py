@@ -1,7 +1,7 @@
 """
 Cart Service
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import Optional
 
 from app.models.cart import Cart, CartItem
@@ -9,15 +9,29 @@ from app.models.product import Product
 from app.models.collection import Collection
 from app.schemas.cart import CartItemCreate, CartItemUpdate, CartResponse, CartSummary, CollectionAddToCart
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.tracing import traced_class
+from app.services.popularity_service import PopularityService
+from app.services.pricing_service import PricingService
+from app.services.stock_reservation_service import StockReservationService
 
 
+@traced_class
 class CartService:
     """Cart service"""
     
+    @staticmethod
+    def _available_stock(db: Session, user_id: int, products: list) -> dict:
+        """Stock minus units held by other shoppers' live checkouts, per product id"""
+        held = StockReservationService.held_quantities(db, [p.id for p in products], exclude_user_id=user_id)
+        return {p.id: max((p.stock or 0) - held.get(p.id, 0), 0) for p in products}
+    
     @staticmethod
     def get_or_create_cart(db: Session, user_id: int) -> Cart:
         """Get or create cart for user"""
-        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
+        cart = db.query(Cart)\
+            .options(selectinload(Cart.items).joinedload(CartItem.product))\
+            .filter(Cart.user_id == user_id)\
+            .first()
         
         if not cart:
             cart = Cart(user_id=user_id)
@@ -37,26 +51,7 @@ class CartService:
     def get_cart_summary(db: Session, user_id: int) -> CartSummary:
         """Get cart with calculated totals"""
         cart = CartService.get_or_create_cart(db, user_id)
-        
-        subtotal = 0.0
-        total_items = 0
-        
-        for item in cart.items:
-            if item.collection_id:
-                # Combo item - use collection's sale_price
-                if item.collection.sale_price:
-                    subtotal += item.collection.sale_price * item.quantity
-                else:
-                    # Fallback: sum product prices
-                    for coll_item in item.collection.items:
-                        price = coll_item.product.sale_price if coll_item.product.sale_price else coll_item.product.price
-                        subtotal += price * coll_item.quantity * item.quantity
-                total_items += item.quantity
-            else:
-                # Regular product item
-                price = item.product.sale_price if item.product.sale_price else item.product.price
-                subtotal += price * item.quantity
-                total_items += item.quantity
+        subtotal, total_items = PricingService.cart_subtotal(db, cart.items)
         
         return CartSummary(
             cart=cart,
@@ -94,8 +89,9 @@ class CartService:
             raise BadRequestException("Product is not available")
         
         # Check stock availability
-        if product.stock < data.quantity:
-            raise BadRequestException(f"Insufficient stock. Available: {product.stock}")
+        available = CartService._available_stock(db, user_id, [product])[product.id]
+        if available < data.quantity:
+            raise BadRequestException(f"Insufficient stock. Available: {available}")
         
         # Check if item already exists in cart
         # CRITICAL: Also check is_collection to prevent Product ID 1 from matching Collection ID 1
@@ -110,8 +106,8 @@ class CartService:
             new_quantity = existing_item.quantity + data.quantity
             
             # Check stock for new quantity
-            if product.stock < new_quantity:
-                raise BadRequestException(f"Insufficient stock. Available: {product.stock}")
+            if available < new_quantity:
+                raise BadRequestException(f"Insufficient stock. Available: {available}")
             
             existing_item.quantity = new_quantity
             db.commit()
@@ -128,6 +124,7 @@ class CartService:
             db.commit()
             db.refresh(cart)
         
+        PopularityService.record("cart", [product.id])
         return cart
     
     @staticmethod
@@ -156,13 +153,15 @@ class CartService:
             # Check if product is active
             if not item.product.is_active:
                 raise BadRequestException(f"{item.product.name} is not available")
-            
+        
+        available = CartService._available_stock(db, user_id, [item.product for item in collection.items])
+        for item in collection.items:
             # Check stock
             required_stock = item.quantity * data.quantity
-            if item.product.stock < required_stock:
+            if available[item.product_id] < required_stock:
                 raise BadRequestException(
                     f"Insufficient stock for {item.product.name}. "
-                    f"Required: {required_stock}, Available: {item.product.stock}"
+                    f"Required: {required_stock}, Available: {available[item.product_id]}"
                 )
         
         # Check if combo already exists in cart
@@ -179,14 +178,11 @@ class CartService:
             
             # Re-check stock for new quantity
             for item in collection.items:
-                if not item.product:
-                    raise BadRequestException(f"Product with ID {item.product_id} not found")
-                
                 required_stock = item.quantity * new_quantity
-                if item.product.stock < required_stock:
+                if available[item.product_id] < required_stock:
                     raise BadRequestException(
                         f"Insufficient stock for {item.product.name}. "
-                        f"Required: {required_stock}, Available: {item.product.stock}"
+                        f"Required: {required_stock}, Available: {available[item.product_id]}"
                     )
             
             existing_item.quantity = new_quantity
@@ -204,6 +200,7 @@ class CartService:
             db.commit()
             db.refresh(cart)
         
+        PopularityService.record("cart", [item.product_id for item in collection.items])
         return cart
     
     @staticmethod
@@ -225,8 +222,9 @@ class CartService:
             # Regular product
             if not cart_item.product:
                 raise BadRequestException("Product not found")
-            if cart_item.product.stock < data.quantity:
-                raise BadRequestException(f"Insufficient stock. Available: {cart_item.product.stock}")
+            available = CartService._available_stock(db, user_id, [cart_item.product])[cart_item.product_id]
+            if available < data.quantity:
+                raise BadRequestException(f"Insufficient stock. Available: {available}")
         elif cart_item.collection_id:
             # Combo - check all products in combo
             if not cart_item.collection:
@@ -234,11 +232,15 @@ class CartService:
             for item in cart_item.collection.items:
                 if not item.product:
                     raise BadRequestException(f"Product with ID {item.product_id} not found")
+            available = CartService._available_stock(
+                db, user_id, [item.product for item in cart_item.collection.items]
+            )
+            for item in cart_item.collection.items:
                 required_stock = item.quantity * data.quantity
-                if item.product.stock < required_stock:
+                if available[item.product_id] < required_stock:
                     raise BadRequestException(
                         f"Insufficient stock for {item.product.name}. "
-                        f"Required: {required_stock}, Available: {item.product.stock}"
+                        f"Required: {required_stock}, Available: {available[item.product_id]}"
                     )
         
         # Update quantity
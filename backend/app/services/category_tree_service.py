@@ -0,0 +1,171 @@
+"""
+Category Tree Service
+
+Categories form a tree through ``parent_id`` (Phòng khách -> Sofa). Every
+worker keeps the whole tree in memory, built from one query:
+
+    tree      nested categories for GET /products/categories/tree
+    subtrees  category id -> itself and all of its descendants
+
+so filtering products by a category is a single indexed
+``category_id IN (...)`` over ``subtrees[id]``, with no recursive query per
+request. The tree is small (a few hundred categories at most) and rarely
+written.
+
+Category writes (product_service) drop the local tree and bump
+``catalog:categories`` in Redis; the next read rebuilds it. The
+``category-tree-sync`` job in every other worker sees the new version within
+CATEGORY_TREE_SYNC_INTERVAL_S and rebuilds. Without Redis other workers
+converge on their next periodic rebuild (CATEGORY_TREE_REBUILD_INTERVAL_S).
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.product import Category
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "catalog:categories"
+COLUMNS = ("id", "name", "slug", "description", "image_url", "parent_id")
+
+
+@dataclass(frozen=True)
+class CategoryTree:
+    """Immutable snapshot; replaced whole, never modified"""
+    tree: List[dict]  # root categories, each with its "children"
+    subtrees: Dict[int, Tuple[int, ...]]
+    version: Optional[int]  # Redis version it was built at
+    built_at: float  # time.monotonic()
+
+    @classmethod
+    def build(cls, rows: Sequence[Sequence], version: Optional[int] = None) -> "CategoryTree":
+        """
+        Build from (id, name, slug, description, image_url, parent_id) rows
+
+        A category whose parent is missing, or which sits on a ``parent_id``
+        cycle, is shown as a root instead of disappearing.
+        """
+        nodes = {row[0]: dict(zip(COLUMNS, row), children=[]) for row in rows}
+        children: Dict[int, List[int]] = {}
+        roots = []
+        for category_id in sorted(nodes):
+            parent_id = nodes[category_id]["parent_id"]
+            if parent_id in nodes and parent_id != category_id:
+                children.setdefault(parent_id, []).append(category_id)
+            else:
+                roots.append(category_id)
+
+        subtrees: Dict[int, Tuple[int, ...]] = {}
+
+        def attach(root: int) -> None:
+            # Iterative post-order: a subtree is complete once all its children are
+            stack = [(root, False)]
+            while stack:
+                category_id, expanded = stack.pop()
+                if expanded:
+                    ids = [category_id]
+                    for child_id in children.get(category_id, ()):
+                        ids.extend(subtrees[child_id])
+                        nodes[category_id]["children"].append(nodes[child_id])
+                    subtrees[category_id] = tuple(ids)
+                    continue
+                stack.append((category_id, True))
+                for child_id in children.get(category_id, ()):
+                    if child_id not in subtrees:
+                        stack.append((child_id, False))
+
+        for root in roots:
+            attach(root)
+        for category_id in sorted(nodes):
+            if category_id not in subtrees:  # on a cycle: cut it here
+                children.get(nodes[category_id]["parent_id"], []).remove(category_id)
+                roots.append(category_id)
+                attach(category_id)
+
+        return cls(
+            tree=[nodes[root] for root in roots],
+            subtrees=subtrees,
+            version=version,
+            built_at=time.monotonic(),
+        )
+
+
+class _Cache:
+    def __init__(self):
+        self.tree: Optional[CategoryTree] = None
+        self.generation = 0  # bumped by invalidate(); a build started before it is discarded
+        self.lock = threading.Lock()
+
+
+_cache = _Cache()
+
+
+class CategoryTreeService:
+    """The in-memory category tree"""
+
+    @staticmethod
+    def get(db: Session) -> CategoryTree:
+        return _cache.tree or CategoryTreeService.rebuild(db)
+
+    @staticmethod
+    def subtree_ids(db: Session, category_id: int) -> Tuple[int, ...]:
+        """``category_id`` and all of its descendants"""
+        return CategoryTreeService.get(db).subtrees.get(category_id, (category_id,))
+
+    @staticmethod
+    def rebuild(db: Session) -> CategoryTree:
+        generation = _cache.generation
+        version = CategoryTreeService._current_version()  # before reading: a later change rebuilds again
+        rows = db.query(*(getattr(Category, column) for column in COLUMNS)).all()
+        tree = CategoryTree.build(rows, version)
+        with _cache.lock:
+            if _cache.generation == generation:
+                _cache.tree = tree
+        return tree
+
+    @staticmethod
+    def run_sync() -> int:
+        """Scheduled job (every worker): rebuild on a category change elsewhere, or when due"""
+        tree = _cache.tree
+        if tree is None:
+            return 0  # built on the next read
+        due = time.monotonic() - tree.built_at >= settings.CATEGORY_TREE_REBUILD_INTERVAL_S
+        version = CategoryTreeService._current_version()
+        if not due and (version is None or version == tree.version):
+            return 0
+        with SessionLocal() as db:
+            return len(CategoryTreeService.rebuild(db).subtrees)
+
+    @staticmethod
+    def invalidate() -> None:
+        """A category was created, updated or deleted (call after commit)"""
+        with _cache.lock:
+            _cache.generation += 1
+            _cache.tree = None
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            redis.incr(VERSION_KEY)
+        except RedisError as exc:
+            logger.warning("Failed to publish category tree change: %s", exc)
+
+    @staticmethod
+    def _current_version() -> Optional[int]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            return int(redis.get(VERSION_KEY) or 0)
+        except RedisError as exc:
+            logger.warning("Category tree version unavailable: %s", exc)
+            return None
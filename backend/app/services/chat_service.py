@@ -4,10 +4,15 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List
 from datetime import datetime
+import logging
 
 from app.models.chat import ChatSession, ChatMessage, ChatStatus, MessageSender
 from app.models.user import User
 from app.services.chatbot_service import ChatbotService
+from app.core.tracing import traced_class
+
+logger = logging.getLogger(__name__)
+
 
 class ConnectionManager:
     def __init__(self):
@@ -37,6 +42,7 @@ class ConnectionManager:
 connection_manager = ConnectionManager()
 
 
+@traced_class
 class ChatService:
 
     @staticmethod
@@ -199,11 +205,11 @@ class ChatService:
             db.commit()
             db.refresh(system_msg)
             
-            print(f"[DEBUG] Sent chat notification to user {user_id}: {message[:50]}...")
+            logger.debug("Sent chat notification to user %s", user_id)
             return system_msg
             
-        except Exception as e:
-            print(f"[ERROR] Failed to send chat notification to user {user_id}: {str(e)}")
+        except Exception:
+            logger.exception("Failed to send chat notification to user %s", user_id)
             db.rollback()
             return None
 
@@ -0,0 +1,277 @@
+"""
+Checkout Queue
+
+Admission-controlled checkout for peak events (CHECKOUT_QUEUE_ENABLED).
+POST /orders checks the request, queues it and answers 202 with a ticket. A
+fixed pool of CHECKOUT_QUEUE_WORKERS threads creates the orders, each with
+its own session, so no more than that many checkouts hold DB connections and
+row locks at once however many requests arrive; the rest of the API keeps
+its share of the pool.
+
+Every worker owns a lane (a FIFO queue). Checkouts of the same SKU run one
+after another in arrival order instead of piling up on that product's row
+lock: a checkout goes to the lane of the pending checkouts that share its
+SKUs (the lane of its lowest product id if there are none). A basket that
+bridges two lanes ({3, 7} while 3 and 7 are queued on different lanes)
+joins one of them and waits for the earlier checkouts of its SKUs on the
+other. Waits only ever point at earlier checkouts, so the oldest one can
+always run. Once CHECKOUT_QUEUE_MAX_PENDING checkouts are waiting or
+running, new ones get 503 with Retry-After.
+
+Tickets live in this process and are kept CHECKOUT_QUEUE_TICKET_TTL_S after
+they finish. Clients poll GET /orders/checkout/{ticket_id} or stream
+GET /orders/checkout/{ticket_id}/events.
+"""
+import enum
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import NotFoundException, ServiceUnavailableException
+from app.schemas.order import OrderCreate, OrderResponse
+from app.services.order_service import OrderService
+from app.services.pricing_service import BundlePrice, PricingService
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_S = 5
+
+
+class TicketStatus(str, enum.Enum):
+    """Checkout ticket status"""
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"     # order created
+    FAILED = "failed"           # error holds the HTTP status and detail
+
+
+FINISHED = (TicketStatus.COMPLETED, TicketStatus.FAILED)
+
+
+@dataclass
+class CheckoutTicket:
+    id: str
+    user_id: int
+    lane: int
+    seq: int  # position in its lane since startup
+    data: Optional[OrderCreate]  # dropped once processed
+    status: TicketStatus = TicketStatus.QUEUED
+    finished_at: Optional[float] = None
+    order: Optional[dict] = None
+    error: Optional[dict] = None
+    product_ids: FrozenSet[int] = frozenset()
+    wait_for: List["CheckoutTicket"] = field(default_factory=list)  # earlier checkouts of its SKUs on other lanes
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class _Lane:
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[CheckoutTicket]]" = queue.Queue()
+        self.enqueued = 0
+        self.started = 0
+
+
+def create_order(user_id: int, data: OrderCreate) -> dict:
+    """Default checkout: create the order in a session of its own"""
+    with SessionLocal() as db:
+        order = OrderService.create_order(db, user_id, data)
+        return jsonable_encoder(OrderResponse.model_validate(order))
+
+
+class CheckoutQueue:
+    """Bounded FIFO lanes of checkouts processed by a fixed set of workers"""
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 1000,
+        ticket_ttl: float = 600.0,
+        process: Callable[[int, OrderCreate], dict] = create_order
+    ):
+        self.max_pending = max_pending
+        self.ticket_ttl = ticket_ttl
+        self.process = process
+        self._lanes = [_Lane() for _ in range(max(workers, 1))]
+        self._tickets: "OrderedDict[str, CheckoutTicket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._pending = 0
+        self._last_by_sku: Dict[int, CheckoutTicket] = {}  # newest unfinished checkout of each product
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self.running = False
+
+    @staticmethod
+    def product_ids(data: OrderCreate, bundles: Optional[Dict[int, BundlePrice]] = None) -> FrozenSet[int]:
+        """
+        SKUs a checkout locks: combo lines (``is_collection``) count as their
+        member products, as OrderService expands them, never as the combo id
+        """
+        product_ids = {
+            item.product_id for item in PricingService.expand_items(data.items, bundles or {})
+            if not item.is_collection
+        }
+        for collection in data.collections or []:
+            product_ids.update(collection.product_ids)
+        return frozenset(product_ids)
+
+    def lane_for(self, data: OrderCreate, bundles: Optional[Dict[int, BundlePrice]] = None) -> int:
+        """Lane of a checkout none of whose SKUs are pending"""
+        return min(self.product_ids(data, bundles), default=0) % len(self._lanes)
+
+    def submit(self, user_id: int, data: OrderCreate, db: Optional[Session] = None) -> dict:
+        """
+        Queue a checkout (503 when full); returns the ticket snapshot.
+        ``db`` looks up the members of the basket's combos.
+        """
+        OrderService.check_request(data)
+        combo_ids = [item.product_id for item in data.items if item.is_collection]
+        bundles = PricingService.get_bundles(db, combo_ids) if combo_ids else {}
+        product_ids = self.product_ids(data, bundles)
+        with self._lock:
+            self._prune(time.monotonic())
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ServiceUnavailableException(
+                    "Too many checkouts in progress, please retry shortly", retry_after=RETRY_AFTER_S
+                )
+            earlier = {
+                ticket.id: ticket for ticket in (self._last_by_sku.get(pid) for pid in product_ids) if ticket
+            }.values()
+            if earlier:
+                lane_index = Counter(ticket.lane for ticket in earlier).most_common(1)[0][0]
+            else:
+                lane_index = min(product_ids, default=0) % len(self._lanes)
+            lane = self._lanes[lane_index]
+            ticket = CheckoutTicket(
+                uuid.uuid4().hex, user_id, lane_index, lane.enqueued, data,
+                product_ids=product_ids,
+                wait_for=[other for other in earlier if other.lane != lane_index],  # same lane: already ahead
+            )
+            for product_id in product_ids:
+                self._last_by_sku[product_id] = ticket
+            lane.enqueued += 1
+            self._pending += 1
+            self._tickets[ticket.id] = ticket
+            lane.queue.put(ticket)  # under the lock: lane order == seq order
+            return self._snapshot(ticket)
+
+    def get(self, ticket_id: str, user_id: int) -> dict:
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is None or ticket.user_id != user_id:
+                raise NotFoundException("Checkout ticket not found")
+            return self._snapshot(ticket)
+
+    def _snapshot(self, ticket: CheckoutTicket) -> dict:
+        position = None
+        if ticket.status == TicketStatus.QUEUED:
+            position = ticket.seq - self._lanes[ticket.lane].started
+        return {
+            "ticket_id": ticket.id,
+            "status": ticket.status.value,
+            "position": position,
+            "order": ticket.order,
+            "error": ticket.error,
+        }
+
+    def _prune(self, now: float) -> None:
+        """Drop finished tickets past their TTL (oldest first; caller holds the lock)"""
+        while self._tickets:
+            ticket = next(iter(self._tickets.values()))
+            if ticket.finished_at is None or now - ticket.finished_at < self.ticket_ttl:
+                break
+            self._tickets.popitem(last=False)
+
+    def _work(self, lane: _Lane) -> None:
+        while True:
+            ticket = lane.queue.get()
+            if ticket is None:
+                return
+            for earlier in ticket.wait_for:
+                earlier.done.wait()
+            with self._lock:
+                lane.started += 1
+                ticket.status = TicketStatus.PROCESSING
+
+            order, error = None, None
+            try:
+                order = self.process(ticket.user_id, ticket.data)
+            except HTTPException as exc:
+                error = {"status_code": exc.status_code, "detail": exc.detail}
+            except Exception:
+                logger.exception("Queued checkout %s failed", ticket.id)
+                error = {"status_code": 500, "detail": "Internal server error"}
+
+            with self._lock:
+                ticket.order, ticket.error, ticket.data = order, error, None
+                ticket.status = TicketStatus.FAILED if error else TicketStatus.COMPLETED
+                ticket.finished_at = time.monotonic()
+                self._pending -= 1
+                if error:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                for product_id in ticket.product_ids:
+                    if self._last_by_sku.get(product_id) is ticket:
+                        del self._last_by_sku[product_id]
+                ticket.wait_for = []
+            ticket.done.set()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._work, args=(lane,), name=f"checkout-{i}", daemon=True)
+            for i, lane in enumerate(self._lanes)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Checkout queue started with %s workers", len(self._threads))
+
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """Stop taking checkouts and finish the queued ones"""
+        if not self.running:
+            return
+        self.running = False
+        for lane in self._lanes:
+            lane.queue.put(None)  # after everything already queued
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                logger.warning("Checkout worker %s still busy at shutdown", thread.name)
+        self._threads = []
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "workers": len(self._lanes),
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "lanes": [lane.queue.qsize() for lane in self._lanes],
+            }
+
+
+checkout_queue = CheckoutQueue(
+    workers=settings.CHECKOUT_QUEUE_WORKERS,
+    max_pending=settings.CHECKOUT_QUEUE_MAX_PENDING,
+    ticket_ttl=settings.CHECKOUT_QUEUE_TICKET_TTL_S,
+)
@@ -8,6 +8,8 @@ from app.models.collection import Collection, CollectionItem
 from app.models.product import Product
 from app.schemas.product import CollectionCreate, CollectionUpdate, CollectionItemCreate
 from app.core.exceptions import NotFoundException, ConflictException, BadRequestException
+from app.services.pricing_service import PricingService
+from app.services.suggestion_service import SuggestionService
 
 
 class CollectionService:
@@ -95,6 +97,7 @@ class CollectionService:
             
             db.commit()
             db.refresh(collection)
+            SuggestionService.collection_changed(collection)
             
             return collection
             
@@ -163,7 +166,9 @@ class CollectionService:
                     db.add(item)
             
             db.commit()
+            PricingService.invalidate_collections([collection_id])
             db.refresh(collection)
+            SuggestionService.collection_changed(collection)
             
             return collection
             
@@ -190,6 +195,8 @@ class CollectionService:
             # Delete collection (cascade will delete CollectionItems)
             db.delete(collection)
             db.commit()
+            PricingService.invalidate_collections([collection_id])
+            SuggestionService.removed("collection", collection_id)
             
         except NotFoundException:
             db.rollback()
@@ -272,6 +279,7 @@ class CollectionService:
                     db.add(item)
             
             db.commit()
+            PricingService.invalidate_collections([collection_id])
             db.refresh(collection)
             return collection
         except NotFoundException:
@@ -298,6 +306,7 @@ class CollectionService:
             ).delete(synchronize_session=False)
             
             db.commit()
+            PricingService.invalidate_collections([collection_id])
             db.refresh(collection)
             return collection
         except NotFoundException:
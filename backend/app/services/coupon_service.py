@@ -1,16 +1,27 @@
 """
 Coupon Service - Handle coupon generation and validation
 """
+import logging
 import random
 import string
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
+from app.core.database import SessionLocal
+from app.core.exceptions import BadRequestException
 from app.models.coupon import Coupon, CouponType, CouponStatus
 from app.models.order import Order
+from app.models.enums import UserRole
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
+COUPON_INSERT_BATCH = 1000
+MAX_CODE_ATTEMPTS = 5
+
 
 def generate_coupon_code(prefix: str = "LUXE") -> str:
     """Generate unique coupon code"""
@@ -18,6 +29,41 @@ def generate_coupon_code(prefix: str = "LUXE") -> str:
     return f"{prefix}{random_part}"
 
 
+def generate_coupon_codes(count: int, prefix: str = "LUXE") -> List[str]:
+    """Generate ``count`` codes that are distinct from each other (not yet checked against the DB)"""
+    codes = set()
+    while len(codes) < count:
+        codes.add(generate_coupon_code(prefix))
+    return list(codes)
+
+
+def _insert_with_unique_codes(db: Session, rows: List[dict], prefix: str = "LUXE") -> List[str]:
+    """
+    Insert coupon rows, giving each a fresh code.
+    
+    ON CONFLICT DO NOTHING skips codes that already exist (also ones a
+    concurrent insert just took); only those rows get new codes and are
+    retried. SQLite (tests, local runs) has the same clause. The caller
+    commits.
+    
+    Returns: inserted codes, in the order of ``rows``
+    """
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    insert_stmt = insert(Coupon)\
+        .on_conflict_do_nothing(index_elements=[Coupon.code])\
+        .returning(Coupon.code)
+    pending = rows
+    for _ in range(MAX_CODE_ATTEMPTS):
+        for row, code in zip(pending, generate_coupon_codes(len(pending), prefix)):
+            row["code"] = code
+        inserted = set(db.scalars(insert_stmt, pending))
+        pending = [row for row in pending if row["code"] not in inserted]
+        if not pending:
+            return [row["code"] for row in rows]
+        logger.info("Regenerating %s colliding coupon codes", len(pending))
+    raise RuntimeError(f"Could not generate unique coupon codes after {MAX_CODE_ATTEMPTS} attempts")
+
+
 def create_promotional_coupon(
     db: Session,
     user_id: int,
@@ -38,30 +84,106 @@ def create_promotional_coupon(
     Returns:
         Created coupon object
     """
-    code = generate_coupon_code()
-    
-    # Check if code already exists, regenerate if needed
-    while db.query(Coupon).filter(Coupon.code == code).first():
-        code = generate_coupon_code()
-    
-    coupon = Coupon(
-        code=code,
-        user_id=user_id,
-        discount_type=CouponType.FIXED,
-        discount_value=discount_value,
-        min_order_amount=0,  # No minimum order for promotional coupon
-        status=CouponStatus.ACTIVE,
-        valid_from=datetime.utcnow(),
-        valid_until=datetime.utcnow() + timedelta(days=valid_days),
-        description=f"Khuyến mãi {discount_value:,.0f}đ - Tặng khi mua hàng trên 8 triệu",
-        source_order_id=source_order_id
-    )
-    
-    db.add(coupon)
+    now = datetime.utcnow()
+    [code] = _insert_with_unique_codes(db, [{
+        "user_id": user_id,
+        "discount_type": CouponType.FIXED,
+        "discount_value": discount_value,
+        "min_order_amount": 0,  # No minimum order for promotional coupon
+        "status": CouponStatus.ACTIVE,
+        "valid_from": now,
+        "valid_until": now + timedelta(days=valid_days),
+        "description": f"Khuyến mãi {discount_value:,.0f}đ - Tặng khi mua hàng trên 8 triệu",
+        "source_order_id": source_order_id,
+    }])
     db.commit()
-    db.refresh(coupon)
     
-    return coupon
+    return db.query(Coupon).filter(Coupon.code == code).one()
+
+
+def issue_bulk_coupons(
+    db: Session,
+    discount_type: CouponType,
+    discount_value: float,
+    valid_days: int,
+    user_ids: Optional[Iterable[int]] = None,
+    max_discount_amount: Optional[float] = None,
+    min_order_amount: float = 0,
+    description: Optional[str] = None,
+    prefix: str = "LUXE",
+) -> Dict[str, Any]:
+    """
+    Give one coupon to each user of a campaign, in one transaction
+    
+    Args:
+        user_ids: Recipients; None means every active customer
+        prefix: Code prefix (e.g. campaign name)
+    
+    Returns:
+        {"issued": count, "skipped_user_ids": ids that are not active users}
+    """
+    if discount_type == CouponType.PERCENTAGE and discount_value > 100:
+        raise BadRequestException("Percentage discount cannot exceed 100")
+    
+    if user_ids is None:
+        requested = [
+            user_id for (user_id,) in db.query(User.id)
+            .filter(User.is_active == True, User.role == UserRole.CUSTOMER)  # noqa: E712
+            .order_by(User.id)
+        ]
+    else:
+        requested = list(dict.fromkeys(user_ids))  # one coupon per user, keep order
+    
+    now = datetime.utcnow()
+    template = {
+        "discount_type": discount_type,
+        "discount_value": discount_value,
+        "max_discount_amount": max_discount_amount,
+        "min_order_amount": min_order_amount,
+        "status": CouponStatus.ACTIVE,
+        "valid_from": now,
+        "valid_until": now + timedelta(days=valid_days),
+        "description": description,
+    }
+    
+    issued = 0
+    skipped: List[int] = []
+    try:
+        for start in range(0, len(requested), COUPON_INSERT_BATCH):
+            batch = requested[start:start + COUPON_INSERT_BATCH]
+            active = {
+                user_id for (user_id,) in
+                db.query(User.id).filter(User.id.in_(batch), User.is_active == True)  # noqa: E712
+            }
+            skipped.extend(user_id for user_id in batch if user_id not in active)
+            rows = [{**template, "user_id": user_id} for user_id in batch if user_id in active]
+            if rows:
+                issued += len(_insert_with_unique_codes(db, rows, prefix))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    logger.info("Issued %s coupons (prefix %s), skipped %s users", issued, prefix, len(skipped))
+    return {"issued": issued, "skipped_user_ids": skipped}
+
+
+def expire_coupons(db: Session) -> int:
+    """Mark every active coupon past its valid_until as expired, in one statement"""
+    now = datetime.utcnow()
+    expired = db.query(Coupon)\
+        .filter(Coupon.status == CouponStatus.ACTIVE, Coupon.valid_until < now)\
+        .update({Coupon.status: CouponStatus.EXPIRED, Coupon.updated_at: now}, synchronize_session=False)
+    db.commit()
+    if expired:
+        logger.info("Expired %s coupons", expired)
+    return expired
+
+
+def run_coupon_expiry() -> int:
+    """Scheduled job: expire past-due coupons with a fresh session"""
+    with SessionLocal() as db:
+        return expire_coupons(db)
 
 
 def validate_and_apply_coupon(
@@ -114,11 +236,10 @@ def validate_and_apply_coupon(
             "discount": 0
         }
     
-    # Check validity period
+    # Check validity period (the status is flipped by the scheduled expiry sweep,
+    # not here: this runs inside create_order's transaction)
     now = datetime.utcnow()
     if now < coupon.valid_from or now > coupon.valid_until:
-        coupon.status = CouponStatus.EXPIRED
-        db.commit()
         return {
             "valid": False,
             "message": "Mã khuyến mãi đã hết hạn",
@@ -152,6 +273,26 @@ def mark_coupon_as_used(db: Session, coupon: Coupon, order_id: int) -> None:
     db.commit()
 
 
+def release_order_coupons(db: Session, order_ids: List[int]) -> int:
+    """
+    Give back the coupons used by cancelled orders (caller commits)
+    
+    Only USED coupons still pointing at one of the orders change, so running
+    it twice for the same orders returns nothing the second time. A coupon
+    past its valid_until is left to the expiry job.
+    """
+    if not order_ids:
+        return 0
+    return db.query(Coupon)\
+        .filter(Coupon.order_id.in_(order_ids), Coupon.status == CouponStatus.USED)\
+        .update({
+            Coupon.status: CouponStatus.ACTIVE,
+            Coupon.used_at: None,
+            Coupon.order_id: None,
+            Coupon.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+
+
 def get_user_coupons(db: Session, user_id: int, status: Optional[CouponStatus] = None) -> list[Coupon]:
     """Get all coupons for a user, optionally filtered by status"""
     query = db.query(Coupon).filter(Coupon.user_id == user_id)
@@ -0,0 +1,155 @@
+"""
+Facet Service
+
+Counts for the storefront filter sidebar (category, price band, material,
+color) computed in one grouped query over the products matching the
+current filters:
+
+    SELECT grouping(...), category_id, price_band, material, color,
+           count(*) FILTER (WHERE <every filter except category>), ...
+    FROM products WHERE <filters that are not facets>
+    GROUP BY GROUPING SETS (category_id, price_band, material, color, ())
+
+Each facet is counted with the filters of the other facets only, so picking
+a category still shows how many items the sibling categories have. The
+``()`` set gives the total for the full filter set, which replaces the
+separate COUNT of the product list. Counts come straight from the table, so
+there is nothing to refresh when a product changes.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, literal_column, or_, select, true, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.tracing import traced_class
+from app.models.product import Category, Product, DIMENSION_AXES, dimension_cm, spec_attribute
+
+# Lower bounds of the price bands (VND); the last band is open-ended
+PRICE_BANDS = (0, 2_000_000, 5_000_000, 10_000_000, 20_000_000, 50_000_000)
+
+FACETS = ("category", "price", "material", "color")
+
+PRICE = Product.effective_price  # what the customer pays
+MATERIAL = spec_attribute("material")
+COLOR = spec_attribute("color")
+PRICE_BAND = func.width_bucket(  # 0 .. len(PRICE_BANDS) - 1
+    PRICE, literal_column(f"ARRAY[{','.join(str(bound) for bound in PRICE_BANDS[1:])}]::float8[]")
+)
+
+
+@dataclass
+class ProductFilters:
+    """Filters of the product list"""
+    category_id: Optional[int] = None
+    category_ids: Optional[Sequence[int]] = None  # category_id and its descendants; just category_id if unset
+    collection_id: Optional[int] = None
+    search: Optional[str] = None
+    is_featured: Optional[bool] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    materials: Optional[List[str]] = None  # any of
+    colors: Optional[List[str]] = None  # any of
+    dimensions: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None  # axis -> (min, max) cm
+
+    def conditions(self) -> Dict[Optional[str], list]:
+        """SQL conditions keyed by the facet they restrict (None: not a facet)"""
+        conditions: Dict[Optional[str], list] = {None: [Product.is_active == True]}
+        for facet in FACETS:
+            conditions[facet] = []
+
+        category_ids = self.category_ids or ([self.category_id] if self.category_id else [])
+        if len(category_ids) == 1:
+            conditions["category"].append(Product.category_id == category_ids[0])
+        elif category_ids:
+            conditions["category"].append(Product.category_id.in_(category_ids))
+        if self.collection_id:
+            conditions[None].append(Product.collection_id == self.collection_id)
+        if self.search:
+            conditions[None].append(or_(
+                Product.name.ilike(f"%{self.search}%"),
+                Product.description.ilike(f"%{self.search}%")
+            ))
+        if self.is_featured is not None:
+            conditions[None].append(Product.is_featured == self.is_featured)
+        if self.min_price is not None:
+            conditions["price"].append(PRICE >= self.min_price)
+        if self.max_price is not None:
+            conditions["price"].append(PRICE <= self.max_price)
+        if self.materials:
+            conditions["material"].append(MATERIAL.in_(self.materials))
+        if self.colors:
+            conditions["color"].append(COLOR.in_(self.colors))
+        for axis, (low, high) in (self.dimensions or {}).items():
+            if axis not in DIMENSION_AXES:
+                raise ValueError(f"Unknown dimension {axis}")
+            if low is not None:
+                conditions[None].append(dimension_cm(axis) >= low)
+            if high is not None:
+                conditions[None].append(dimension_cm(axis) <= high)
+        return conditions
+
+    def all_conditions(self) -> list:
+        return [condition for group in self.conditions().values() for condition in group]
+
+
+def _grouping_mask(*present: int) -> int:
+    """grouping(category, band, material, color) of a set grouped by the ``present`` columns"""
+    return sum(1 << (len(FACETS) - 1 - index) for index in range(len(FACETS)) if index not in present)
+
+
+@traced_class
+class FacetService:
+    """Per-facet counts for the product list"""
+
+    @staticmethod
+    def facet_counts(db: Session, filters: ProductFilters) -> Tuple[int, dict]:
+        """Total matching ``filters`` and the counts of every facet value"""
+        conditions = filters.conditions()
+
+        def without(facet: Optional[str]):
+            rest = [c for name, group in conditions.items() if name not in (None, facet) for c in group]
+            return and_(*rest) if rest else true()
+
+        keys = (Product.category_id, PRICE_BAND, MATERIAL, COLOR)
+        stmt = select(
+            func.grouping(*keys).label("mask"),
+            *[key.label(f"{facet}_value") for facet, key in zip(FACETS, keys)],
+            *[func.count().filter(without(facet)).label(f"{facet}_count") for facet in FACETS],
+            func.count().filter(without(None)).label("total"),
+        ).where(*conditions[None]).group_by(func.grouping_sets(*keys, tuple_()))
+
+        total = 0
+        counts: Dict[str, Dict] = {facet: {} for facet in FACETS}
+        masks = {_grouping_mask(index): facet for index, facet in enumerate(FACETS)}
+        for row in db.execute(stmt).mappings():
+            facet = masks.get(row["mask"])
+            if facet is None:
+                total = row["total"]
+            elif row[f"{facet}_value"] is not None and row[f"{facet}_count"]:
+                counts[facet][row[f"{facet}_value"]] = row[f"{facet}_count"]
+
+        names = dict(
+            db.query(Category.id, Category.name).filter(Category.id.in_(counts["category"])).all()
+        ) if counts["category"] else {}
+        facets = {
+            "categories": [
+                {"id": category_id, "name": names.get(category_id), "count": count}
+                for category_id, count in sorted(counts["category"].items(), key=lambda kv: -kv[1])
+            ],
+            "price_ranges": [
+                {
+                    "min": PRICE_BANDS[band],
+                    "max": PRICE_BANDS[band + 1] if band + 1 < len(PRICE_BANDS) else None,
+                    "count": count,
+                }
+                for band, count in sorted(counts["price"].items())
+            ],
+            "materials": FacetService._values(counts["material"]),
+            "colors": FacetService._values(counts["color"]),
+        }
+        return total, facets
+
+    @staticmethod
+    def _values(counts: Dict[str, int]) -> List[dict]:
+        return [{"value": value, "count": count} for value, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))]
@@ -0,0 +1,386 @@
+"""
+Flash Sale Service
+
+During a flash sale the available stock of designated products lives in
+Redis and is decremented atomically (Lua) by ``create_order`` instead of
+serialising every checkout on the ``products`` row lock. Units taken from
+Redis are also added to a pending hash; a background flusher writes those
+deltas back to ``products.stock`` in batches (write-behind).
+
+Redis keys:
+    flash:skus              set of product ids on flash sale
+    flash:stock:<id>        units still available for sale
+    flash:pending           hash product id -> units sold but not yet written to Postgres
+
+Invariant while a product is on sale:
+    products.stock - pending == available
+
+Start/stop and the flusher take the product row lock, so they serialise with
+each other and with regular (non flash) checkouts. Deltas taken by a flusher
+that crashes before committing are lost; ending the sale writes the Redis
+count back as the authoritative stock, which repairs that drift.
+
+``release`` never raises: it runs on checkout error paths (where the
+original error must reach the client) and after cancellations have
+committed. Units it cannot give back (Redis down) are kept in this process
+and retried by the ``flash-sale-release-retry`` job. A worker that dies with
+such a backlog loses those units: the product undersells, never oversells.
+"""
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.redis import get_redis
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+SKUS_KEY = "flash:skus"
+PENDING_KEY = "flash:pending"
+
+# KEYS: pending, stock keys...   ARGV: quantities..., product ids...
+# All-or-nothing: returns {0, 0} or {index of the short item, available (-1 = not on sale)}
+RESERVE_SCRIPT = """
+local n = #KEYS - 1
+for i = 1, n do
+    local available = redis.call('GET', KEYS[i + 1])
+    if not available then
+        return {i, -1}
+    end
+    if tonumber(available) < tonumber(ARGV[i]) then
+        return {i, tonumber(available)}
+    end
+end
+for i = 1, n do
+    redis.call('DECRBY', KEYS[i + 1], ARGV[i])
+    redis.call('HINCRBY', KEYS[1], ARGV[n + i], ARGV[i])
+end
+return {0, 0}
+"""
+
+# Same arguments as RESERVE_SCRIPT; returns the indexes that are no longer on sale
+RELEASE_SCRIPT = """
+local n = #KEYS - 1
+local missing = {}
+for i = 1, n do
+    if redis.call('EXISTS', KEYS[i + 1]) == 1 then
+        redis.call('INCRBY', KEYS[i + 1], ARGV[i])
+        redis.call('HINCRBY', KEYS[1], ARGV[n + i], -tonumber(ARGV[i]))
+    else
+        table.insert(missing, i)
+    end
+end
+return missing
+"""
+
+# KEYS: stock keys...   ARGV: quantities...   Returns the indexes that were applied
+ADD_STOCK_SCRIPT = """
+local applied = {}
+for i = 1, #KEYS do
+    if redis.call('EXISTS', KEYS[i]) == 1 then
+        redis.call('INCRBY', KEYS[i], ARGV[i])
+        table.insert(applied, i)
+    end
+end
+return applied
+"""
+
+# KEYS: pending   ARGV: product ids...   Atomically takes their pending deltas
+TAKE_PENDING_SCRIPT = """
+local values = redis.call('HMGET', KEYS[1], unpack(ARGV))
+redis.call('HDEL', KEYS[1], unpack(ARGV))
+return values
+"""
+
+# KEYS: skus, stock key, pending   ARGV: product id   Returns {available, pending}
+STOP_SCRIPT = """
+redis.call('SREM', KEYS[1], ARGV[1])
+local available = redis.call('GET', KEYS[2])
+redis.call('DEL', KEYS[2])
+local pending = redis.call('HGET', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return {available, pending}
+"""
+
+_products = Product.__table__
+APPLY_DELTA = (
+    _products.update()
+    .where(_products.c.id == bindparam("product_id"))
+    .values(stock=_products.c.stock - bindparam("delta"))
+)
+
+
+def _stock_key(product_id: int) -> str:
+    return f"flash:stock:{product_id}"
+
+
+class _DeferredReleases:
+    """Units this process still owes back to the flash pool"""
+
+    def __init__(self):
+        self._units: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, quantities: Dict[int, int]) -> None:
+        with self._lock:
+            self._units.update(quantities)
+
+    def take(self) -> Dict[int, int]:
+        with self._lock:
+            units, self._units = self._units, Counter()
+        return {product_id: count for product_id, count in units.items() if count > 0}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._units)
+
+
+deferred_releases = _DeferredReleases()
+
+
+class FlashSaleService:
+    """Redis-backed stock counters for flash-sale products"""
+
+    _scripts: Dict[Tuple[int, str], object] = {}
+
+    @classmethod
+    def _script(cls, redis, source: str):
+        key = (id(redis), source)
+        if key not in cls._scripts:
+            cls._scripts[key] = redis.register_script(source)
+        return cls._scripts[key]
+
+    @staticmethod
+    def _require_redis():
+        redis = get_redis()
+        if redis is None:
+            raise BadRequestException("Redis is not available")
+        return redis
+
+    # ----- checkout path ---------------------------------------------------
+
+    @staticmethod
+    def flash_product_ids(product_ids: Iterable[int]) -> Set[int]:
+        """Subset of ``product_ids`` currently on flash sale.
+
+        Empty when the feature is off or Redis is unreachable; checkouts then
+        fall back to row locks, which can oversell at most the deltas not yet
+        written back.
+        """
+        ids = list(product_ids)
+        if not settings.FLASH_SALE_ENABLED or not ids:
+            return set()
+        redis = get_redis()
+        if redis is None:
+            return set()
+        try:
+            flags = redis.smismember(SKUS_KEY, ids)
+        except RedisError as exc:
+            logger.warning("Flash sale lookup failed, using row locks: %s", exc)
+            return set()
+        return {product_id for product_id, flag in zip(ids, flags) if flag}
+
+    @classmethod
+    def reserve(cls, quantities: Dict[int, int]) -> Optional[Tuple[int, int]]:
+        """Take units for every product or none of them.
+
+        Returns None on success, otherwise ``(product_id, available)`` for the
+        first product that is short; ``available`` is -1 when its sale ended.
+        """
+        if not quantities:
+            return None
+        redis = cls._require_redis()
+        ids = list(quantities)
+        index, available = cls._script(redis, RESERVE_SCRIPT)(
+            keys=[PENDING_KEY] + [_stock_key(pid) for pid in ids],
+            args=[quantities[pid] for pid in ids] + ids,
+        )
+        if index == 0:
+            return None
+        return ids[index - 1], int(available)
+
+    @classmethod
+    def release(cls, db: Session, quantities: Dict[int, int]) -> None:
+        """Give units back (failed or cancelled order); never raises.
+
+        Products whose sale has ended since get the units back in Postgres.
+        What cannot be given back now is deferred to ``retry_releases``.
+        """
+        if not quantities:
+            return
+        redis = get_redis()
+        if redis is None:
+            logger.warning("Redis unavailable, flash sale release deferred: %s", quantities)
+            deferred_releases.add(quantities)
+            return
+        ids = list(quantities)
+        try:
+            missing = cls._script(redis, RELEASE_SCRIPT)(
+                keys=[PENDING_KEY] + [_stock_key(pid) for pid in ids],
+                args=[quantities[pid] for pid in ids] + ids,
+            )
+        except RedisError as exc:
+            logger.warning("Flash sale release deferred (%s): %s", exc, quantities)
+            deferred_releases.add(quantities)
+            return
+        ended = {ids[i - 1]: quantities[ids[i - 1]] for i in missing}
+        if not ended:
+            return
+        try:
+            db.execute(APPLY_DELTA, [{"product_id": pid, "delta": -units} for pid, units in ended.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Restocking ended flash sale products deferred: %s", ended)
+            deferred_releases.add(ended)  # the retry finds them ended again
+
+    @classmethod
+    def retry_releases(cls) -> int:
+        """Scheduled job (every worker): give back units an earlier release could not"""
+        quantities = deferred_releases.take()
+        if quantities:
+            with SessionLocal() as db:
+                cls.release(db, quantities)
+        return len(quantities)
+
+    @classmethod
+    def add_stock(cls, quantities: Dict[int, int]) -> Dict[int, int]:
+        """Mirror a restock into the flash pool; returns what was applied"""
+        ids = [pid for pid in cls.flash_product_ids(quantities) if quantities[pid]]
+        if not ids:
+            return {}
+        redis = cls._require_redis()
+        applied = cls._script(redis, ADD_STOCK_SCRIPT)(
+            keys=[_stock_key(pid) for pid in ids],
+            args=[quantities[pid] for pid in ids],
+        )
+        return {ids[i - 1]: quantities[ids[i - 1]] for i in applied}
+
+    # ----- admin -----------------------------------------------------------
+
+    @classmethod
+    def start(cls, db: Session, product_id: int) -> dict:
+        """Move a product's stock into Redis"""
+        redis = cls._require_redis()
+        product = db.query(Product)\
+            .filter(Product.id == product_id)\
+            .with_for_update()\
+            .populate_existing()\
+            .first()
+        if not product:
+            raise NotFoundException("Product not found")
+        if redis.sismember(SKUS_KEY, product_id):
+            db.rollback()
+            raise BadRequestException("Product is already on flash sale")
+
+        pipe = redis.pipeline(transaction=True)
+        pipe.set(_stock_key(product_id), product.stock or 0)
+        pipe.hdel(PENDING_KEY, product_id)
+        pipe.sadd(SKUS_KEY, product_id)
+        pipe.execute()
+        db.commit()  # release the row lock only once Redis owns the counter
+        logger.info("Flash sale started for product %s with %s units", product_id, product.stock)
+        return {"product_id": product_id, "available": product.stock or 0, "pending": 0}
+
+    @classmethod
+    def stop(cls, db: Session, product_id: int) -> dict:
+        """End the sale and write the Redis count back as the product's stock"""
+        redis = cls._require_redis()
+        product = db.query(Product)\
+            .filter(Product.id == product_id)\
+            .with_for_update()\
+            .populate_existing()\
+            .first()
+        if not product:
+            raise NotFoundException("Product not found")
+        if not redis.sismember(SKUS_KEY, product_id):
+            db.rollback()
+            raise BadRequestException("Product is not on flash sale")
+
+        available, pending = cls._script(redis, STOP_SCRIPT)(
+            keys=[SKUS_KEY, _stock_key(product_id), PENDING_KEY], args=[product_id]
+        )
+        available, pending = int(available or 0), int(pending or 0)
+        drift = (product.stock or 0) - pending - available
+        if drift:
+            logger.warning("Flash sale for product %s ended with drift %s (db=%s pending=%s redis=%s)",
+                           product_id, drift, product.stock, pending, available)
+        product.stock = available
+        db.commit()
+        logger.info("Flash sale ended for product %s, %s units left", product_id, available)
+        return {"product_id": product_id, "available": available, "pending": 0, "drift": drift}
+
+    @classmethod
+    def get_status(cls, db: Session) -> List[dict]:
+        redis = cls._require_redis()
+        ids = sorted(int(pid) for pid in redis.smembers(SKUS_KEY))
+        if not ids:
+            return []
+        pipe = redis.pipeline(transaction=True)
+        pipe.mget([_stock_key(pid) for pid in ids])
+        pipe.hmget(PENDING_KEY, ids)
+        available, pending = pipe.execute()
+        products = {p.id: p for p in db.query(Product).filter(Product.id.in_(ids))}
+
+        status = []
+        for pid, avail, pend in zip(ids, available, pending):
+            product = products.get(pid)
+            avail, pend = int(avail or 0), int(pend or 0)
+            db_stock = product.stock if product else None
+            status.append({
+                "product_id": pid,
+                "name": product.name if product else None,
+                "available": avail,
+                "pending": pend,
+                "db_stock": db_stock,
+                "drift": (db_stock - pend - avail) if db_stock is not None else None,
+            })
+        return status
+
+    # ----- write-behind ------------------------------------------------------
+
+    @classmethod
+    def flush(cls, db: Session) -> int:
+        """Write pending deltas to ``products.stock`` in one transaction.
+
+        Returns the number of products updated.
+        """
+        redis = get_redis()
+        if redis is None:
+            return 0
+        ids = sorted(int(pid) for pid in redis.hkeys(PENDING_KEY))
+        if not ids:
+            return 0
+
+        # Same row locks as start/stop, taken in id order
+        db.query(Product.id).filter(Product.id.in_(ids)).order_by(Product.id).with_for_update().all()
+        values = cls._script(redis, TAKE_PENDING_SCRIPT)(keys=[PENDING_KEY], args=ids)
+        deltas = {pid: int(value) for pid, value in zip(ids, values) if value and int(value)}
+        if not deltas:
+            db.rollback()
+            return 0
+        try:
+            db.execute(APPLY_DELTA, [{"product_id": pid, "delta": delta} for pid, delta in deltas.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            pipe = redis.pipeline(transaction=True)
+            for pid, delta in deltas.items():
+                pipe.hincrby(PENDING_KEY, pid, delta)
+            pipe.execute()
+            raise
+        return len(deltas)
+
+    @classmethod
+    def flush_pending(cls) -> int:
+        """Background entry point: flush with a fresh session"""
+        with SessionLocal() as db:
+            return cls.flush(db)
@@ -0,0 +1,236 @@
+"""
+Idempotency Service
+
+Safe retries for POST endpoints that create something (orders, payment
+requests). A client sends ``Idempotency-Key: <uuid>``; the first request with
+that key runs and its response is stored for IDEMPOTENCY_TTL_HOURS, a retry
+gets the stored response back (``Idempotent-Replayed: true``) without running
+the handler again.
+
+The key row is inserted in the request's own transaction, so it commits
+together with the handler's work (one connection per request) and rolls
+back with it when the handler fails: the key is freed and a retry runs
+again. A concurrent duplicate blocks on the uncommitted unique key until the
+first request commits, then replays its response or, if the first request
+failed, runs itself. Waiting is capped by IDEMPOTENCY_WAIT_S (409 after that).
+
+    with IdempotencyService.begin(db, key, user.id, request, payload) as slot:
+        if slot.replay:
+            return slot.replay
+        ...
+        return slot.complete(result, status_code=201)
+
+Handlers may commit on their own (OrderService.create_order does), so the
+key row can be committed before ``complete`` stores the response in a last,
+small commit. A duplicate that sees the row without a response keeps polling
+it for the rest of IDEMPOTENCY_WAIT_S and replays the response once stored.
+After a crash between the commits it gets 409 (not a second run) until the
+key expires: the work is done, only its response was not stored. Without a
+key ``begin`` returns a pass-through slot.
+"""
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import BadRequestException, ConflictException
+from app.core.tracing import traced_class
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+LOCK_NOT_AVAILABLE = "55P03"  # lock_timeout expired
+POLL_INTERVAL_S = 0.05  # duplicate waiting for the first request's response
+
+idempotency_keys = IdempotencyKey.__table__
+
+
+def _insert(db: Session):
+    """INSERT ... ON CONFLICT of the session's dialect (SQLite in tests)"""
+    return sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+
+
+def request_fingerprint(request: Request, payload: Any = None) -> str:
+    """sha256 of method, path, query string and JSON body"""
+    canonical = json.dumps(
+        {
+            "method": request.method,
+            "path": request.url.path,
+            "query": sorted(request.query_params.multi_items()),
+            "body": jsonable_encoder(payload),
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencySlot:
+    """Claim on one key for the duration of a request"""
+
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        row: Optional[dict] = None,
+        replay: Optional[JSONResponse] = None
+    ):
+        self._db = db
+        self._row = row
+        self.replay = replay
+
+    def complete(self, body: Any, status_code: int = 200) -> JSONResponse:
+        """Store the response (when holding a key) and return it"""
+        content = jsonable_encoder(body)
+        if self._db is not None:
+            db, self._db = self._db, None
+            now = datetime.utcnow()
+            # Upsert: a handler that rolled back and retried internally lost the key row
+            stmt = _insert(db)(idempotency_keys).values(
+                **self._row, status_code=status_code, response_body=content, updated_at=now
+            )
+            try:
+                db.execute(stmt.on_conflict_do_update(
+                    index_elements=[idempotency_keys.c.user_id, idempotency_keys.c.key],
+                    set_={"status_code": status_code, "response_body": content, "updated_at": now},
+                ))
+                db.commit()
+            except Exception:
+                # The handler committed its work; answer anyway, only retries lose protection
+                db.rollback()
+                logger.exception("Failed to store idempotent response %s", self._row["key"])
+        return JSONResponse(content=content, status_code=status_code)
+
+    def __enter__(self) -> "IdempotencySlot":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._db is not None:
+            # The handler raised: drop its uncommitted work and the key with it
+            self._db.rollback()
+            self._db = None
+
+
+@traced_class
+class IdempotencyService:
+    """Idempotency-Key handling for POST endpoints"""
+
+    @staticmethod
+    def begin(
+        db: Session,
+        key: Optional[str],
+        user_id: int,
+        request: Request,
+        payload: Any = None
+    ) -> IdempotencySlot:
+        """
+        Claim ``key`` in ``db``'s transaction, or get the stored response of
+        an earlier request. Blocking: call from sync endpoints.
+        """
+        if not key:
+            return IdempotencySlot()
+        if len(key) > MAX_KEY_LENGTH:
+            raise BadRequestException(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+
+        now = datetime.utcnow()
+        row = {
+            "user_id": user_id,
+            "key": key,
+            "request_hash": request_fingerprint(request, payload),
+            "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            "created_at": now,
+        }
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_S
+        while True:
+            try:
+                if IdempotencyService._claim(db, row, deadline):
+                    return IdempotencySlot(db, row)
+            except OperationalError as exc:
+                db.rollback()
+                if getattr(exc.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+                    raise ConflictException("A request with this Idempotency-Key is still being processed")
+                raise
+            stored = db.execute(
+                select(
+                    idempotency_keys.c.request_hash,
+                    idempotency_keys.c.status_code,
+                    idempotency_keys.c.response_body,
+                ).where(idempotency_keys.c.user_id == user_id, idempotency_keys.c.key == key)
+            ).first()
+
+            if stored is not None:
+                if stored.request_hash != row["request_hash"]:
+                    raise ConflictException("Idempotency-Key was already used for a different request")
+                if stored.status_code is not None:
+                    return IdempotencySlot(replay=JSONResponse(
+                        content=stored.response_body,
+                        status_code=stored.status_code,
+                        headers={"Idempotent-Replayed": "true"},
+                    ))
+            # Work committed but response not stored yet (or the row was just
+            # purged): look again until the first request completes
+            if time.monotonic() >= deadline:
+                raise ConflictException("A request with this Idempotency-Key is still being processed")
+            db.rollback()
+            time.sleep(POLL_INTERVAL_S)
+
+    @staticmethod
+    def _claim(db: Session, row: dict, deadline: float) -> bool:
+        """Insert the key row (left uncommitted); False when the key is already taken"""
+        now = datetime.utcnow()
+        postgres = db.get_bind().dialect.name == "postgresql"
+        if postgres:
+            wait_ms = max(int((deadline - time.monotonic()) * 1000), 1)
+            db.execute(text(f"SET LOCAL lock_timeout = '{wait_ms}ms'"))
+        # An expired key may be reused right away, the purge job is only housekeeping
+        db.execute(
+            delete(idempotency_keys).where(
+                idempotency_keys.c.user_id == row["user_id"],
+                idempotency_keys.c.key == row["key"],
+                idempotency_keys.c.expires_at < now,
+            )
+        )
+        stmt = _insert(db)(idempotency_keys).values(**row, updated_at=now).on_conflict_do_nothing(
+            index_elements=[idempotency_keys.c.user_id, idempotency_keys.c.key]
+        ).returning(idempotency_keys.c.id)
+        claimed = db.execute(stmt).scalar() is not None
+        if postgres:
+            db.execute(text("SET LOCAL lock_timeout TO DEFAULT"))  # the handler's own locks wait as usual
+        return claimed
+
+    @staticmethod
+    def purge_expired(db: Session, batch_size: int = 5000) -> int:
+        """Delete expired keys, one batch per transaction"""
+        purged = 0
+        while True:
+            batch = select(IdempotencyKey.id)\
+                .where(IdempotencyKey.expires_at < datetime.utcnow())\
+                .limit(batch_size)\
+                .scalar_subquery()
+            count = db.query(IdempotencyKey)\
+                .filter(IdempotencyKey.id.in_(batch))\
+                .delete(synchronize_session=False)
+            db.commit()
+            purged += count
+            if count < batch_size:
+                break
+        return purged
+
+    @staticmethod
+    def run_purge() -> int:
+        """Scheduled job: drop keys past IDEMPOTENCY_TTL_HOURS"""
+        with SessionLocal() as db:
+            return IdempotencyService.purge_expired(db)
@@ -0,0 +1,93 @@
+"""
+Like Service
+
+One ``product_likes`` row per (user, product); a like is an insert that does
+nothing if the row exists and an unlike a delete, so repeated clicks and
+concurrent requests cannot count twice. ``product_stats.like_count`` is moved
+in the same transaction, only when a row was actually inserted or deleted:
+listing pages read the count off the narrow stats row instead of counting
+likes, and liking never rewrites (or locks) the product row.
+
+A like also adds to the product's popularity score. Unliking lowers
+like_count but not the score, which decays like any other event.
+"""
+from datetime import datetime
+from typing import Iterable, List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import NotFoundException
+from app.core.tracing import traced_class
+from app.models.product import Product
+from app.models.product_like import ProductLike
+from app.models.product_stats import ProductStats
+from app.services.popularity_service import PopularityService
+
+product_likes = ProductLike.__table__
+
+
+@traced_class
+class LikeService:
+    """Product likes and their counts"""
+
+    @staticmethod
+    def like(db: Session, user_id: int, product_id: int) -> int:
+        """Like an active product (no-op if already liked); returns its like count"""
+        exists = db.query(Product.id)\
+            .filter(Product.id == product_id, Product.is_active == True)\
+            .first()
+        if not exists:
+            raise NotFoundException("Product not found")
+
+        now = datetime.utcnow()
+        insert_ = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+        inserted = db.execute(
+            insert_(product_likes)
+            .values(user_id=user_id, product_id=product_id, created_at=now, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[product_likes.c.user_id, product_likes.c.product_id])
+            .returning(product_likes.c.id)
+        ).first()
+        if inserted:
+            PopularityService.apply(db, {product_id: {"like": 1}})
+        db.commit()
+        return LikeService.like_count(db, product_id)
+
+    @staticmethod
+    def unlike(db: Session, user_id: int, product_id: int) -> int:
+        """Remove a like (no-op if there is none); returns the product's like count"""
+        deleted = db.execute(
+            delete(product_likes)
+            .where(product_likes.c.user_id == user_id, product_likes.c.product_id == product_id)
+            .returning(product_likes.c.id)
+        ).first()
+        if deleted:
+            db.execute(
+                update(ProductStats)
+                .where(ProductStats.product_id == product_id)
+                .values(like_count=ProductStats.like_count - 1, updated_at=datetime.utcnow())
+            )
+        db.commit()
+        return LikeService.like_count(db, product_id)
+
+    @staticmethod
+    def like_count(db: Session, product_id: int) -> int:
+        count = db.execute(
+            select(ProductStats.like_count).where(ProductStats.product_id == product_id)
+        ).scalar()
+        return count or 0
+
+    @staticmethod
+    def liked_ids(db: Session, user_id: int, product_ids: Iterable[int]) -> List[int]:
+        """Which of ``product_ids`` the user has liked: one index probe per id for a listing page"""
+        product_ids = set(product_ids)
+        if not product_ids:
+            return []
+        rows = db.execute(
+            select(ProductLike.product_id)
+            .where(ProductLike.user_id == user_id, ProductLike.product_id.in_(product_ids))
+            .order_by(ProductLike.product_id)
+        )
+        return list(rows.scalars())
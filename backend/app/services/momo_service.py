@@ -10,8 +10,10 @@ from typing import Dict, Optional, Tuple
 import requests
 
 from app.core.config import settings
+from app.core.tracing import traced_class
 
 
+@traced_class
 class MomoService:
     """Momo payment gateway service"""
     
@@ -1,9 +1,10 @@
 """
 Notification Service - Multi-channel notification delivery
 """
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 
 from app.models.notification import (
@@ -14,8 +15,11 @@ from app.models.notification import (
 )
 from app.models.user import User
 from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.tracing import traced_class
 
 
+@traced_class
 class NotificationService:
     """Service for managing multi-channel notifications"""
     
@@ -521,3 +525,32 @@ class NotificationService:
         db.commit()
         db.refresh(subscription)
         return subscription
+    
+    @staticmethod
+    def purge_logs(db: Session, older_than: timedelta, batch_size: int = 5000) -> int:
+        """
+        Delete delivery logs older than ``older_than``, one batch per transaction.
+        Old logs have the lowest ids, so walking the primary key finds them first.
+        """
+        cutoff = datetime.utcnow() - older_than
+        purged = 0
+        while True:
+            batch = select(NotificationLog.id)\
+                .where(NotificationLog.created_at < cutoff)\
+                .order_by(NotificationLog.id)\
+                .limit(batch_size)\
+                .scalar_subquery()
+            count = db.query(NotificationLog)\
+                .filter(NotificationLog.id.in_(batch))\
+                .delete(synchronize_session=False)
+            db.commit()
+            purged += count
+            if count < batch_size:
+                break
+        return purged
+    
+    @staticmethod
+    def run_log_purge() -> int:
+        """Scheduled job: apply NOTIFICATION_LOG_RETENTION_DAYS"""
+        with SessionLocal() as db:
+            return NotificationService.purge_logs(db, timedelta(days=settings.NOTIFICATION_LOG_RETENTION_DAYS))
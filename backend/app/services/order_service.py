@@ -1,24 +1,38 @@
 """
 Order Service
 """
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
 import uuid
 import asyncio
+import logging
 
 from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod
 from app.models.product import Product
-from app.models.collection import Collection
 from app.models.user import User
 from app.schemas.order import OrderCreate, OrderUpdate
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.core.background import submit
+from app.core.locks import try_advisory_lock
 from app.services.loyalty_service import LoyaltyService
 from app.services.notification_service import NotificationService
 from app.services.chat_service import ChatService
-from app.services.coupon_service import validate_and_apply_coupon, mark_coupon_as_used
+from app.services.coupon_service import mark_coupon_as_used, release_order_coupons
+from app.services.flash_sale_service import FlashSaleService
+from app.services.popularity_service import PopularityService
+from app.services.pricing_service import PricingService, unit_price
+from app.services.stock_reservation_service import StockReservationService
+from app.core.tracing import traced_class, start_span
 
+logger = logging.getLogger(__name__)
 
+
+@traced_class
 class OrderService:
     """Order service for managing orders with race condition prevention"""
     
@@ -32,83 +46,49 @@ class OrderService:
         
         Returns: List of expanded OrderItemCreate objects with real product_ids and price_override
         """
-        from app.schemas.order import OrderItemCreate
-        
-        expanded_items = []
-        
-        for order_item_data in order_items:
-            # CRITICAL: Check explicit is_collection flag to prevent ID collision
-            # Without this, Product ID 1 would be mistaken for Collection ID 1
-            if hasattr(order_item_data, 'is_collection') and order_item_data.is_collection:
-                # This is explicitly a collection - query Collection table
-                collection = db.query(Collection).filter(Collection.id == order_item_data.product_id).first()
-                
-                if collection and collection.items:
-                    # This is a collection - expand it into actual products
-                    # BUT preserve the bundle price by distributing it proportionally
-                    
-                    # Calculate total original price of all products in collection
-                    total_original_price = sum(
-                        (item.product.sale_price or item.product.price) * item.quantity 
-                        for item in collection.items if item.product
-                    )
-                    
-                    # Bundle price from collection (sale_price)
-                    bundle_price = collection.sale_price * order_item_data.quantity
-                    
-                    # Calculate price ratio to distribute bundle discount
-                    price_ratio = bundle_price / total_original_price if total_original_price > 0 else 1.0
-                    
-                    for coll_item in collection.items:
-                        if coll_item.product:  # Ensure product exists
-                            # Calculate this product's share of the bundle price
-                            original_price = coll_item.product.sale_price or coll_item.product.price
-                            adjusted_price = original_price * price_ratio
-                            
-                            # Create order item with price override
-                            expanded_items.append(OrderItemCreate(
-                                product_id=coll_item.product_id,
-                                quantity=coll_item.quantity * order_item_data.quantity,
-                                variant=None,
-                                price_override=adjusted_price,
-                                is_collection=False  # These are now regular products
-                            ))
-                else:
-                    # Collection not found - keep the item (will fail with proper error later)
-                    expanded_items.append(order_item_data)
-            else:
-                # NOT a collection - treat as regular product
-                # Skip Collection lookup entirely to avoid ID collision
-                product = db.query(Product).filter(Product.id == order_item_data.product_id).first()
-                if product:
-                    expanded_items.append(order_item_data)
-                else:
-                    # Product not found - keep it (will fail with proper error later)
-                    expanded_items.append(order_item_data)
-        
-        return expanded_items
+        bundles = PricingService.get_bundles(
+            db, (item.product_id for item in order_items if getattr(item, "is_collection", False))
+        )
+        return PricingService.expand_items(order_items, bundles)
     
     @staticmethod
-    def create_order(db: Session, user_id: int, data: OrderCreate) -> Order:
-        """Create new order with pessimistic locking to prevent race conditions"""
-        # Validate input
+    def check_request(data: OrderCreate) -> None:
+        """Checks that need no database (also run before queueing a checkout)"""
         if not data.items or len(data.items) == 0:
             raise BadRequestException("Order must have at least one item")
         
         if data.deposit_amount and data.deposit_amount < 0:
             raise BadRequestException("Deposit cannot be negative")
+    
+    @staticmethod
+    def create_order(db: Session, user_id: int, data: OrderCreate) -> Order:
+        """Create new order with pessimistic locking to prevent race conditions"""
+        OrderService.check_request(data)
         
+        reserved_flash: dict = {}
         try:
-            import logging
-            logger = logging.getLogger("order_debug")
-            logger.setLevel(logging.INFO)
-            handler = logging.StreamHandler()
-            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
-            if not logger.hasHandlers():
-                logger.addHandler(handler)
-
             # 1. Expand any collections into constituent products with DISCOUNTED prices
-            expanded_items = OrderService._expand_cart_items_from_collections(db, user_id, data.items)
+            with start_span("order.expand_collections"):
+                bundles = PricingService.get_bundles(
+                    db, (item.product_id for item in data.items if item.is_collection)
+                )
+                expanded_items = PricingService.expand_items(data.items, bundles)
+            
+            with start_span("order.lock_rows"):
+                lock_ids = {item.product_id for item in expanded_items}
+                for coll_data in data.collections or []:
+                    lock_ids.update(coll_data.product_ids)
+                locked_products, flash_ids = OrderService._lock_products(db, lock_ids)
+                # Other shoppers' live checkout holds are not for sale
+                held = StockReservationService.held_quantities(
+                    db, locked_products.keys() - flash_ids, exclude_user_id=user_id
+                )
+            
+            # Combo shares must come from the locked prices, not a cached snapshot
+            fresh_bundles = PricingService.revalidate(bundles, locked_products)
+            if fresh_bundles != bundles:
+                expanded_items = PricingService.expand_items(data.items, fresh_bundles)
+            flash_quantities: dict = {}  # flash-sale product_id -> units taken from Redis
             
             # Calculate order totals and validate stock
             subtotal: float = 0
@@ -130,15 +110,12 @@ class OrderService:
                     # Calculate original price (sum of all products)
                     original_price = 0
                     for prod_id in coll_data.product_ids:
-                        product = db.query(Product)\
-                            .filter(Product.id == prod_id)\
-                            .with_for_update()\
-                            .first()
+                        product = locked_products.get(prod_id)
                         
                         if not product:
                             raise NotFoundException(f"Product {prod_id} not found")
                         
-                        original_price += product.sale_price if product.sale_price else product.price
+                        original_price += unit_price(product)
                         
                         # Mark this product as part of collection
                         collection_products_map[prod_id] = coll_data.collection_id
@@ -147,91 +124,89 @@ class OrderService:
                     subtotal += coll_data.sale_price
             
             # Then process individual items
-            for item_data in data.items:
-                # CRITICAL: Use pessimistic locking to prevent race conditions
-                # Lock the product row until transaction completes
-                product = db.query(Product)\
-                    .filter(Product.id == product_id)\
-                    .with_for_update()\
-                    .first()
+            with start_span("order.check_stock", items=len(expanded_items)):
+                for item_data in expanded_items:
+                    product_id = item_data.product_id
+                    quantity = item_data.quantity
+                    
+                    # CRITICAL: Row is locked (see above) until the transaction completes
+                    product = locked_products.get(product_id)
                 
-                if not product:
-                    raise NotFoundException(f"Product {product_id} not found")
+                    if not product:
+                        raise NotFoundException(f"Product {product_id} not found")
                 
-                if not product.is_active:
-                    raise BadRequestException(f"Product {product.name} is no longer available")
+                    if not product.is_active:
+                        raise BadRequestException(f"Product {product.name} is no longer available")
                 
-                # Validate stock
-                if product.stock < quantity:
-                    raise BadRequestException(
-                        f"Insufficient stock for product {product.name}. "
-                        f"Available: {product.stock}, Requested: {quantity}"
-                    )
-            
-                # Check if this product is part of a collection
-                is_in_collection = item_data.product_id in collection_products_map
+                    # Flash-sale stock is checked and taken atomically in Redis below
+                    if product.id in flash_ids:
+                        flash_quantities[product.id] = flash_quantities.get(product.id, 0) + quantity
+                    # Validate stock
+                    elif product.stock - held.get(product.id, 0) < quantity:
+                        raise BadRequestException(
+                            f"Insufficient stock for product {product.name}. "
+                            f"Available: {max(product.stock - held.get(product.id, 0), 0)}, Requested: {quantity}"
+                        )
+            
+                    # Check if this product is part of a collection
+                    is_in_collection = item_data.product_id in collection_products_map
                 
-                if is_in_collection:
-                    # Product is part of collection - price already counted in collection total
-                    # But still create order item with price 0 to track the product
-                    actual_price: float = 0
-                    item_subtotal: float = 0
-                else:
-                    # Regular individual product - use normal pricing
-                    actual_price = product.sale_price if product.sale_price else product.price
-                    item_subtotal = actual_price * item_data.quantity
-                    subtotal += item_subtotal
+                    if is_in_collection:
+                        # Product is part of collection - price already counted in collection total
+                        # But still create order item with price 0 to track the product
+                        actual_price: float = 0
+                    elif item_data.price_override is not None:
+                        # Expanded combo item - bundle price distributed over its products
+                        actual_price = item_data.price_override
+                    else:
+                        # Regular individual product - use normal pricing
+                        actual_price = unit_price(product)
                 
-                # Use price_override if available (from collection discount), otherwise use sale_price or regular price
-                if hasattr(item_data, 'price_override') and item_data.price_override is not None:
-                    actual_price = item_data.price_override
-                else:
-                    actual_price = product.sale_price if product.sale_price else product.price
-                
-                item_subtotal = actual_price * quantity
-                subtotal += item_subtotal
-                logger.info(f"[ORDER] Product: {product.name} | ProductID: {product.id} | Qty: {quantity} | Price: {actual_price}")
-                logger.info(f"[ORDER]   - Add subtotal: {item_subtotal} | Running subtotal: {subtotal}")
+                    item_subtotal: float = actual_price * quantity
+                    subtotal += item_subtotal
                 
-                # Deduct stock
-                product.stock -= quantity
-                logger.info(f"[ORDER]   - Deduct stock: {product.name} | ProductID: {product.id} | Deduct: {quantity} | Remain: {product.stock}")
+                    # Deduct stock
+                    if product.id not in flash_ids:
+                        product.stock -= quantity
+                    logger.debug(
+                        "[ORDER] product_id=%s qty=%s price=%s subtotal=%s stock_left=%s",
+                        product.id, quantity, actual_price, subtotal, product.stock
+                    )
                 
-                order_items_data.append({
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "price_at_purchase": actual_price if not is_in_collection else (product.sale_price or product.price),
-                    "quantity": item_data.quantity,
-                    "variant": item_data.variant
-                })
-                logger.info(f"[ORDER]   - Add order item: {product.name} | ProductID: {product.id} | Qty: {quantity} | Price: {actual_price}")
-            
-            # Calculate shipping fee (can be dynamic based on location)
-            shipping_fee: float = 50000.0  # 50k VND flat rate
-            
-            # Apply VIP discount based on user's tier
+                    order_items_data.append({
+                        "product_id": product.id,
+                        "product_name": product.name,
+                        "price_at_purchase": actual_price if not is_in_collection else unit_price(product),
+                        "quantity": item_data.quantity,
+                        "variant": item_data.variant
+                    })
+            
+            if flash_quantities:
+                with start_span("order.reserve_flash_stock", items=len(flash_quantities)):
+                    short = FlashSaleService.reserve(flash_quantities)
+                    if short:
+                        short_id, available = short
+                        name = locked_products[short_id].name
+                        if available < 0:
+                            raise BadRequestException(f"Flash sale for {name} has just ended, please try again")
+                        raise BadRequestException(
+                            f"Insufficient stock for product {name}. "
+                            f"Available: {available}, Requested: {flash_quantities[short_id]}"
+                        )
+                    reserved_flash = flash_quantities
+            
+            # Shipping, VIP discount and coupon
             user = db.query(User).filter(User.id == user_id).first()
-            vip_discount_percent = LoyaltyService.get_discount_percentage(user.vip_tier)
-            discount_amount: float = subtotal * (vip_discount_percent / 100)
-            
-            # Apply coupon discount if provided
-            coupon_obj = None
-            if data.coupon_code:
-                coupon_result = validate_and_apply_coupon(
-                    db=db,
-                    coupon_code=data.coupon_code,
-                    user_id=user_id,
-                    order_amount=subtotal + shipping_fee  # Apply coupon after VIP discount
-                )
-                
-                if not coupon_result["valid"]:
-                    raise BadRequestException(coupon_result["message"])
-                
-                discount_amount += coupon_result["discount"]
-                coupon_obj = coupon_result.get("coupon")
-            
-            total_amount: float = subtotal + shipping_fee - discount_amount
-            logger.info(f"[ORDER] FINAL subtotal: {subtotal} | shipping_fee: {shipping_fee} | discount: {discount_amount} | total: {total_amount}")
+            with start_span("order.totals"):
+                totals = PricingService.order_totals(db, user, subtotal, data.coupon_code)
+            shipping_fee = totals.shipping_fee
+            discount_amount = totals.discount_amount
+            total_amount: float = totals.total_amount
+            coupon_obj = totals.coupon
+            logger.debug(
+                "[ORDER] totals subtotal=%s shipping_fee=%s discount=%s total=%s",
+                subtotal, shipping_fee, discount_amount, total_amount
+            )
             
             # Calculate deposit and remaining
             deposit_amount: float = data.deposit_amount if hasattr(data, 'deposit_amount') else 0.0
@@ -263,22 +238,33 @@ class OrderService:
                 note=data.note
             )
             
-            db.add(order)
-            db.flush()  # Get order.id for order items
+            with start_span("order.commit", items=len(order_items_data)):
+                db.add(order)
+                db.flush()  # Get order.id for order items
             
-            # CRITICAL: Create order items atomically (stock already deducted above)
-            # If this fails, transaction rolls back and stock is restored automatically
-            for item_data in order_items_data:
-                order_item = OrderItem(order_id=order.id, **item_data)
-                db.add(order_item)
+                # CRITICAL: Create order items atomically (stock already deducted above)
+                # If this fails, transaction rolls back and stock is restored automatically
+                for item_data in order_items_data:
+                    order_item = OrderItem(order_id=order.id, **item_data)
+                    db.add(order_item)
+                
+                StockReservationService.commit_holds(
+                    db, user_id, {item["product_id"] for item in order_items_data}, order.id
+                )
             
-            db.commit()
-            db.refresh(order)
+                db.commit()
+                reserved_flash = {}  # units now belong to the committed order
+                db.refresh(order)
             
             # Mark coupon as used if applied
             if coupon_obj:
                 mark_coupon_as_used(db, coupon_obj, order.id)
             
+            purchased = Counter()
+            for item_data in order_items_data:
+                purchased[item_data["product_id"]] += item_data["quantity"]
+            PopularityService.record_counts("purchase", purchased)
+            
             # Send order confirmation notification
             OrderService._send_order_created_notification(db, order, user)
             
@@ -287,12 +273,50 @@ class OrderService:
         except (BadRequestException, NotFoundException):
             # Rollback transaction - stock deductions will be reverted
             db.rollback()
+            FlashSaleService.release(db, reserved_flash)
             raise
         except Exception as e:
             # Rollback transaction on any unexpected error
             db.rollback()
+            FlashSaleService.release(db, reserved_flash)
             raise BadRequestException(f"Failed to create order: {str(e)}")
     
+    @staticmethod
+    def _lock_products(db: Session, product_ids: set) -> tuple[dict, set]:
+        """
+        Load the order's products and lock the rows that are not on flash sale.
+        
+        Rows are locked in id order so concurrent checkouts touching the same SKUs
+        queue up instead of deadlocking; populate_existing refreshes rows the
+        collection expansion already loaded (their stock would be stale otherwise).
+        Flash-sale products are left unlocked - their stock is taken from Redis.
+        
+        Returns: ({product_id: Product}, flash-sale product ids)
+        """
+        flash_ids = FlashSaleService.flash_product_ids(product_ids)
+        products = {}
+        if product_ids - flash_ids:
+            products = {
+                product.id: product
+                for product in db.query(Product)
+                .filter(Product.id.in_(product_ids - flash_ids))
+                .order_by(Product.id)
+                .with_for_update()
+                .populate_existing()
+                .all()
+            }
+        if flash_ids:
+            products.update(
+                (product.id, product)
+                for product in db.query(Product).filter(Product.id.in_(flash_ids)).populate_existing()
+            )
+        if products.keys() - flash_ids:
+            # A sale started after the first check copied stock that already
+            # includes everything committed before our locks, so take these
+            # products from Redis as well
+            flash_ids |= FlashSaleService.flash_product_ids(products.keys() - flash_ids)
+        return products, flash_ids
+    
     @staticmethod
     def get_orders(
         db: Session,
@@ -312,9 +336,12 @@ class OrderService:
         return orders, total
     
     @staticmethod
-    def get_order_by_id(db: Session, order_id: int) -> Order:
-        """Get order by ID"""
-        order = db.query(Order).filter(Order.id == order_id).first()
+    def get_order_by_id(db: Session, order_id: int, for_update: bool = False) -> Order:
+        """Get order by ID (``for_update`` locks the row until commit)"""
+        query = db.query(Order).filter(Order.id == order_id)
+        if for_update:
+            query = query.with_for_update().populate_existing()
+        order = query.first()
         if not order:
             raise NotFoundException("Order not found")
         return order
@@ -323,7 +350,8 @@ class OrderService:
     def update_order(db: Session, order_id: int, data: OrderUpdate) -> Order:
         """Update order (admin) with stock restoration on cancellation"""
         try:
-            order = db.query(Order).filter(Order.id == order_id).first()
+            # Row lock: the auto-cancel sweeper may be cancelling the same order
+            order = db.query(Order).filter(Order.id == order_id).with_for_update().populate_existing().first()
             if not order:
                 raise NotFoundException("Order not found")
             
@@ -347,16 +375,21 @@ class OrderService:
 
             # CRITICAL: Restore stock if order is cancelled or refunded
             # Use pessimistic locking to prevent race conditions
+            restore_flash: dict = {}
             if (old_status not in [OrderStatus.CANCELLED, OrderStatus.REFUNDED] and 
                 order.status in [OrderStatus.CANCELLED, OrderStatus.REFUNDED]):
+                quantities: dict = {}
                 for item in order.items:
-                    # Lock product row to prevent concurrent modifications
-                    product = db.query(Product)\
-                        .filter(Product.id == item.product_id)\
-                        .with_for_update()\
-                        .first()
-                    if product:
-                        product.stock += item.quantity
+                    quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+                products, flash_ids = OrderService._lock_products(db, set(quantities))
+                for product_id, quantity in quantities.items():
+                    if product_id in flash_ids:
+                        # Flash-sale units go back to the Redis pool after commit
+                        restore_flash[product_id] = quantity
+                    elif product_id in products:
+                        products[product_id].stock += quantity
+                # Same as the auto-cancel sweeper: the coupon can be used again
+                release_order_coupons(db, [order.id])
             
             # CRITICAL: Award loyalty points when order is COMPLETED and PAID
             # This prevents awarding points for unpaid or incomplete orders
@@ -368,14 +401,13 @@ class OrderService:
                     LoyaltyService.add_points(db, user, order.total_amount)
             
             db.commit()
+            FlashSaleService.release(db, restore_flash)
             db.refresh(order)
             
             # Send notifications for status changes
             if old_status != order.status:
-                print(f"[DEBUG] Order status changed from {old_status} to {order.status}, sending notification...")
+                logger.debug("Order %s status changed %s -> %s", order.id, old_status, order.status)
                 OrderService._send_order_status_notification(db, order, old_status)
-            else:
-                print(f"[DEBUG] Order status unchanged: {order.status}")
             
             return order
             
@@ -386,6 +418,109 @@ class OrderService:
             db.rollback()
             raise BadRequestException(f"Failed to update order: {str(e)}")
     
+    @staticmethod
+    def cancel_stale_orders(
+        db: Session,
+        older_than: timedelta,
+        payment_methods: List[str],
+        batch_size: int = 500
+    ) -> int:
+        """
+        Cancel unpaid online-payment orders created more than ``older_than`` ago
+        and put their stock back, one batch per transaction.
+        
+        Orders are picked through ix_orders_unpaid_created_at with SKIP LOCKED,
+        so a payment callback holding an order row simply keeps it. Stock of a
+        whole batch goes back in one UPDATE ... FROM, in the same transaction
+        as the status change, and so do the coupons the orders used; flash-sale
+        units go back to Redis after the commit. Notifications are sent from
+        the background pool.
+        
+        Returns: number of orders cancelled
+        """
+        cutoff = datetime.utcnow() - older_than
+        cancelled = 0
+        
+        while True:
+            rows = db.query(Order.id, Order.status)\
+                .filter(
+                    Order.status.in_([OrderStatus.PENDING.value, OrderStatus.AWAITING_PAYMENT.value]),
+                    Order.is_paid == False,  # noqa: E712
+                    Order.created_at < cutoff,
+                    Order.payment_method.in_(payment_methods),
+                )\
+                .order_by(Order.created_at)\
+                .limit(batch_size)\
+                .with_for_update(skip_locked=True)\
+                .all()
+            if not rows:
+                break
+            order_ids = [row.id for row in rows]
+            
+            quantities = dict(
+                db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+                .filter(OrderItem.order_id.in_(order_ids))
+                .group_by(OrderItem.product_id)
+                .all()
+            )
+            flash_ids = FlashSaleService.flash_product_ids(quantities)
+            db_ids = sorted(quantities.keys() - flash_ids)
+            if db_ids:
+                # Same id-ordered locks as create_order, then one UPDATE for the batch
+                db.query(Product.id).filter(Product.id.in_(db_ids)).order_by(Product.id).with_for_update().all()
+                restored = select(OrderItem.product_id, func.sum(OrderItem.quantity).label("quantity"))\
+                    .where(OrderItem.order_id.in_(order_ids), OrderItem.product_id.in_(db_ids))\
+                    .group_by(OrderItem.product_id)\
+                    .subquery()
+                db.execute(
+                    update(Product)
+                    .where(Product.id == restored.c.product_id)
+                    .values(stock=Product.stock + restored.c.quantity)
+                    .execution_options(synchronize_session=False)
+                )
+            
+            db.query(Order)\
+                .filter(Order.id.in_(order_ids))\
+                .update({
+                    Order.status: OrderStatus.CANCELLED.value,
+                    Order.cancellation_reason: "Tự động hủy do quá hạn thanh toán",
+                    Order.updated_at: datetime.utcnow(),
+                }, synchronize_session=False)
+            release_order_coupons(db, order_ids)
+            db.commit()
+            FlashSaleService.release(db, {pid: int(quantities[pid]) for pid in flash_ids})
+            
+            for row in rows:
+                submit(OrderService.notify_status_change, row.id, row.status)
+            cancelled += len(rows)
+            logger.info("Auto-cancelled %s unpaid orders (batch up to id %s)", len(rows), max(order_ids))
+            
+            if len(rows) < batch_size:
+                break
+        
+        return cancelled
+    
+    @staticmethod
+    def run_auto_cancel() -> int:
+        """Background entry point: only the worker holding the advisory lock sweeps"""
+        with try_advisory_lock("orders:auto-cancel") as acquired:
+            if not acquired:
+                return 0
+            with SessionLocal() as db:
+                return OrderService.cancel_stale_orders(
+                    db,
+                    timedelta(minutes=settings.ORDER_PAYMENT_TIMEOUT_MINUTES),
+                    settings.ORDER_AUTO_CANCEL_PAYMENT_METHODS,
+                )
+    
+    @staticmethod
+    def notify_status_change(order_id: int, old_status: str) -> None:
+        """Send the status-change notification with its own session (background threads)"""
+        with SessionLocal() as db:
+            order = db.query(Order).filter(Order.id == order_id).first()
+            if order:
+                OrderService._send_order_status_notification(db, order, old_status)
+    
     @staticmethod
     def _send_order_created_notification(db: Session, order: Order, user: User) -> None:
         """Send confirmation email when order is created"""
@@ -475,23 +610,21 @@ Chúng tôi sẽ liên hệ với bạn sớm nhất để xác nhận đơn hà
                 message=chat_message
             )
             
-        except Exception as e:
+        except Exception:
             # Don't fail order creation if notification fails
-            print(f"Failed to send order creation notification: {str(e)}")
+            logger.exception("Failed to send order creation notification for order %s", order.id)
     
     @staticmethod
     def _send_order_status_notification(db: Session, order: Order, old_status: OrderStatus) -> None:
         """Send notification email when order status changes"""
-        print(f"[DEBUG] _send_order_status_notification called for order {order.id}, order.user_id={order.user_id}")
         try:
             # IMPORTANT: Always get email from the order's user, not the logged-in admin
             user = db.query(User).filter(User.id == order.user_id).first()
             if not user or not user.email:
-                print(f"[DEBUG] User not found or no email: user_id={order.user_id}")
+                logger.debug("No email for order owner user_id=%s, skipping notification", order.user_id)
                 return
             
             user_email = user.email
-            print(f"[DEBUG] Sending notification to order owner: {user_email} (user_id={user.id})")
             
             # Map status to notification content
             notifications = {
@@ -557,7 +690,6 @@ Chúng tôi sẽ liên hệ với bạn sớm nhất để xác nhận đơn hà
             """
             
             # Send notification to order owner's email
-            print(f"[DEBUG] Calling NotificationService.create_notification with email_to={user_email}")
             NotificationService.create_notification(
                 db=db,
                 user_id=order.user_id,
@@ -594,9 +726,9 @@ Bạn có thể xem chi tiết đơn hàng tại: http://localhost:3000/orders""
                 message=chat_message
             )
             
-        except Exception as e:
+        except Exception:
             # Don't fail order update if notification fails
-            print(f"Failed to send order status notification: {str(e)}")
+            logger.exception("Failed to send order status notification for order %s", order.id)
     
     @staticmethod
     async def _send_order_notification(db: Session, order: Order, old_status: OrderStatus) -> None:
@@ -9,8 +9,10 @@ from typing import Dict, Any
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.tracing import traced_class
 
 
+@traced_class
 class PaymentService:
     """Payment gateway integration service"""
     
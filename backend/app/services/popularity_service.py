@@ -0,0 +1,190 @@
+"""
+Popularity Service
+
+Product views, add-to-carts, purchases and likes feed the "popular" sort
+and the homepage list. Request handlers only bump a counter in this process
+(``record``); the ``popularity-flush`` job writes what accumulated to
+``product_stats`` every POPULARITY_FLUSH_INTERVAL_S, one multi-row upsert per
+worker, so a page view costs no database write. Likes are the exception:
+like_count is shown to users and must be exact, so like_service upserts each
+like in its own transaction (``apply``).
+
+The score is the sum of event weights, each halved every
+POPULARITY_HALF_LIFE_HOURS. It is stored as the log2 of its value at a
+fixed EPOCH:
+
+    log_score = log2(sum(weight * 2 ** (hours(event - EPOCH) / half_life)))
+
+Decay is the same factor for every product, so ranking by ``log_score`` is
+ranking by the decayed score at any moment; nothing has to be rewritten as
+time passes and the index on ``log_score`` serves the top-N. A batch adds to
+a row with ``log2(2**a + 2**b)``, computed as ``max + log2(1 + 2**(min - max))``
+so it never overflows. Changing the half-life rescales every score: reset
+``log_score`` (or let the new events dominate) after doing so.
+
+Buffered events are lost if a worker dies between two flushes; a few
+seconds of views do not change a ranking.
+"""
+import logging
+import math
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, contains_eager
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.product import Product
+from app.models.product_stats import ProductStats
+from app.services.category_tree_service import CategoryTreeService
+from app.services.product_service import PRODUCT_VIEWS
+
+logger = logging.getLogger(__name__)
+
+EVENT_WEIGHTS = {"view": 1.0, "cart": 3.0, "like": 5.0, "purchase": 10.0}
+EVENT_COLUMNS = {
+    "view": "view_count",
+    "cart": "cart_count",
+    "like": "like_count",
+    "purchase": "purchase_count",
+}
+EPOCH = datetime(2025, 1, 1)  # scores are relative to it; never change
+
+product_stats = ProductStats.__table__
+
+
+def log_score(weight: float, at: datetime) -> float:
+    """log2 of ``weight`` worth of events at ``at``, decayed back to EPOCH"""
+    hours = (at - EPOCH).total_seconds() / 3600
+    return math.log2(weight) + hours / settings.POPULARITY_HALF_LIFE_HOURS
+
+
+def merge_log_scores(a: float, b: float) -> float:
+    """log2(2**a + 2**b) without leaving the log domain"""
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+class EventBuffer:
+    """Event counts of this process since the last flush"""
+
+    def __init__(self):
+        self._counts: Counter = Counter()  # (product_id, event) -> count
+        self._lock = threading.Lock()
+
+    def add(self, event: str, counts: Mapping[int, int]) -> None:
+        if event not in EVENT_WEIGHTS:
+            raise ValueError(f"Unknown event {event}")
+        with self._lock:
+            for product_id, count in counts.items():
+                if count > 0:
+                    self._counts[(product_id, event)] += count
+
+    def drain(self) -> Dict[int, Dict[str, int]]:
+        """Take everything buffered: product_id -> event -> count"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        drained: Dict[int, Dict[str, int]] = {}
+        for (product_id, event), count in counts.items():
+            drained.setdefault(product_id, {})[event] = count
+        return drained
+
+    def restore(self, drained: Dict[int, Dict[str, int]]) -> None:
+        """Put back counts whose flush failed"""
+        with self._lock:
+            for product_id, events in drained.items():
+                for event, count in events.items():
+                    self._counts[(product_id, event)] += count
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._counts)
+
+
+buffer = EventBuffer()
+
+
+class PopularityService:
+    """Buffered engagement counters and the popularity ranking"""
+
+    @staticmethod
+    def record(event: str, product_ids: Iterable[int]) -> None:
+        """One ``event`` (view, cart, purchase) per product id; never touches the database"""
+        buffer.add(event, Counter(product_ids))
+
+    @staticmethod
+    def record_counts(event: str, counts: Mapping[int, int]) -> None:
+        """``event`` ``counts[product_id]`` times (e.g. units purchased)"""
+        buffer.add(event, counts)
+
+    @staticmethod
+    def apply(db: Session, counts: Dict[int, Dict[str, int]]) -> None:
+        """
+        Add ``counts`` (product_id -> event -> count) to product_stats in the
+        caller's transaction; the caller commits
+        """
+        now = datetime.utcnow()
+        rows = []
+        for product_id in sorted(counts):  # same lock order in every worker
+            events = counts[product_id]
+            row = {column: events.get(event, 0) for event, column in EVENT_COLUMNS.items()}
+            weight = sum(EVENT_WEIGHTS[event] * count for event, count in events.items())
+            row.update(product_id=product_id, log_score=log_score(weight, now), created_at=now, updated_at=now)
+            rows.append(row)
+
+        stmt = pg_insert(product_stats).values(rows)
+        current, incoming = product_stats.c.log_score, stmt.excluded.log_score
+        high, low = func.greatest(current, incoming), func.least(current, incoming)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[product_stats.c.product_id],
+            set_={
+                **{
+                    column: product_stats.c[column] + stmt.excluded[column]
+                    for column in EVENT_COLUMNS.values()
+                },
+                # 2**-60 is below float precision; the floor also keeps power() from underflowing
+                "log_score": high + func.ln(1 + func.power(2.0, func.greatest(low - high, -60.0))) / math.log(2),
+                "updated_at": now,
+            },
+        )
+        db.execute(stmt)
+
+    @staticmethod
+    def flush(db: Session) -> int:
+        """Upsert the buffered counts into product_stats; returns the number of products"""
+        drained = buffer.drain()
+        if not drained:
+            return 0
+        try:
+            PopularityService.apply(db, drained)
+            db.commit()
+        except Exception:
+            db.rollback()
+            buffer.restore(drained)
+            raise
+        return len(drained)
+
+    @staticmethod
+    def flush_pending() -> int:
+        """Scheduled job (every worker): flush this process's buffer"""
+        with SessionLocal() as db:
+            return PopularityService.flush(db)
+
+    @staticmethod
+    def get_popular(
+        db: Session, limit: int = 12, category_id: Optional[int] = None, view: str = "full"
+    ) -> List[Product]:
+        """Active products by decayed popularity, best first (``category_id`` includes sub-categories)"""
+        query = db.query(Product)\
+            .join(ProductStats, ProductStats.product_id == Product.id)\
+            .options(*PRODUCT_VIEWS[view], contains_eager(Product.stats))\
+            .filter(Product.is_active == True)
+        if category_id:
+            query = query.filter(Product.category_id.in_(CategoryTreeService.subtree_ids(db, category_id)))
+        return query.order_by(ProductStats.log_score.desc(), ProductStats.product_id)\
+            .limit(limit)\
+            .all()
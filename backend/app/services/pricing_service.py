@@ -0,0 +1,303 @@
+"""
+Pricing Service
+
+One place that prices carts and orders. Callers pass rows they have already
+loaded (cart items, locked products at checkout) and get lines and totals in
+a single pass:
+
+    unit price      sale_price, else price
+    combo           collection.sale_price per combo (sum of member prices if
+                    unset), spread over its products by
+                    ratio = combo price / original total
+    VIP discount    tier percentage of the subtotal
+    coupon          on subtotal + shipping fee (rules in coupon_service)
+
+Bundle data (members, original total, ratio) is cached per collection in
+process. ``invalidate_collections`` / ``invalidate_products`` drop local
+entries and bump a per-collection version in Redis (``pricing:bundle:<id>``)
+so other workers miss on their next read; without Redis the cache is
+bypassed. Entries also expire after PRICING_CACHE_TTL_S. Checkout compares
+the cached member prices with the locked product rows and recomputes when
+they differ, so an order is never priced from a stale entry.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException
+from app.core.redis import get_redis
+from app.core.tracing import traced_class
+from app.models.collection import Collection, CollectionItem
+from app.models.product import Product
+from app.models.user import User
+from app.schemas.order import OrderItemCreate
+from app.services.coupon_service import validate_and_apply_coupon
+from app.services.loyalty_service import LoyaltyService
+
+logger = logging.getLogger(__name__)
+
+SHIPPING_FEE = 50000.0  # 50k VND flat rate
+
+
+def _version_key(collection_id: int) -> str:
+    return f"pricing:bundle:{collection_id}"
+
+
+def unit_price(product: Product) -> float:
+    """Price a product sells for on its own"""
+    return product.sale_price if product.sale_price else product.price
+
+
+@dataclass(frozen=True)
+class BundlePrice:
+    """Pricing snapshot of one collection (combo)"""
+    collection_id: int
+    sale_price: Optional[float]
+    members: Tuple[Tuple[int, int, float], ...]  # (product_id, quantity, unit price)
+
+    @property
+    def original_total(self) -> float:
+        return sum(quantity * price for _, quantity, price in self.members)
+
+    @property
+    def price(self) -> float:
+        """Price of one combo"""
+        return self.sale_price if self.sale_price else self.original_total
+
+    @property
+    def ratio(self) -> float:
+        original = self.original_total
+        return self.price / original if original > 0 else 1.0
+
+    @classmethod
+    def from_collection(cls, collection: Collection) -> "BundlePrice":
+        members = tuple(
+            (item.product_id, item.quantity, unit_price(item.product))
+            for item in collection.items if item.product
+        )
+        return cls(collection.id, collection.sale_price, members)
+
+    def with_prices(self, products: Dict[int, Product]) -> "BundlePrice":
+        """Same members priced from ``products`` (locked rows at checkout)"""
+        return BundlePrice(self.collection_id, self.sale_price, tuple(
+            (pid, quantity, unit_price(products[pid]) if pid in products else price)
+            for pid, quantity, price in self.members
+        ))
+
+
+class BundlePriceCache:
+    """Process-local bundle snapshots tagged with their Redis version"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[int, Tuple[int, float, BundlePrice]] = {}  # id -> (version, stored_at, bundle)
+        self._lock = threading.Lock()
+
+    def get(self, versions: Dict[int, int]) -> Dict[int, BundlePrice]:
+        now = time.monotonic()
+        hits = {}
+        with self._lock:
+            for collection_id, version in versions.items():
+                entry = self._entries.get(collection_id)
+                if entry and entry[0] == version and now - entry[1] < self.ttl:
+                    hits[collection_id] = entry[2]
+        return hits
+
+    def put(self, bundles: Iterable[BundlePrice], versions: Dict[int, int]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for bundle in bundles:
+                self._entries[bundle.collection_id] = (versions[bundle.collection_id], now, bundle)
+
+    def drop(self, collection_ids: Iterable[int]) -> None:
+        with self._lock:
+            for collection_id in collection_ids:
+                self._entries.pop(collection_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+bundle_cache = BundlePriceCache(ttl=settings.PRICING_CACHE_TTL_S)
+
+
+@dataclass
+class OrderTotals:
+    subtotal: float
+    shipping_fee: float
+    vip_discount: float
+    coupon_discount: float
+    coupon: object = None  # Coupon to mark as used once the order exists
+
+    @property
+    def discount_amount(self) -> float:
+        return self.vip_discount + self.coupon_discount
+
+    @property
+    def total_amount(self) -> float:
+        return self.subtotal + self.shipping_fee - self.discount_amount
+
+
+@traced_class
+class PricingService:
+    """Cart and checkout pricing"""
+
+    @staticmethod
+    def _versions(collection_ids: List[int]) -> Optional[Dict[int, int]]:
+        """Current bundle versions from Redis; None when Redis is unavailable"""
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            values = redis.mget([_version_key(cid) for cid in collection_ids])
+        except RedisError as exc:
+            logger.warning("Bundle price versions unavailable, skipping cache: %s", exc)
+            return None
+        return {cid: int(value or 0) for cid, value in zip(collection_ids, values)}
+
+    @staticmethod
+    def get_bundles(db: Session, collection_ids: Iterable[int]) -> Dict[int, BundlePrice]:
+        """Bundle pricing of existing collections (cache, then one query for the misses)"""
+        collection_ids = sorted(set(collection_ids))
+        if not collection_ids:
+            return {}
+        versions = PricingService._versions(collection_ids)
+        bundles = bundle_cache.get(versions) if versions is not None else {}
+
+        missing = [cid for cid in collection_ids if cid not in bundles]
+        if missing:
+            loaded = [
+                BundlePrice.from_collection(collection)
+                for collection in db.query(Collection)
+                .options(selectinload(Collection.items).joinedload(CollectionItem.product))
+                .filter(Collection.id.in_(missing))
+            ]
+            if versions is not None:
+                bundle_cache.put(loaded, versions)  # versions read before loading: a concurrent bump wins
+            bundles.update((bundle.collection_id, bundle) for bundle in loaded)
+        return bundles
+
+    @staticmethod
+    def revalidate(bundles: Dict[int, BundlePrice], products: Dict[int, Product]) -> Dict[int, BundlePrice]:
+        """Reprice bundles whose member prices differ from the locked ``products``"""
+        fresh = {}
+        for collection_id, bundle in bundles.items():
+            repriced = bundle.with_prices(products)
+            if repriced != bundle:
+                logger.info("Bundle %s repriced at checkout (stale cache entry)", collection_id)
+                bundle_cache.drop([collection_id])
+            fresh[collection_id] = repriced
+        return fresh
+
+    @staticmethod
+    def expand_items(items: List, bundles: Dict[int, BundlePrice]) -> List[OrderItemCreate]:
+        """
+        Replace combo lines (``is_collection``) with their products, each with a
+        ``price_override`` that is its share of the combo price. Combos that do
+        not exist are kept as they are (and fail later as unknown products).
+        """
+        expanded = []
+        for item in items:
+            bundle = bundles.get(item.product_id) if getattr(item, "is_collection", False) else None
+            if bundle is None or not bundle.members:
+                expanded.append(item)
+                continue
+            ratio = bundle.ratio
+            for product_id, quantity, price in bundle.members:
+                expanded.append(OrderItemCreate(
+                    product_id=product_id,
+                    quantity=quantity * item.quantity,
+                    variant=None,
+                    price_override=price * ratio,
+                    is_collection=False
+                ))
+        return expanded
+
+    @staticmethod
+    def cart_subtotal(db: Session, cart_items: List) -> Tuple[float, int]:
+        """Subtotal and item count of cart items (products loaded with the items)"""
+        bundles = PricingService.get_bundles(db, (item.collection_id for item in cart_items if item.collection_id))
+        subtotal = 0.0
+        total_items = 0
+        for item in cart_items:
+            if item.collection_id:
+                bundle = bundles.get(item.collection_id)
+                if bundle:
+                    subtotal += bundle.price * item.quantity
+            elif item.product:
+                subtotal += unit_price(item.product) * item.quantity
+            total_items += item.quantity
+        return subtotal, total_items
+
+    @staticmethod
+    def order_totals(
+        db: Session,
+        user: User,
+        subtotal: float,
+        coupon_code: Optional[str] = None
+    ) -> OrderTotals:
+        """Shipping, VIP and coupon discounts for an order subtotal (BadRequest on a rejected coupon)"""
+        vip_percent = LoyaltyService.get_discount_percentage(user.vip_tier)
+        totals = OrderTotals(
+            subtotal=subtotal,
+            shipping_fee=SHIPPING_FEE,
+            vip_discount=subtotal * (vip_percent / 100),
+            coupon_discount=0.0,
+        )
+        if coupon_code:
+            result = validate_and_apply_coupon(
+                db=db,
+                coupon_code=coupon_code,
+                user_id=user.id,
+                order_amount=subtotal + totals.shipping_fee
+            )
+            if not result["valid"]:
+                raise BadRequestException(result["message"])
+            totals.coupon_discount = result["discount"]
+            totals.coupon = result.get("coupon")
+        return totals
+
+    # ----- invalidation --------------------------------------------------------
+
+    @staticmethod
+    def invalidate_collections(collection_ids: Iterable[int]) -> None:
+        """Call after committing a change to a collection or its members"""
+        collection_ids = sorted(set(collection_ids))
+        if not collection_ids:
+            return
+        bundle_cache.drop(collection_ids)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for collection_id in collection_ids:
+                pipe.incr(_version_key(collection_id))
+            pipe.execute()
+        except RedisError as exc:
+            # Other workers converge within PRICING_CACHE_TTL_S; checkout revalidates anyway
+            logger.warning("Failed to publish bundle price invalidation: %s", exc)
+
+    @staticmethod
+    def collections_of_products(db: Session, product_ids: Iterable[int]) -> List[int]:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return []
+        return [
+            collection_id for (collection_id,) in
+            db.query(CollectionItem.collection_id)
+            .filter(CollectionItem.product_id.in_(product_ids))
+            .distinct()
+        ]
+
+    @staticmethod
+    def invalidate_products(db: Session, product_ids: Iterable[int]) -> None:
+        """Call after committing a price change of products"""
+        PricingService.invalidate_collections(PricingService.collections_of_products(db, product_ids))
@@ -1,14 +1,36 @@
 """
 Product Service
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from typing import List, Optional
+from sqlalchemy.orm import Session, load_only, selectinload
+from typing import Dict, List, Optional, Tuple
 
-from app.models.product import Product, Category
+from app.models.product import CARD_COLUMNS, Product, Category
 from app.models.collection import Collection
+from app.models.product_stats import ProductStats
 from app.schemas.product import ProductCreate, ProductUpdate, CategoryCreate, CategoryUpdate
 from app.core.exceptions import NotFoundException, BadRequestException
+from app.services.category_tree_service import CategoryTreeService
+from app.services.facet_service import FacetService, ProductFilters
+from app.services.flash_sale_service import FlashSaleService
+from app.services.pricing_service import PricingService
+from app.services.suggestion_service import SuggestionService
+
+
+# sort= of the product list -> ORDER BY (price and newest pages come off the ix_products_active_* indexes)
+PRODUCT_SORTS = {
+    "price_asc": (Product.effective_price.asc(), Product.id.asc()),
+    "price_desc": (Product.effective_price.desc(), Product.id.desc()),
+    "newest": (Product.created_at.desc(), Product.id.desc()),
+    # product_stats is outer-joined for this one; products without events come last
+    "popular": (ProductStats.log_score.desc().nullslast(), Product.id.desc()),
+}
+
+# Column loading per ?view= of the list endpoints; a card never reads the heavy
+# columns (raiseload: a card schema that needs one fails loudly instead of lazy-loading)
+PRODUCT_VIEWS = {
+    "full": (),
+    "card": (load_only(*CARD_COLUMNS, raiseload=True),),
+}
 
 
 class ProductService:
@@ -24,39 +46,54 @@ class ProductService:
         search: Optional[str] = None,
         is_featured: Optional[bool] = None,
         min_price: Optional[float] = None,
-        max_price: Optional[float] = None
-    ) -> tuple[List[Product], int]:
-        """Get products with filters"""
-        query = db.query(Product).filter(Product.is_active == True)
-        
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
-            
-        if collection_id:
-            query = query.filter(Product.collection_id == collection_id)
+        max_price: Optional[float] = None,
+        materials: Optional[List[str]] = None,
+        colors: Optional[List[str]] = None,
+        dimensions: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        sort: Optional[str] = None,
+        with_facets: bool = False,
+        view: str = "full"
+    ) -> tuple[List[Product], int, Optional[dict]]:
+        """
+        Get products with filters (and the sidebar facet counts if ``with_facets``)
         
-        if search:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f"%{search}%"),
-                    Product.description.ilike(f"%{search}%")
-                )
-            )
-        
-        if is_featured is not None:
-            query = query.filter(Product.is_featured == is_featured)
-        
-        # Price filters
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
+        ``dimensions`` maps length/width/height to a (min, max) range in cm;
+        spec and dimension filters are served by expression indexes.
+        ``category_id`` includes its sub-categories.
+        ``sort`` is one of PRODUCT_SORTS (default: by id, stable paging).
+        ``view`` is one of PRODUCT_VIEWS.
+        """
+        if sort is not None and sort not in PRODUCT_SORTS:
+            raise BadRequestException(f"Unsupported sort: {sort}")
+        if view not in PRODUCT_VIEWS:
+            raise BadRequestException(f"Unsupported view: {view}")
         
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
+        filters = ProductFilters(
+            category_id=category_id,
+            category_ids=CategoryTreeService.subtree_ids(db, category_id) if category_id else None,
+            collection_id=collection_id,
+            search=search,
+            is_featured=is_featured,
+            min_price=min_price,
+            max_price=max_price,
+            materials=materials,
+            colors=colors,
+            dimensions=dimensions
+        )
+        query = db.query(Product).filter(*filters.all_conditions())
         
-        total = query.count()
-        products = query.offset(skip).limit(limit).all()
+        facets = None
+        if with_facets:
+            total, facets = FacetService.facet_counts(db, filters)  # total comes with the facets
+        else:
+            total = query.count()
+        if sort == "popular":
+            query = query.outerjoin(ProductStats, ProductStats.product_id == Product.id)
+        order_by = PRODUCT_SORTS[sort] if sort else (Product.id.asc(),)
+        products = query.options(*PRODUCT_VIEWS[view], selectinload(Product.stats))\
+            .order_by(*order_by).offset(skip).limit(limit).all()  # like_count of the page in one query
         
-        return products, total
+        return products, total, facets
     
     @staticmethod
     def get_product_by_id(db: Session, product_id: int) -> Product:
@@ -84,6 +121,7 @@ class ProductService:
             db.add(product)
             db.commit()
             db.refresh(product)
+            SuggestionService.product_changed(product)
             return product
         except Exception as e:
             db.rollback()
@@ -98,13 +136,19 @@ class ProductService:
                 raise NotFoundException("Product not found")
             
             update_data = data.model_dump(exclude_unset=True)
+            if "stock" in update_data and FlashSaleService.flash_product_ids([product_id]):
+                raise BadRequestException("End the flash sale before editing this product's stock")
             for field, value in update_data.items():
                 setattr(product, field, value)
             
             db.commit()
+            if update_data.keys() & {"price", "sale_price"}:
+                PricingService.invalidate_products(db, [product_id])
             db.refresh(product)
+            if update_data.keys() & {"name", "slug", "is_active"}:
+                SuggestionService.product_changed(product)
             return product
-        except NotFoundException:
+        except (NotFoundException, BadRequestException):
             db.rollback()
             raise
         except Exception as e:
@@ -119,8 +163,12 @@ class ProductService:
             if not product:
                 raise NotFoundException("Product not found")
             
+            # Bundles lose this member (collection items cascade)
+            collection_ids = PricingService.collections_of_products(db, [product_id])
             db.delete(product)
             db.commit()
+            PricingService.invalidate_collections(collection_ids)
+            SuggestionService.removed("product", product_id)
         except NotFoundException:
             db.rollback()
             raise
@@ -142,6 +190,8 @@ class ProductService:
             db.add(category)
             db.commit()
             db.refresh(category)
+            SuggestionService.category_changed(category)
+            CategoryTreeService.invalidate()
             return category
         except Exception as e:
             db.rollback()
@@ -161,6 +211,8 @@ class ProductService:
             
             db.commit()
             db.refresh(category)
+            SuggestionService.category_changed(category)
+            CategoryTreeService.invalidate()
             return category
         except NotFoundException:
             db.rollback()
@@ -187,6 +239,8 @@ class ProductService:
             
             db.delete(category)
             db.commit()
+            SuggestionService.removed("category", category_id)
+            CategoryTreeService.invalidate()
         except (NotFoundException, BadRequestException):
             db.rollback()
             raise
@@ -69,7 +69,8 @@ def confirm_qr_payment(order_id: int, db: Session) -> Dict[str, Any]:
     from app.models.user import User
     
     # Fetch order
-    order = db.query(Order).filter(Order.id == order_id).first()
+    # Locked so confirmation and the auto-cancel sweeper can't both win
+    order = db.query(Order).filter(Order.id == order_id).with_for_update().first()
     
     if not order:
         return {
@@ -84,6 +85,13 @@ def confirm_qr_payment(order_id: int, db: Session) -> Dict[str, Any]:
             "message": f"Order #{order_id} already paid"
         }
     
+    if order.status == OrderStatus.CANCELLED:
+        db.rollback()
+        return {
+            "success": False,
+            "message": f"Order #{order_id} was cancelled"
+        }
+    
     # Update order status
     order.is_paid = True
     order.status = OrderStatus.CONFIRMED
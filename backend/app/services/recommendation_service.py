@@ -0,0 +1,369 @@
+"""
+Recommendation Service
+
+"Frequently bought together" for the product page and the cart, and
+personalized recommendations for signed-in shoppers. Both are computed
+by scheduled jobs and read back with one indexed query.
+
+Frequently bought together
+--------------------------
+
+Orders are item vectors. ``product_co_purchases`` holds the sparse
+item-item co-occurrence matrix: the number of orders containing both
+products, with the diagonal holding the orders of each product. A
+neighbor's score is the cosine of the two order vectors:
+
+    score(i, j) = orders(i, j) / sqrt(orders(i) * orders(j))
+
+Pairs seen in fewer than RELATED_MIN_CO_ORDERS orders are left out as
+noise. The best RELATED_TOP_K neighbors of every product are stored in
+``related_products``, so GET /products/{id}/related is one indexed lookup.
+
+The matrix is computed in Postgres (self-join of the order baskets), so
+nothing is held in the app:
+
+    related-products-rebuild   nightly: recount every order that is not
+                               cancelled/refunded, recompute all neighbors
+    related-products-update    every RELATED_UPDATE_INTERVAL_S: add the
+                               orders after the newest one counted
+                               (max ``last_order_id``, committed with the
+                               counts), recompute the neighbors of the
+                               products in them
+
+Between rebuilds, updates only cover the products in new orders. Other
+products keep slightly stale neighbors, later cancellations still count,
+and an order committed after a higher id was counted is missed. The nightly
+rebuild corrects all three.
+
+Personalized
+------------
+The user-item matrix has one cell per product a user liked
+(``product_likes``, LIKE_WEIGHT) or bought (PURCHASE_WEIGHT), and the
+weights add up. Only the RECOMMENDATION_MAX_USER_ITEMS strongest and most
+recent cells of a user are kept, so one heavy buyer cannot dominate the
+self-join. The ``user-recommendations-rebuild`` job then works in two steps:
+
+    product_similarities   cosine of the products' user vectors, the top
+                           RECOMMENDATION_SIMILAR_K per product (pairs
+                           shared by RECOMMENDATION_MIN_COMMON_USERS users
+                           or more)
+    user_recommendations   score(u, j) = sum over i of weight(u, i) * sim(i, j)
+                           for active products j the user has not
+                           interacted with, top RECOMMENDATION_TOP_N
+
+Both are plain aggregations in Postgres, so work grows with the number of
+interactions rather than users x products. GET /users/me/recommendations
+serves the stored list and falls back to the popular products for users
+without one.
+"""
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Float, and_, cast, delete, func, insert, literal, select, true, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.locks import try_advisory_lock
+from app.core.tracing import traced_class
+from app.models.order import Order, OrderItem, OrderStatus
+from app.models.product import Product
+from app.models.product_like import ProductLike
+from app.models.recommendation import ProductSimilarity, UserRecommendation
+from app.models.related_product import ProductCoPurchase, RelatedProduct
+from app.services.popularity_service import PopularityService
+from app.services.product_service import PRODUCT_VIEWS
+
+LOCK_NAME = "recommendations:related"
+PERSONALIZED_LOCK_NAME = "recommendations:personalized"
+EXCLUDED_STATUSES = (OrderStatus.CANCELLED, OrderStatus.REFUNDED)
+LIKE_WEIGHT = 1.0
+PURCHASE_WEIGHT = 2.0
+
+co_purchases = ProductCoPurchase.__table__
+related_products = RelatedProduct.__table__
+similarities = ProductSimilarity.__table__
+user_recommendations = UserRecommendation.__table__
+
+COUNT_COLUMNS = ["product_id", "other_id", "order_count", "last_order_id", "created_at", "updated_at"]
+
+
+def _pair_counts(after_order_id: int, up_to_order_id: int):
+    """Rows of product_co_purchases for the baskets of orders in (after, up_to]"""
+    basket = select(OrderItem.order_id, OrderItem.product_id)\
+        .join(Order, Order.id == OrderItem.order_id)\
+        .where(
+            Order.status.notin_(EXCLUDED_STATUSES),
+            OrderItem.order_id > after_order_id,
+            OrderItem.order_id <= up_to_order_id,
+        )\
+        .distinct()\
+        .subquery()
+    left, right = basket.alias("left_item"), basket.alias("right_item")
+    counts = select(
+        left.c.product_id,
+        right.c.product_id.label("other_id"),
+        func.count().label("order_count"),
+        func.max(left.c.order_id).label("last_order_id"),
+    ).select_from(left.join(right, left.c.order_id == right.c.order_id))\
+        .group_by(left.c.product_id, right.c.product_id)\
+        .subquery()
+    now = datetime.utcnow()
+    return select(counts, literal(now).label("created_at"), literal(now).label("updated_at"))
+
+
+def _neighbors(product_ids: Optional[Sequence[int]]):
+    """Top RELATED_TOP_K neighbors by cosine, of ``product_ids`` (None: all)"""
+    pair = co_purchases.alias("pair")
+    own, other = co_purchases.alias("own"), co_purchases.alias("other")
+    score = cast(pair.c.order_count, Float) / func.sqrt(cast(own.c.order_count * other.c.order_count, Float), type_=Float)
+    conditions = [pair.c.product_id != pair.c.other_id, pair.c.order_count >= settings.RELATED_MIN_CO_ORDERS]
+    if product_ids is not None:
+        conditions.append(pair.c.product_id.in_(product_ids))
+    ranked = select(
+        pair.c.product_id,
+        pair.c.other_id,
+        pair.c.order_count,
+        score.label("score"),
+        func.row_number().over(
+            partition_by=pair.c.product_id, order_by=(score.desc(), pair.c.order_count.desc(), pair.c.other_id)
+        ).label("rank"),
+    ).select_from(
+        pair.join(own, and_(own.c.product_id == pair.c.product_id, own.c.other_id == pair.c.product_id))
+        .join(other, and_(other.c.product_id == pair.c.other_id, other.c.other_id == pair.c.other_id))
+    ).where(*conditions).subquery()
+    now = datetime.utcnow()
+    return select(
+        ranked.c.product_id,
+        ranked.c.other_id,
+        ranked.c.score,
+        ranked.c.order_count,
+        literal(now).label("created_at"),
+        literal(now).label("updated_at"),
+    ).where(ranked.c.rank <= settings.RELATED_TOP_K)
+
+
+def _interactions():
+    """CTE of the user-item matrix: (user_id, product_id, weight)"""
+    likes = select(
+        ProductLike.user_id,
+        ProductLike.product_id,
+        cast(literal(LIKE_WEIGHT), Float).label("weight"),
+        literal(0).label("last_order_id"),
+    )
+    purchases = select(
+        Order.user_id,
+        OrderItem.product_id,
+        cast(literal(PURCHASE_WEIGHT), Float).label("weight"),
+        func.max(Order.id).label("last_order_id"),
+    ).join(Order, Order.id == OrderItem.order_id)\
+        .where(Order.status.notin_(EXCLUDED_STATUSES))\
+        .group_by(Order.user_id, OrderItem.product_id)
+    cells = union_all(likes, purchases).subquery()
+    merged = select(
+        cells.c.user_id,
+        cells.c.product_id,
+        func.sum(cells.c.weight).label("weight"),
+        func.row_number().over(
+            partition_by=cells.c.user_id,
+            order_by=(func.sum(cells.c.weight).desc(), func.max(cells.c.last_order_id).desc(), cells.c.product_id),
+        ).label("rank"),
+    ).group_by(cells.c.user_id, cells.c.product_id).subquery()
+    return select(merged.c.user_id, merged.c.product_id, merged.c.weight)\
+        .where(merged.c.rank <= settings.RECOMMENDATION_MAX_USER_ITEMS)\
+        .cte("interactions")
+
+
+def _similarities():
+    """Top RECOMMENDATION_SIMILAR_K products by cosine over user vectors, per product"""
+    cells = _interactions()
+    left, right = cells.alias("left_cell"), cells.alias("right_cell")
+    dots = select(
+        left.c.product_id,
+        right.c.product_id.label("similar_id"),
+        func.sum(left.c.weight * right.c.weight).label("dot"),
+    ).select_from(
+        left.join(right, and_(left.c.user_id == right.c.user_id, left.c.product_id != right.c.product_id))
+    ).group_by(left.c.product_id, right.c.product_id)\
+        .having(func.count() >= settings.RECOMMENDATION_MIN_COMMON_USERS)\
+        .subquery()
+    norms = select(
+        cells.c.product_id,
+        func.sqrt(func.sum(cells.c.weight * cells.c.weight), type_=Float).label("norm"),
+    ).group_by(cells.c.product_id).subquery()
+    own, other = norms.alias("own_norm"), norms.alias("other_norm")
+    score = dots.c.dot / (own.c.norm * other.c.norm)
+    ranked = select(
+        dots.c.product_id,
+        dots.c.similar_id,
+        score.label("score"),
+        func.row_number().over(partition_by=dots.c.product_id, order_by=(score.desc(), dots.c.similar_id)).label("rank"),
+    ).select_from(
+        dots.join(own, own.c.product_id == dots.c.product_id)
+        .join(other, other.c.product_id == dots.c.similar_id)
+    ).subquery()
+    now = datetime.utcnow()
+    return select(
+        ranked.c.product_id,
+        ranked.c.similar_id,
+        ranked.c.score,
+        literal(now).label("created_at"),
+        literal(now).label("updated_at"),
+    ).where(ranked.c.rank <= settings.RECOMMENDATION_SIMILAR_K)
+
+
+def _user_scores():
+    """Top RECOMMENDATION_TOP_N unseen active products per user"""
+    cells = _interactions()
+    seen = cells.alias("seen")
+    scores = select(
+        cells.c.user_id,
+        similarities.c.similar_id.label("product_id"),
+        func.sum(cells.c.weight * similarities.c.score).label("score"),
+    ).select_from(
+        cells.join(similarities, similarities.c.product_id == cells.c.product_id)
+        .join(Product, and_(Product.id == similarities.c.similar_id, Product.is_active == True))
+        .outerjoin(seen, and_(seen.c.user_id == cells.c.user_id, seen.c.product_id == similarities.c.similar_id))
+    ).where(seen.c.product_id.is_(None))\
+        .group_by(cells.c.user_id, similarities.c.similar_id)\
+        .subquery()
+    ranked = select(
+        scores,
+        func.row_number().over(
+            partition_by=scores.c.user_id, order_by=(scores.c.score.desc(), scores.c.product_id)
+        ).label("rank"),
+    ).subquery()
+    now = datetime.utcnow()
+    return select(
+        ranked.c.user_id,
+        ranked.c.product_id,
+        ranked.c.score,
+        literal(now).label("created_at"),
+        literal(now).label("updated_at"),
+    ).where(ranked.c.rank <= settings.RECOMMENDATION_TOP_N)
+
+
+@traced_class
+class RecommendationService:
+    """Precomputed product recommendations"""
+
+    @staticmethod
+    def get_related(db: Session, product_id: int, limit: int = 8, view: str = "full") -> List[Product]:
+        """Products most often bought with ``product_id``, best first"""
+        return db.query(Product)\
+            .join(RelatedProduct, RelatedProduct.related_id == Product.id)\
+            .options(*PRODUCT_VIEWS[view], selectinload(Product.stats))\
+            .filter(RelatedProduct.product_id == product_id, Product.is_active == True)\
+            .order_by(RelatedProduct.score.desc(), RelatedProduct.order_count.desc())\
+            .limit(limit)\
+            .all()
+
+    @staticmethod
+    def rebuild_related(db: Session) -> None:
+        """Recount every order and recompute all neighbors"""
+        up_to = db.query(func.coalesce(func.max(Order.id), 0)).scalar()
+        db.execute(delete(co_purchases))
+        db.execute(insert(co_purchases).from_select(COUNT_COLUMNS, _pair_counts(0, up_to)))
+        RecommendationService._store_neighbors(db, None)
+        db.commit()
+
+    @staticmethod
+    def update_related(db: Session) -> int:
+        """Count the orders after the newest one counted and refresh their products' neighbors"""
+        after = db.query(func.coalesce(func.max(ProductCoPurchase.last_order_id), 0)).scalar()
+        up_to = db.query(func.coalesce(func.max(Order.id), 0)).scalar()
+        if up_to <= after:
+            return 0
+        # Cancelled orders above the watermark stay there: they must not count as new every time
+        product_ids = [
+            pid for (pid,) in db.query(OrderItem.product_id)
+            .join(Order, Order.id == OrderItem.order_id)
+            .filter(
+                Order.status.notin_(EXCLUDED_STATUSES),
+                OrderItem.order_id > after,
+                OrderItem.order_id <= up_to,
+            )
+            .distinct()
+        ]
+        if not product_ids:
+            return 0
+        insert_ = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+        # WHERE true: SQLite would read ON CONFLICT as the ON of a join without it
+        stmt = insert_(co_purchases).from_select(COUNT_COLUMNS, _pair_counts(after, up_to).where(true()))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[co_purchases.c.product_id, co_purchases.c.other_id],
+            set_={
+                "order_count": co_purchases.c.order_count + stmt.excluded.order_count,
+                "last_order_id": stmt.excluded.last_order_id,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ))
+        RecommendationService._store_neighbors(db, product_ids)
+        db.commit()
+        return len(product_ids)
+
+    @staticmethod
+    def _store_neighbors(db: Session, product_ids: Optional[List[int]]) -> None:
+        """Replace the stored neighbors of ``product_ids`` (None: all) in the current transaction"""
+        clear = delete(related_products)
+        if product_ids is not None:
+            clear = clear.where(related_products.c.product_id.in_(product_ids))
+        db.execute(clear)
+        db.execute(insert(related_products).from_select(
+            ["product_id", "related_id", "score", "order_count", "created_at", "updated_at"],
+            _neighbors(product_ids),
+        ))
+
+    @staticmethod
+    def get_for_user(db: Session, user_id: int, limit: int = 12, view: str = "full") -> List[Product]:
+        """Stored recommendations of ``user_id``; popular products when there are none yet"""
+        products = db.query(Product)\
+            .join(UserRecommendation, UserRecommendation.product_id == Product.id)\
+            .options(*PRODUCT_VIEWS[view], selectinload(Product.stats))\
+            .filter(UserRecommendation.user_id == user_id, Product.is_active == True)\
+            .order_by(UserRecommendation.score.desc(), UserRecommendation.product_id)\
+            .limit(limit)\
+            .all()
+        return products or PopularityService.get_popular(db, limit=limit, view=view)
+
+    @staticmethod
+    def rebuild_personalized(db: Session) -> None:
+        """Recompute product similarities and every user's recommendations"""
+        db.execute(delete(similarities))
+        db.execute(insert(similarities).from_select(
+            ["product_id", "similar_id", "score", "created_at", "updated_at"], _similarities()
+        ))
+        db.execute(delete(user_recommendations))
+        db.execute(insert(user_recommendations).from_select(
+            ["user_id", "product_id", "score", "created_at", "updated_at"], _user_scores()
+        ))
+        db.commit()
+
+    # ----- scheduled jobs ----------------------------------------------------
+
+    @staticmethod
+    def run_rebuild() -> None:
+        """Nightly job: full recount"""
+        with try_advisory_lock(LOCK_NAME) as acquired:
+            if acquired:
+                with SessionLocal() as db:
+                    RecommendationService.rebuild_related(db)
+
+    @staticmethod
+    def run_update() -> int:
+        """Frequent job: count new orders; returns the number of products refreshed"""
+        with try_advisory_lock(LOCK_NAME) as acquired:
+            if not acquired:
+                return 0
+            with SessionLocal() as db:
+                return RecommendationService.update_related(db)
+
+    @staticmethod
+    def run_personalized() -> None:
+        """Nightly job: rebuild personalized recommendations"""
+        with try_advisory_lock(PERSONALIZED_LOCK_NAME) as acquired:
+            if acquired:
+                with SessionLocal() as db:
+                    RecommendationService.rebuild_personalized(db)
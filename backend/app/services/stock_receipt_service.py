@@ -10,6 +10,7 @@ from decimal import Decimal
 from app.models.stock_receipt import StockReceipt, StockReceiptItem, StockReceiptStatus
 from app.models.product import Product
 from app.schemas.stock_receipt import StockReceiptCreate, StockReceiptUpdate
+from app.services.flash_sale_service import FlashSaleService
 
 
 class StockReceiptService:
@@ -183,13 +184,21 @@ class StockReceiptService:
         receipt.status = StockReceiptStatus.CONFIRMED
         receipt.confirmed_at = datetime.utcnow()
         
-        # Update product stock
-        for item in receipt.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
+        # Update product stock (row locks keep a flash sale from starting or
+        # ending until the Redis pool below matches the committed stock)
+        quantities = {}
+        for item in sorted(receipt.items, key=lambda i: i.product_id):
+            product = db.query(Product).filter(Product.id == item.product_id).with_for_update().first()
             if product:
                 product.stock = (product.stock or 0) + item.quantity
-        
-        db.commit()
+                quantities[product.id] = quantities.get(product.id, 0) + item.quantity
+        
+        flash_added = FlashSaleService.add_stock(quantities)
+        try:
+            db.commit()
+        except Exception:
+            FlashSaleService.add_stock({pid: -qty for pid, qty in flash_added.items()})
+            raise
         db.refresh(receipt)
         return receipt
 
@@ -0,0 +1,231 @@
+"""
+Stock Reservation Service
+
+Soft holds between checkout start and order creation. ``reserve`` holds the
+units of a checkout for STOCK_RESERVATION_TTL_MINUTES under one token;
+``create_order`` commits the user's holds on the ordered products (releasing
+the rest, token or not) and counts every other user's live holds against
+stock, so shoppers see "Insufficient stock" when they start checkout rather
+than at the last step.
+
+A hold stops counting as soon as its ``expires_at`` passes - the sweeper only
+flips expired rows in bulk and purges old ones, it is not needed for
+correctness. Flash-sale products are never held (first come, first served
+in Redis).
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.tracing import traced_class
+from app.models.product import Product
+from app.models.stock_reservation import StockReservation, ReservationStatus
+from app.schemas.order import OrderItemCreate
+from app.services.flash_sale_service import FlashSaleService
+
+logger = logging.getLogger(__name__)
+
+ACTIVE = ReservationStatus.ACTIVE.value
+
+
+@traced_class
+class StockReservationService:
+    """Time-limited stock holds and available-to-sell"""
+
+    @staticmethod
+    def held_quantities(db: Session, product_ids: Iterable[int], exclude_user_id: int = None) -> Dict[int, int]:
+        """Units held by live reservations per product (optionally ignoring one user's own holds)"""
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        query = db.query(StockReservation.product_id, func.sum(StockReservation.quantity))\
+            .filter(
+                StockReservation.product_id.in_(product_ids),
+                StockReservation.status == ACTIVE,
+                StockReservation.expires_at > datetime.utcnow(),
+            )
+        if exclude_user_id is not None:
+            query = query.filter(StockReservation.user_id != exclude_user_id)
+        return {product_id: int(total) for product_id, total in query.group_by(StockReservation.product_id)}
+
+    @staticmethod
+    def get_availability(db: Session, product_id: int) -> dict:
+        """Available-to-sell = stock - live holds, in one indexed lookup"""
+        reserved = select(func.coalesce(func.sum(StockReservation.quantity), 0))\
+            .where(
+                StockReservation.product_id == Product.id,
+                StockReservation.status == ACTIVE,
+                StockReservation.expires_at > datetime.utcnow(),
+            )\
+            .scalar_subquery()
+        row = db.query(Product.stock, reserved).filter(Product.id == product_id).first()
+        if not row:
+            raise NotFoundException("Product not found")
+        stock, reserved = (row[0] or 0), int(row[1])
+        return {
+            "product_id": product_id,
+            "stock": stock,
+            "reserved": reserved,
+            "available": max(stock - reserved, 0),
+        }
+
+    @staticmethod
+    def reserve(db: Session, user_id: int, items: List[OrderItemCreate]) -> dict:
+        """
+        Hold stock for a checkout. A user has one checkout at a time, so any
+        previous live holds of the user are released first.
+
+        Returns: {token, expires_at, items: [{product_id, quantity}]}
+        """
+        # Imported here: order_service depends on this module
+        from app.services.order_service import OrderService
+
+        if not items:
+            raise BadRequestException("Reservation must have at least one item")
+
+        try:
+            quantities: Dict[int, int] = {}
+            for item in OrderService._expand_cart_items_from_collections(db, user_id, items):
+                if item.is_collection:
+                    raise NotFoundException(f"Collection {item.product_id} not found")
+                quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+            held_ids = sorted(quantities.keys() - FlashSaleService.flash_product_ids(quantities))
+
+            db.query(StockReservation)\
+                .filter(StockReservation.user_id == user_id, StockReservation.status == ACTIVE)\
+                .update({StockReservation.status: ReservationStatus.RELEASED.value}, synchronize_session=False)
+
+            # Lock in id order (same as create_order) so two checkouts can't
+            # both take the last unit
+            products = {
+                product.id: product
+                for product in db.query(Product)
+                .filter(Product.id.in_(held_ids))
+                .order_by(Product.id)
+                .with_for_update()
+                .populate_existing()
+            }
+            held = StockReservationService.held_quantities(db, held_ids, exclude_user_id=user_id)
+
+            token = uuid.uuid4().hex
+            expires_at = datetime.utcnow() + timedelta(minutes=settings.STOCK_RESERVATION_TTL_MINUTES)
+            for product_id in held_ids:
+                product = products.get(product_id)
+                if not product:
+                    raise NotFoundException(f"Product {product_id} not found")
+                if not product.is_active:
+                    raise BadRequestException(f"Product {product.name} is no longer available")
+                available = (product.stock or 0) - held.get(product_id, 0)
+                if available < quantities[product_id]:
+                    raise BadRequestException(
+                        f"Insufficient stock for product {product.name}. "
+                        f"Available: {max(available, 0)}, Requested: {quantities[product_id]}"
+                    )
+                db.add(StockReservation(
+                    token=token,
+                    user_id=user_id,
+                    product_id=product_id,
+                    quantity=quantities[product_id],
+                    expires_at=expires_at,
+                ))
+            db.commit()
+        except (BadRequestException, NotFoundException):
+            db.rollback()
+            raise
+
+        return {
+            "token": token,
+            "expires_at": expires_at,
+            "items": [{"product_id": pid, "quantity": quantities[pid]} for pid in held_ids],
+        }
+
+    @staticmethod
+    def release(db: Session, user_id: int, token: str) -> int:
+        """Give up a checkout's holds; returns the number of holds released"""
+        released = db.query(StockReservation)\
+            .filter(
+                StockReservation.token == token,
+                StockReservation.user_id == user_id,
+                StockReservation.status == ACTIVE,
+            )\
+            .update({StockReservation.status: ReservationStatus.RELEASED.value}, synchronize_session=False)
+        db.commit()
+        return released
+
+    @staticmethod
+    def commit_holds(db: Session, user_id: int, product_ids: Iterable[int], order_id: int) -> int:
+        """
+        End the user's checkout once ``order_id`` is placed (caller commits):
+        their live holds on the ordered products become part of the order and
+        any other holds of theirs are released. With or without a reservation
+        token, no hold outlives the order and counts the units twice.
+        """
+        product_ids = list(product_ids)
+        active = db.query(StockReservation)\
+            .filter(StockReservation.user_id == user_id, StockReservation.status == ACTIVE)
+        committed = active.filter(StockReservation.product_id.in_(product_ids))\
+            .update(
+                {StockReservation.status: ReservationStatus.COMMITTED.value, StockReservation.order_id: order_id},
+                synchronize_session=False,
+            )
+        active.update({StockReservation.status: ReservationStatus.RELEASED.value}, synchronize_session=False)
+        return committed
+
+    @staticmethod
+    def sweep(db: Session, batch_size: int = 1000) -> dict:
+        """
+        Flip expired holds to EXPIRED and purge finished holds older than
+        STOCK_RESERVATION_RETENTION_DAYS, one batch per transaction.
+        SKIP LOCKED lets several workers sweep without waiting on each other.
+        """
+        now = datetime.utcnow()
+        expired = purged = 0
+
+        while True:
+            batch = select(StockReservation.id)\
+                .where(StockReservation.status == ACTIVE, StockReservation.expires_at <= now)\
+                .limit(batch_size)\
+                .with_for_update(skip_locked=True)\
+                .scalar_subquery()
+            count = db.query(StockReservation)\
+                .filter(StockReservation.id.in_(batch))\
+                .update(
+                    {StockReservation.status: ReservationStatus.EXPIRED.value, StockReservation.updated_at: now},
+                    synchronize_session=False,
+                )
+            db.commit()
+            expired += count
+            if count < batch_size:
+                break
+
+        cutoff = now - timedelta(days=settings.STOCK_RESERVATION_RETENTION_DAYS)
+        while True:
+            batch = select(StockReservation.id)\
+                .where(StockReservation.status != ACTIVE, StockReservation.updated_at < cutoff)\
+                .limit(batch_size)\
+                .with_for_update(skip_locked=True)\
+                .scalar_subquery()
+            count = db.query(StockReservation)\
+                .filter(StockReservation.id.in_(batch))\
+                .delete(synchronize_session=False)
+            db.commit()
+            purged += count
+            if count < batch_size:
+                break
+
+        if expired or purged:
+            logger.info("Stock reservation sweep: %s expired, %s purged", expired, purged)
+        return {"expired": expired, "purged": purged}
+
+    @staticmethod
+    def run_sweep() -> dict:
+        """Background entry point: sweep with a fresh session"""
+        with SessionLocal() as db:
+            return StockReservationService.sweep(db)
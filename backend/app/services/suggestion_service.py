@@ -0,0 +1,286 @@
+"""
+Suggestion Service
+
+Search-box autocomplete (GET /products/suggestions) served from memory.
+Every worker keeps a prefix index of active product names, categories and
+active collections, ranked by popularity: the ``product_stats.log_score``
+of a product, the best score among the products of a category or
+collection.
+
+    entries   (type, id) -> entry
+    prefixes  every prefix of every accent-folded word ("Ghế" -> "g", "gh",
+              "ghe") -> postings, most popular first
+
+A one-word query is a dict lookup and a slice. With more words the shortest
+list is walked in rank order until ``limit`` entries match the other words.
+A lookup never touches the database and takes no lock.
+
+The index is built at startup and replaced by a full rebuild every
+SUGGEST_REBUILD_INTERVAL_S to pick up new popularity scores. Catalog writes
+(product_service, collection_service) patch the local index: only the
+posting lists of the changed entry's prefixes are replaced (bisect into
+rank order, copy-on-write so concurrent lookups see the old or the new
+list), and ``suggest:catalog`` is bumped in Redis. The ``suggestion-sync`` job in every
+other worker sees the new version within SUGGEST_SYNC_INTERVAL_S and
+rebuilds. Without Redis other workers converge on their next periodic
+rebuild.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.redis import get_redis
+from app.models.collection import Collection, CollectionItem
+from app.models.product import Category, Product
+from app.models.product_stats import ProductStats
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "suggest:catalog"
+UNRANKED = float("-inf")  # no popularity data yet
+_WORD = re.compile(r"[a-z0-9]+")
+
+Key = Tuple[str, int]  # (type, id)
+
+
+def fold(text: str) -> str:
+    """Lowercase without diacritics: 'Bàn Đá' -> 'ban da'"""
+    text = text.replace("đ", "d").replace("Đ", "D")
+    decomposed = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def words(text: Optional[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(_WORD.findall(fold(text or ""))))
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    type: str  # product | category | collection
+    id: int
+    name: str
+    slug: Optional[str]
+    score: float = UNRANKED
+
+    @property
+    def key(self) -> Key:
+        return (self.type, self.id)
+
+
+def _rank(entry: Suggestion) -> Tuple:
+    """Sort key, unique per entry: most popular, then shortest name"""
+    return (-entry.score, len(entry.name), entry.name, entry.type, entry.id)
+
+
+# (rank, entry, folded words): one tuple per entry, shared by all its prefixes
+Posting = Tuple[Tuple, Suggestion, Tuple[str, ...]]
+
+
+def _posting(entry: Suggestion) -> Posting:
+    return (_rank(entry), entry, words(entry.name))
+
+
+def _prefixes(entry_words: Tuple[str, ...]) -> set:
+    return {word[:end] for word in entry_words for end in range(1, len(word) + 1)}
+
+
+class _Snapshot:
+    """
+    Index state. A rebuild replaces it whole; ``apply`` patches it in place,
+    replacing (never mutating) the posting lists it touches
+    """
+
+    def __init__(self, entries: Iterable[Suggestion] = ()):
+        self.postings: Dict[Key, Posting] = {}
+        self.prefixes: Dict[str, List[Posting]] = {}
+        for posting in sorted(map(_posting, entries)):
+            self.postings[posting[1].key] = posting
+            for prefix in _prefixes(posting[2]):
+                self.prefixes.setdefault(prefix, []).append(posting)
+
+    def add(self, entry: Suggestion) -> None:
+        posting = _posting(entry)
+        for prefix in _prefixes(posting[2]):
+            current = self.prefixes.get(prefix, [])
+            at = bisect.bisect_left(current, posting[:1])
+            self.prefixes[prefix] = current[:at] + [posting] + current[at:]
+        self.postings[entry.key] = posting
+
+    def remove(self, key: Key) -> Optional[Suggestion]:
+        posting = self.postings.pop(key, None)
+        if posting is None:
+            return None
+        for prefix in _prefixes(posting[2]):
+            current = self.prefixes[prefix]
+            at = bisect.bisect_left(current, posting[:1])
+            if len(current) == 1:
+                del self.prefixes[prefix]
+            else:
+                self.prefixes[prefix] = current[:at] + current[at + 1:]
+        return posting[1]
+
+
+class SuggestionIndex:
+    """Per-process prefix index of the catalog"""
+
+    def __init__(self):
+        self._snapshot = _Snapshot()
+        self._write_lock = threading.Lock()
+        self.version: Optional[int] = None  # last suggest:catalog version reflected here
+        self.built_at: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._snapshot.postings)
+
+    def search(self, query: str, limit: int = 10) -> List[Suggestion]:
+        terms = words(query)
+        if not terms:
+            return []
+        prefixes = self._snapshot.prefixes
+        shortest = min((prefixes.get(term, ()) for term in terms), key=len)
+        if len(terms) == 1:
+            return [entry for _, entry, _ in shortest[:limit]]
+        found = []
+        for _, entry, entry_words in shortest:  # best first: stop at ``limit``
+            if all(any(word.startswith(term) for word in entry_words) for term in terms):
+                found.append(entry)
+                if len(found) == limit:
+                    break
+        return found
+
+    def replace(self, entries: Iterable[Suggestion], version: Optional[int]) -> None:
+        snapshot = _Snapshot({entry.key: entry for entry in entries}.values())
+        with self._write_lock:
+            self._snapshot = snapshot
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def apply(self, upserts: Iterable[Suggestion] = (), removals: Iterable[Key] = ()) -> None:
+        """Change some entries (scores of existing ones are kept)"""
+        with self._write_lock:
+            snapshot = self._snapshot
+            for key in removals:
+                snapshot.remove(key)
+            for entry in upserts:
+                previous = snapshot.remove(entry.key)
+                score = previous.score if previous else entry.score
+                snapshot.add(Suggestion(entry.type, entry.id, entry.name, entry.slug, score))
+
+
+suggestion_index = SuggestionIndex()
+
+
+class SuggestionService:
+    """Autocomplete over the in-memory index"""
+
+    @staticmethod
+    def suggest(query: str, limit: int = 10) -> List[Suggestion]:
+        return suggestion_index.search(query, limit)
+
+    @staticmethod
+    def load(db: Session) -> List[Suggestion]:
+        """Every suggestible row with its popularity"""
+        scores: Dict[int, float] = {}
+        by_category: Dict[int, float] = {}
+        entries: List[Suggestion] = []
+        rows = db.query(Product.id, Product.name, Product.slug, Product.category_id, ProductStats.log_score)\
+            .outerjoin(ProductStats, ProductStats.product_id == Product.id)\
+            .filter(Product.is_active == True)
+        for product_id, name, slug, category_id, log_score in rows:
+            score = log_score if log_score is not None else UNRANKED
+            scores[product_id] = score
+            if category_id is not None:
+                by_category[category_id] = max(by_category.get(category_id, UNRANKED), score)
+            entries.append(Suggestion("product", product_id, name, slug, score))
+
+        for category_id, name, slug in db.query(Category.id, Category.name, Category.slug):
+            entries.append(Suggestion("category", category_id, name, slug, by_category.get(category_id, UNRANKED)))
+
+        members: Dict[int, List[int]] = {}
+        for collection_id, product_id in db.query(CollectionItem.collection_id, CollectionItem.product_id):
+            members.setdefault(collection_id, []).append(product_id)
+        for collection_id, name, slug in db.query(Collection.id, Collection.name, Collection.slug)\
+                .filter(Collection.is_active == True):
+            score = max((scores.get(pid, UNRANKED) for pid in members.get(collection_id, [])), default=UNRANKED)
+            entries.append(Suggestion("collection", collection_id, name, slug, score))
+        return entries
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """Reload the index from the database; returns the number of entries"""
+        version = SuggestionService._current_version()  # read first: a change during the load wins
+        entries = SuggestionService.load(db)
+        suggestion_index.replace(entries, version)
+        return len(entries)
+
+    @staticmethod
+    def run_sync() -> int:
+        """Scheduled job (every worker): rebuild on a catalog change elsewhere, or when due"""
+        due = suggestion_index.built_at is None or \
+            time.monotonic() - suggestion_index.built_at >= settings.SUGGEST_REBUILD_INTERVAL_S
+        version = SuggestionService._current_version()
+        if not due and (version is None or version == suggestion_index.version):
+            return 0
+        with SessionLocal() as db:
+            return SuggestionService.rebuild(db)
+
+    # ----- catalog changes (call after commit) -------------------------------
+
+    @staticmethod
+    def product_changed(product: Product) -> None:
+        if product.is_active:
+            SuggestionService._changed(upserts=[Suggestion("product", product.id, product.name, product.slug)])
+        else:
+            SuggestionService._changed(removals=[("product", product.id)])
+
+    @staticmethod
+    def category_changed(category: Category) -> None:
+        SuggestionService._changed(upserts=[Suggestion("category", category.id, category.name, category.slug)])
+
+    @staticmethod
+    def collection_changed(collection: Collection) -> None:
+        if collection.is_active:
+            SuggestionService._changed(
+                upserts=[Suggestion("collection", collection.id, collection.name, collection.slug)]
+            )
+        else:
+            SuggestionService._changed(removals=[("collection", collection.id)])
+
+    @staticmethod
+    def removed(kind: str, entry_id: int) -> None:
+        SuggestionService._changed(removals=[(kind, entry_id)])
+
+    @staticmethod
+    def _changed(upserts: Iterable[Suggestion] = (), removals: Iterable[Key] = ()) -> None:
+        suggestion_index.apply(upserts, removals)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            version = redis.incr(VERSION_KEY)
+        except RedisError as exc:
+            logger.warning("Failed to publish suggestion index change: %s", exc)
+            return
+        if suggestion_index.version is not None and version == suggestion_index.version + 1:
+            suggestion_index.version = version  # nobody else changed anything: no rebuild needed here
+
+    @staticmethod
+    def _current_version() -> Optional[int]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            return int(redis.get(VERSION_KEY) or 0)
+        except RedisError as exc:
+            logger.warning("Suggestion index version unavailable: %s", exc)
+            return None
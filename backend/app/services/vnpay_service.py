@@ -11,8 +11,10 @@ from typing import Dict, Optional, Tuple
 import requests
 
 from app.core.config import settings
+from app.core.tracing import traced_class
 
 
+@traced_class
 class VNPayService:
     """VNPay payment gateway service"""
     
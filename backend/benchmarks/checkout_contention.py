@@ -0,0 +1,410 @@
+"""
+Checkout contention benchmark / stress tool.
+
+Fires concurrent ``OrderService.create_order`` calls from a thread pool at a
+handful of hot SKUs and combos on a real PostgreSQL database, then checks
+that no stock was oversold:
+
+    final stock == initial stock - units in successful orders   (and >= 0)
+
+Reports orders/sec, checkout latency, time spent waiting on row locks
+(``SELECT ... FOR UPDATE``), and deadlock / lock-timeout / retry counts.
+
+    python benchmarks/checkout_contention.py --database-url postgresql://... \
+        --workers 32 --checkouts 2000 --hot-skus 4 --combos 2 --stock 1000
+
+``--flash-sale`` puts the hot SKUs on flash sale first (Redis counters with
+write-behind instead of row locks) so both paths can be compared.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.security import get_password_hash
+from app.models import Collection, CollectionItem, OrderItem, Product, User
+from app.models.order import PaymentMethod
+from app.schemas.order import OrderCreate, OrderItemCreate
+from app.services.flash_sale_service import FlashSaleService
+from app.services.order_service import OrderService
+
+DEADLOCK_DETECTED = "40P01"
+LOCK_NOT_AVAILABLE = "55P03"
+SERIALIZATION_FAILURE = "40001"
+SKU_PREFIX = "CONTENTION-HOT-"
+
+
+@dataclass
+class ContentionConfig:
+    workers: int = 16
+    checkouts: int = 1000
+    hot_skus: int = 4
+    combos: int = 2
+    stock: int = 1000
+    max_quantity: int = 2
+    combo_ratio: float = 0.3
+    retries: int = 3
+    seed: int = 7
+    lock_timeout_ms: int = 0  # 0 = wait forever (PostgreSQL default)
+    notifications: bool = False
+    flash_sale: bool = False  # hot SKUs' stock in Redis counters instead of row locks
+
+
+@dataclass
+class ContentionResult:
+    elapsed_s: float = 0.0
+    attempts: int = 0
+    succeeded: int = 0
+    rejected_stock: int = 0
+    deadlocks: int = 0
+    lock_timeouts: int = 0
+    serialization_failures: int = 0
+    retries: int = 0
+    gave_up: int = 0
+    errors: Dict[str, int] = field(default_factory=dict)
+    latencies_ms: List[float] = field(default_factory=list)
+    lock_waits_ms: List[float] = field(default_factory=list)
+    order_ids: List[int] = field(default_factory=list)
+    server_deadlocks: int = 0
+    flash_drift: int = 0
+    stock_check: Dict[str, dict] = field(default_factory=dict)
+    oversold: bool = False
+    consistent: bool = True
+
+    def summary(self) -> dict:
+        def pct(values: List[float], p: float) -> float:
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 2)
+
+        return {
+            "elapsed_s": round(self.elapsed_s, 2),
+            "attempts": self.attempts,
+            "succeeded": self.succeeded,
+            "orders_per_s": round(self.succeeded / self.elapsed_s, 1) if self.elapsed_s else 0.0,
+            "rejected_insufficient_stock": self.rejected_stock,
+            "deadlocks": self.deadlocks,
+            "server_deadlocks": self.server_deadlocks,
+            "lock_timeouts": self.lock_timeouts,
+            "serialization_failures": self.serialization_failures,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "errors": self.errors,
+            "checkout_ms": {"p50": pct(self.latencies_ms, 50), "p95": pct(self.latencies_ms, 95),
+                            "p99": pct(self.latencies_ms, 99), "max": pct(self.latencies_ms, 100)},
+            "lock_wait_ms": {"total": round(sum(self.lock_waits_ms), 1), "count": len(self.lock_waits_ms),
+                             "p50": pct(self.lock_waits_ms, 50), "p95": pct(self.lock_waits_ms, 95),
+                             "p99": pct(self.lock_waits_ms, 99), "max": pct(self.lock_waits_ms, 100)},
+            "flash_drift": self.flash_drift,
+            "stock_check": self.stock_check,
+            "oversold": self.oversold,
+            "consistent": self.consistent,
+        }
+
+
+class LockWaitRecorder:
+    """Times every ``SELECT ... FOR UPDATE`` issued through the engine"""
+
+    def __init__(self, engine: Engine):
+        self.waits_ms: List[float] = []
+        self._lock = threading.Lock()
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if "FOR UPDATE" in statement:
+            conn.info["lock_wait_start"] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("lock_wait_start", None)
+        if started is not None:
+            with self._lock:
+                self.waits_ms.append((time.perf_counter() - started) * 1000)
+
+
+def _sqlstate(exc: BaseException) -> Optional[str]:
+    """SQLSTATE of the database error behind ``exc`` (create_order wraps them)"""
+    while exc is not None:
+        if isinstance(exc, DBAPIError):
+            return getattr(exc.orig, "pgcode", None)
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def prepare_fixture(session_factory, config: ContentionConfig) -> dict:
+    """Create (or reset) hot SKUs, combos and shopper accounts"""
+    db = session_factory()
+    try:
+        product_ids = []
+        for i in range(config.hot_skus):
+            sku = f"{SKU_PREFIX}{i}"
+            product = db.query(Product).filter(Product.sku == sku).first()
+            if product is None:
+                product = Product(
+                    name=f"Contention Hot SKU {i}", slug=f"contention-hot-{i}", sku=sku,
+                    price=1_000_000 + i * 100_000, is_active=True,
+                )
+                db.add(product)
+            product.stock = config.stock
+            product.is_active = True
+            db.flush()
+            product_ids.append(product.id)
+
+        collection_ids = []
+        for i in range(config.combos):
+            slug = f"contention-combo-{i}"
+            collection = db.query(Collection).filter(Collection.slug == slug).first()
+            if collection is None:
+                collection = Collection(name=f"Contention Combo {i}", slug=slug, is_active=True, sale_price=1_500_000)
+                db.add(collection)
+                db.flush()
+                # Each combo overlaps with the next one so their lock sets intersect
+                for offset in range(2):
+                    db.add(CollectionItem(
+                        collection_id=collection.id,
+                        product_id=product_ids[(i + offset) % len(product_ids)],
+                        quantity=1,
+                    ))
+            collection_ids.append(collection.id)
+
+        password_hash = None
+        user_ids = []
+        for i in range(config.workers):
+            email = f"contention{i}@example.com"
+            shopper = db.query(User).filter(User.email == email).first()
+            if shopper is None:
+                password_hash = password_hash or get_password_hash("Contention@123")
+                shopper = User(email=email, hashed_password=password_hash, full_name=f"Contention {i}")
+                db.add(shopper)
+                db.flush()
+            user_ids.append(shopper.id)
+
+        db.commit()
+        return {"product_ids": product_ids, "collection_ids": collection_ids, "user_ids": user_ids}
+    finally:
+        db.close()
+
+
+def _build_order(rng: random.Random, fixture: dict, config: ContentionConfig) -> OrderCreate:
+    items = [
+        OrderItemCreate(product_id=product_id, quantity=rng.randint(1, config.max_quantity))
+        for product_id in rng.sample(fixture["product_ids"], rng.randint(1, min(3, len(fixture["product_ids"]))))
+    ]
+    if fixture["collection_ids"] and rng.random() < config.combo_ratio:
+        items.append(OrderItemCreate(
+            product_id=rng.choice(fixture["collection_ids"]), quantity=1, is_collection=True
+        ))
+    rng.shuffle(items)  # random lock order is what real carts look like
+    return OrderCreate(
+        items=items,
+        full_name="Contention Test",
+        phone_number="0900000000",
+        shipping_address="1 Contention Street, District 1",
+        payment_method=PaymentMethod.COD,
+    )
+
+
+def _server_deadlocks(engine: Engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+        )).scalar() or 0
+
+
+def run_contention(engine: Engine, config: ContentionConfig) -> ContentionResult:
+    """Run the benchmark and verify the stock invariant"""
+    session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    fixture = prepare_fixture(session_factory, config)
+    recorder = LockWaitRecorder(engine)
+    result = ContentionResult()
+    counter_lock = threading.Lock()
+    remaining = [config.checkouts]
+
+    if config.lock_timeout_ms:
+        @event.listens_for(engine, "connect")
+        def _set_lock_timeout(dbapi_connection, connection_record):
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"SET lock_timeout = {int(config.lock_timeout_ms)}")
+
+    original_notify = OrderService._send_order_created_notification
+    if not config.notifications:
+        # Notifications run after the commit, outside the locked section;
+        # skipping them keeps SMTP/chat latency out of the lock measurements
+        OrderService._send_order_created_notification = staticmethod(lambda *args, **kwargs: None)
+
+    def worker(index: int) -> None:
+        rng = random.Random(config.seed * 1000 + index)
+        user_id = fixture["user_ids"][index]
+        db = session_factory()
+        try:
+            while True:
+                with counter_lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                order_data = _build_order(rng, fixture, config)
+                for attempt in range(config.retries + 1):
+                    started = time.perf_counter()
+                    outcome = None
+                    try:
+                        order = OrderService.create_order(db, user_id, order_data)
+                        outcome = ("ok", order.id)
+                    except (BadRequestException, NotFoundException) as exc:
+                        code = _sqlstate(exc)
+                        if code == DEADLOCK_DETECTED:
+                            outcome = ("deadlock", None)
+                        elif code == LOCK_NOT_AVAILABLE:
+                            outcome = ("lock_timeout", None)
+                        elif code == SERIALIZATION_FAILURE:
+                            outcome = ("serialization", None)
+                        elif "Insufficient stock" in str(exc.detail):
+                            outcome = ("stock", None)
+                        else:
+                            outcome = ("error", str(exc.detail)[:80])
+                    except Exception as exc:
+                        db.rollback()
+                        outcome = ("error", type(exc).__name__)
+                    latency_ms = (time.perf_counter() - started) * 1000
+
+                    with counter_lock:
+                        result.attempts += 1
+                        kind, value = outcome
+                        if kind == "ok":
+                            result.succeeded += 1
+                            result.order_ids.append(value)
+                            result.latencies_ms.append(latency_ms)
+                        elif kind == "stock":
+                            result.rejected_stock += 1
+                        elif kind == "error":
+                            result.errors[value] = result.errors.get(value, 0) + 1
+                        else:
+                            if kind == "deadlock":
+                                result.deadlocks += 1
+                            elif kind == "lock_timeout":
+                                result.lock_timeouts += 1
+                            else:
+                                result.serialization_failures += 1
+                            if attempt < config.retries:
+                                result.retries += 1
+                            else:
+                                result.gave_up += 1
+                    if outcome[0] not in ("deadlock", "lock_timeout", "serialization"):
+                        break
+                    time.sleep(rng.uniform(0, 0.01 * (2 ** attempt)))  # jittered backoff
+        finally:
+            db.close()
+
+    if config.flash_sale:
+        settings.FLASH_SALE_ENABLED = True
+        with session_factory() as db:
+            for product_id in fixture["product_ids"]:
+                if FlashSaleService.flash_product_ids([product_id]):
+                    FlashSaleService.stop(db, product_id)
+                FlashSaleService.start(db, product_id)
+
+    deadlocks_before = _server_deadlocks(engine)
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=config.workers) as pool:
+            list(pool.map(worker, range(config.workers)))
+    finally:
+        OrderService._send_order_created_notification = original_notify
+    result.elapsed_s = time.perf_counter() - started
+
+    if config.flash_sale:
+        # Ending the sale writes the Redis counters back to products.stock
+        with session_factory() as db:
+            FlashSaleService.flush(db)
+            for product_id in fixture["product_ids"]:
+                result.flash_drift += abs(FlashSaleService.stop(db, product_id)["drift"])
+        result.consistent = result.flash_drift == 0
+    result.server_deadlocks = _server_deadlocks(engine) - deadlocks_before
+    result.lock_waits_ms = recorder.waits_ms
+
+    verify_stock(session_factory, fixture, config, result)
+    return result
+
+
+def verify_stock(session_factory, fixture: dict, config: ContentionConfig, result: ContentionResult) -> None:
+    """final == initial - sold for every hot SKU, and nothing below zero"""
+    db = session_factory()
+    try:
+        sold = dict(
+            db.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .filter(OrderItem.order_id.in_(result.order_ids or [-1]))
+            .group_by(OrderItem.product_id)
+            .all()
+        )
+        for product in db.query(Product).filter(Product.id.in_(fixture["product_ids"])).order_by(Product.id):
+            units_sold = int(sold.get(product.id, 0))
+            expected = config.stock - units_sold
+            ok = product.stock == expected and product.stock >= 0
+            result.stock_check[product.sku] = {
+                "initial": config.stock, "sold": units_sold, "final": product.stock, "ok": ok,
+            }
+            result.oversold = result.oversold or product.stock < 0
+            result.consistent = result.consistent and ok
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent checkout contention benchmark")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--workers", type=int, default=16, help="concurrent checkout threads")
+    parser.add_argument("--checkouts", type=int, default=1000, help="total checkout requests")
+    parser.add_argument("--hot-skus", type=int, default=4)
+    parser.add_argument("--combos", type=int, default=2)
+    parser.add_argument("--stock", type=int, default=1000, help="initial stock per hot SKU")
+    parser.add_argument("--max-quantity", type=int, default=2)
+    parser.add_argument("--combo-ratio", type=float, default=0.3, help="share of orders that include a combo")
+    parser.add_argument("--retries", type=int, default=3, help="retries on deadlock / lock timeout")
+    parser.add_argument("--lock-timeout-ms", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--with-notifications", action="store_true",
+                        help="keep the post-commit email/chat notifications")
+    parser.add_argument("--flash-sale", action="store_true",
+                        help="put the hot SKUs on flash sale (Redis counters, needs REDIS_URL)")
+    parser.add_argument("--json", help="write the summary as JSON to this path")
+    args = parser.parse_args(argv)
+
+    config = ContentionConfig(
+        workers=args.workers, checkouts=args.checkouts, hot_skus=args.hot_skus, combos=args.combos,
+        stock=args.stock, max_quantity=args.max_quantity, combo_ratio=args.combo_ratio,
+        retries=args.retries, seed=args.seed, lock_timeout_ms=args.lock_timeout_ms,
+        notifications=args.with_notifications, flash_sale=args.flash_sale,
+    )
+    engine = create_engine(args.database_url, pool_size=config.workers, max_overflow=4)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The contention benchmark requires PostgreSQL (row locks)")
+
+    summary = run_contention(engine, config).summary()
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2, ensure_ascii=False)
+    if summary["oversold"] or not summary["consistent"]:
+        print("STOCK INVARIANT VIOLATED", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Compare a pytest-benchmark JSON report against a stored baseline.
+
+    python -m pytest benchmarks --no-cov --benchmark-json=bench.json
+    python benchmarks/compare.py bench.json benchmarks/baseline.json --tolerance 0.15 \
+        --tolerance-for "test_dashboard_stats=0.3"
+
+Exits with status 1 when any benchmark is slower than its baseline by more
+than the allowed tolerance, so it can gate a deploy pipeline.
+Use ``--update`` to overwrite the baseline with the current results.
+"""
+import argparse
+import fnmatch
+import json
+import shutil
+import sys
+from typing import Dict, List, Tuple
+
+STATS = ("min", "median", "mean", "max")
+
+
+def load_stats(path: str, stat: str) -> Dict[str, float]:
+    with open(path, encoding="utf-8") as fh:
+        report = json.load(fh)
+    return {bench["fullname"]: bench["stats"][stat] for bench in report["benchmarks"]}
+
+
+def parse_overrides(values: List[str]) -> List[Tuple[str, float]]:
+    """``name-glob=0.3`` pairs; the first matching glob wins"""
+    overrides = []
+    for value in values:
+        pattern, tolerance = value.rsplit("=", 1)
+        overrides.append((pattern, float(tolerance)))
+    return overrides
+
+
+def tolerance_for(name: str, default: float, overrides: List[Tuple[str, float]]) -> float:
+    for pattern, tolerance in overrides:
+        if fnmatch.fnmatch(name, f"*{pattern}*"):
+            return tolerance
+    return default
+
+
+def compare(
+    current: Dict[str, float],
+    baseline: Dict[str, float],
+    default_tolerance: float,
+    overrides: List[Tuple[str, float]],
+) -> Tuple[List[str], List[str]]:
+    """Return (report lines, regression lines)"""
+    lines, regressions = [], []
+    for name in sorted(current):
+        now = current[name]
+        if name not in baseline:
+            lines.append(f"  NEW   {name}: {now * 1000:.3f} ms")
+            continue
+        before = baseline[name]
+        change = (now - before) / before if before else 0.0
+        allowed = tolerance_for(name, default_tolerance, overrides)
+        status = "FAIL" if change > allowed else "ok"
+        line = f"  {status:<5} {name}: {before * 1000:.3f} -> {now * 1000:.3f} ms ({change:+.1%}, allowed +{allowed:.0%})"
+        lines.append(line)
+        if status == "FAIL":
+            regressions.append(line)
+    for name in sorted(set(baseline) - set(current)):
+        lines.append(f"  GONE  {name}")
+    return lines, regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Gate benchmark results against a baseline")
+    parser.add_argument("current", help="pytest-benchmark JSON of this run")
+    parser.add_argument("baseline", help="baseline pytest-benchmark JSON")
+    parser.add_argument("--stat", choices=STATS, default="median")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown (0.15 = +15%%)")
+    parser.add_argument("--tolerance-for", action="append", default=[], metavar="NAME=TOL",
+                        help="per-benchmark tolerance (substring/glob of the test name)")
+    parser.add_argument("--update", action="store_true", help="replace the baseline with the current results")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        shutil.copyfile(args.current, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    lines, regressions = compare(
+        load_stats(args.current, args.stat),
+        load_stats(args.baseline, args.stat),
+        args.tolerance,
+        parse_overrides(args.tolerance_for),
+    )
+    print(f"Benchmark {args.stat} vs baseline:")
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above tolerance")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Service-level micro-benchmarks
+
+Pure functions always run; DB-bound ones need BENCH_DATABASE_URL
+(see conftest.py). Every DB benchmark expires the session first so
+each round pays for its queries instead of hitting the identity map.
+"""
+import pytest
+
+from app.schemas.order import OrderItemCreate
+from app.services.cart_service import CartService
+from app.services.chatbot_service import ChatbotService
+from app.services.coupon_service import validate_and_apply_coupon
+from app.services.dashboard_service import DashboardService
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.services.qr_service import generate_qr_code
+
+CHATBOT_MESSAGES = [
+    "Shop mở cửa lúc mấy giờ?",
+    "Phí vận chuyển về Đà Nẵng bao nhiêu?",
+    "Tôi muốn đổi trả sản phẩm",
+    "sofa da có bảo hành không",
+    "xin chào",
+    "một câu hỏi không khớp mẫu nào cả",
+]
+
+
+# ----- pure ---------------------------------------------------------------
+
+@pytest.mark.benchmark(group="pure")
+def test_chatbot_get_bot_response(benchmark):
+    def run():
+        for message in CHATBOT_MESSAGES:
+            ChatbotService.get_bot_response(message)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="pure")
+def test_generate_qr_code(benchmark):
+    result = benchmark(generate_qr_code, 123456, "https://luxefurniture.vn")
+    assert result.startswith("data:image/png;base64,")
+
+
+# ----- database -----------------------------------------------------------
+
+@pytest.mark.benchmark(group="orders")
+def test_expand_cart_items_from_collections(benchmark, bench_db, bench_fixture_data):
+    items = [OrderItemCreate(product_id=pid, quantity=1) for pid in bench_fixture_data["product_ids"][:4]]
+    items += [
+        OrderItemCreate(product_id=cid, quantity=1, is_collection=True)
+        for cid in bench_fixture_data["collection_ids"]
+    ]
+
+    def run():
+        bench_db.expire_all()
+        return OrderService._expand_cart_items_from_collections(bench_db, bench_fixture_data["user_id"], items)
+
+    expanded = benchmark(run)
+    assert len(expanded) > len(items) - len(bench_fixture_data["collection_ids"])
+
+
+@pytest.mark.benchmark(group="cart")
+def test_cart_summary(benchmark, bench_db, bench_fixture_data):
+    def run():
+        bench_db.expire_all()
+        return CartService.get_cart_summary(bench_db, bench_fixture_data["user_id"])
+
+    summary = benchmark(run)
+    assert summary.total_items > 0
+
+
+@pytest.mark.benchmark(group="products")
+@pytest.mark.parametrize("case", ["first-page", "deep-page", "search", "search-price", "category"])
+def test_get_products(benchmark, bench_db, bench_fixture_data, case):
+    filters = {
+        "first-page": {},
+        "deep-page": {"skip": 2000},
+        "search": {"search": "sofa"},
+        "search-price": {"search": "gỗ sồi", "min_price": 1_000_000, "max_price": 20_000_000},
+        "category": {"category_id": bench_fixture_data["category_id"], "is_featured": False},
+    }[case]
+
+    def run():
+        bench_db.expire_all()
+        return ProductService.get_products(bench_db, limit=20, **filters)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="orders")
+def test_validate_and_apply_coupon(benchmark, bench_db, bench_fixture_data):
+    def run():
+        bench_db.expire_all()
+        return validate_and_apply_coupon(
+            bench_db, bench_fixture_data["coupon_code"], bench_fixture_data["user_id"], 5_000_000
+        )
+
+    result = benchmark(run)
+    assert result["valid"]
+
+
+@pytest.mark.benchmark(group="dashboard")
+def test_dashboard_stats(benchmark, bench_db, bench_fixture_data):
+    def run():
+        bench_db.expire_all()
+        return DashboardService.get_stats(bench_db)
+
+    stats = benchmark(run)
+    assert stats["total_orders"] > 0
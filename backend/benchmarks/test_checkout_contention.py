@@ -0,0 +1,17 @@
+"""
+Short contention run against the benchmark database: many threads racing
+for a small stock must never oversell. Needs BENCH_DATABASE_URL.
+"""
+from checkout_contention import ContentionConfig, run_contention
+
+
+def test_concurrent_checkout_never_oversells(bench_engine):
+    config = ContentionConfig(workers=8, checkouts=80, hot_skus=3, combos=2, stock=40, retries=5)
+
+    result = run_contention(bench_engine, config)
+
+    assert result.succeeded > 0
+    assert result.rejected_stock > 0  # stock ran out, so the lock path was exercised
+    assert not result.oversold
+    assert result.consistent, result.stock_check
+    assert not result.errors, result.errors
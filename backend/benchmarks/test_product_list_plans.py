@@ -0,0 +1,90 @@
+"""
+Query-plan checks for the product list: each spec / dimension filter must
+be able to use its expression index, and sorted pages must come off an
+index without a Sort node. Needs BENCH_DATABASE_URL. Sequential scans are
+disabled so the checks do not depend on table size or statistics, only on
+the indexes matching the queries.
+"""
+import json
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+
+from app.models.product import Product
+from app.services.facet_service import ProductFilters
+from app.services.product_service import PRODUCT_SORTS
+
+
+@pytest.fixture(scope="module")
+def plan_db(bench_engine, bench_session_factory):
+    with bench_engine.connect() as conn:
+        columns = {row[0] for row in conn.execute(text(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = 'products'"
+        ))}
+    if "effective_price" not in columns:
+        pytest.skip("Bench database predates products.effective_price (run alembic upgrade)")
+    # create_all does not add indexes to an existing table
+    for index in Product.__table__.indexes:
+        index.create(bench_engine, checkfirst=True)
+    db = bench_session_factory()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+def plan_nodes(db, filters: ProductFilters, sort: str = None) -> list:
+    """(node type, index name) of every node in the plan of a product page"""
+    stmt = select(Product.id).where(*filters.all_conditions())
+    if sort:
+        stmt = stmt.order_by(*PRODUCT_SORTS[sort]).limit(20)
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    db.rollback()
+
+    nodes = []
+
+    def walk(node):
+        nodes.append((node["Node Type"], node.get("Index Name")))
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk((plan if isinstance(plan, list) else json.loads(plan))[0]["Plan"])
+    return nodes
+
+
+def plan_indexes(db, filters: ProductFilters) -> set:
+    return {index for _, index in plan_nodes(db, filters) if index}
+
+
+@pytest.mark.parametrize("filters, index", [
+    (ProductFilters(materials=["Da thật"]), "ix_products_specs_material"),
+    (ProductFilters(colors=["Nâu", "Xám"]), "ix_products_specs_color"),
+    (ProductFilters(dimensions={"width": (None, 200)}), "ix_products_width_cm"),
+    (ProductFilters(dimensions={"length": (150, 250)}), "ix_products_length_cm"),
+    (ProductFilters(dimensions={"height": (80, None)}), "ix_products_height_cm"),
+])
+def test_filter_uses_expression_index(plan_db, filters, index):
+    assert index in plan_indexes(plan_db, filters)
+
+
+def test_dimension_filter_matches_rows(plan_db):
+    narrow = ProductFilters(dimensions={"width": (None, 60)})
+    rows = plan_db.execute(
+        select(Product.dimensions).where(*narrow.all_conditions())
+    ).scalars().all()
+    assert rows and all(float(d["width"]) * {"mm": 0.1, "m": 100.0}.get(d.get("unit", "cm"), 1.0) <= 60 for d in rows)
+
+
+@pytest.mark.parametrize("filters, sort, index", [
+    (ProductFilters(category_id=1, max_price=5_000_000), "price_asc", "ix_products_active_category_price"),
+    (ProductFilters(), "price_desc", "ix_products_active_price"),
+    (ProductFilters(), "newest", "ix_products_active_created"),
+])
+def test_sorted_page_is_read_in_index_order(plan_db, filters, sort, index):
+    nodes = plan_nodes(plan_db, filters, sort)
+    assert index in {name for _, name in nodes}
+    assert "Sort" not in {node_type for node_type, _ in nodes}
@@ -0,0 +1,8 @@
+"""
+HTTP load-test harness for the storefront API.
+
+Runs weighted user journeys (browse, product detail, add to cart / combo,
+COD checkout, admin dashboard, WebSocket chat) against a running server and
+reports throughput, p50/p95/p99 latency and error rate per endpoint.
+See ``python -m loadtest --help``.
+"""
@@ -0,0 +1,98 @@
+"""
+Command line entry point
+
+    python -m loadtest --base-url http://localhost:8000 --users 50 --duration 120
+    python -m loadtest --output results.json --baseline loadtest/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from loadtest.runner import LoadTestConfig, run_load_test
+from loadtest.scenarios import DEFAULT_WEIGHTS
+from loadtest.stats import compare_to_baseline, format_report
+
+
+def parse_weights(value: str) -> dict:
+    """``browse=50,checkout_cod=0`` -> weights merged over the defaults"""
+    weights = dict(DEFAULT_WEIGHTS)
+    for part in filter(None, value.split(",")):
+        name, weight = part.split("=", 1)
+        if name.strip() not in weights:
+            raise argparse.ArgumentTypeError(f"Unknown journey: {name}")
+        weights[name.strip()] = int(weight)
+    return weights
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest", description="Storefront load generator")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds (after warm-up)")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds to start all users")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of samples to discard")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean pause between journeys")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--weights", type=parse_weights, default=dict(DEFAULT_WEIGHTS),
+                        help="journey weights, e.g. browse=50,chat=0")
+    parser.add_argument("--account-pool", type=int, default=0, help="shopper accounts (default: one per user)")
+    parser.add_argument("--admin-email", default="admin@luxefurniture.com")
+    parser.add_argument("--admin-password", default="Admin@123456")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="baseline JSON report to compare against")
+    parser.add_argument("--latency-tolerance", type=float, default=0.2, help="allowed p95/p99 growth (0.2 = +20%%)")
+    parser.add_argument("--error-tolerance", type=float, default=0.01, help="allowed absolute error-rate growth")
+    parser.add_argument("--throughput-tolerance", type=float, default=0.2, help="allowed throughput drop")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    config = LoadTestConfig(
+        base_url=args.base_url.rstrip("/"),
+        users=args.users,
+        duration_s=args.duration,
+        ramp_up_s=args.ramp_up,
+        warmup_s=args.warmup,
+        think_time_s=args.think_time,
+        seed=args.seed,
+        weights=args.weights,
+        account_pool=args.account_pool,
+        admin_email=args.admin_email,
+        admin_password=args.admin_password,
+    )
+    report = asyncio.run(run_load_test(config))
+    report["config"] = {
+        "users": config.users,
+        "duration_s": config.duration_s,
+        "think_time_s": config.think_time_s,
+        "weights": config.weights,
+    }
+
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare_to_baseline(
+            report, baseline,
+            latency_tolerance=args.latency_tolerance,
+            error_tolerance=args.error_tolerance,
+            throughput_tolerance=args.throughput_tolerance,
+        )
+        if regressions:
+            print("\nREGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\nNo regressions vs baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
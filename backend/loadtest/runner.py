@@ -0,0 +1,126 @@
+"""
+Load Test Runner - spawns virtual users and collects the report
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import httpx
+
+from loadtest.scenarios import API_PREFIX, DEFAULT_WEIGHTS, Account, Catalog, VirtualUser
+from loadtest.stats import StatsCollector
+
+logger = logging.getLogger("loadtest")
+
+
+@dataclass
+class LoadTestConfig:
+    base_url: str = "http://localhost:8000"
+    users: int = 20
+    duration_s: float = 60.0
+    ramp_up_s: float = 10.0
+    warmup_s: float = 5.0
+    think_time_s: float = 0.5
+    timeout_s: float = 30.0
+    seed: int = 42
+    weights: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_WEIGHTS))
+    account_pool: int = 0  # 0 = one account per virtual user
+    account_prefix: str = "loadtest"
+    account_password: str = "Loadtest@123"
+    admin_email: str = "admin@luxefurniture.com"
+    admin_password: str = "Admin@123456"
+
+    @property
+    def ws_base_url(self) -> str:
+        return self.base_url.replace("https://", "wss://").replace("http://", "ws://")
+
+
+async def discover_catalog(client: httpx.AsyncClient) -> Catalog:
+    """Collect product / collection / category ids to pick from"""
+    catalog = Catalog()
+    for skip in range(0, 500, 100):
+        response = await client.get(f"{API_PREFIX}/products", params={"skip": skip, "limit": 100})
+        response.raise_for_status()
+        products = response.json()["products"]
+        catalog.product_ids.extend(p["id"] for p in products if p.get("stock", 1) > 0)
+        if len(products) < 100:
+            break
+    response = await client.get(f"{API_PREFIX}/collections", params={"is_active": True})
+    if response.status_code == 200:
+        catalog.collection_ids = [c["id"] for c in response.json()["collections"]]
+    response = await client.get(f"{API_PREFIX}/products/categories/")
+    if response.status_code == 200:
+        catalog.category_ids = [c["id"] for c in response.json()]
+    return catalog
+
+
+async def prepare_accounts(client: httpx.AsyncClient, config: LoadTestConfig) -> List[Account]:
+    """Register the shopper accounts (idempotent: existing accounts are reused)"""
+    count = config.account_pool or config.users
+    accounts = [
+        Account(f"{config.account_prefix}{i}@example.com", config.account_password)
+        for i in range(count)
+    ]
+    semaphore = asyncio.Semaphore(10)
+
+    async def register(account: Account, index: int) -> None:
+        async with semaphore:
+            await client.post(f"{API_PREFIX}/auth/register", json={
+                "email": account.email,
+                "password": account.password,
+                "full_name": f"Load Test {index}",
+            })
+
+    await asyncio.gather(*(register(account, i) for i, account in enumerate(accounts)))
+    return accounts
+
+
+async def run_load_test(config: LoadTestConfig) -> dict:
+    """Run the configured mix of journeys and return the report dict"""
+    stats = StatsCollector()
+    limits = httpx.Limits(max_connections=config.users * 2, max_keepalive_connections=config.users)
+
+    async with httpx.AsyncClient(base_url=config.base_url, timeout=config.timeout_s, limits=limits) as client:
+        catalog = await discover_catalog(client)
+        accounts = await prepare_accounts(client, config)
+        admin = Account(config.admin_email, config.admin_password)
+        logger.info(
+            "Catalog: %d products, %d collections, %d categories; %d accounts",
+            len(catalog.product_ids), len(catalog.collection_ids), len(catalog.category_ids), len(accounts),
+        )
+
+        names = [name for name, weight in config.weights.items() if weight > 0]
+        weights = [config.weights[name] for name in names]
+        started = time.monotonic()
+        deadline = started + config.warmup_s + config.duration_s
+
+        async def virtual_user(index: int) -> None:
+            rng = random.Random(config.seed + index)
+            await asyncio.sleep(config.ramp_up_s * index / max(config.users, 1))
+            user = VirtualUser(
+                client, stats, catalog, accounts[index % len(accounts)], admin, config.ws_base_url, rng
+            )
+            journeys = user.journeys()
+            while time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                try:
+                    await journeys[name]()
+                except Exception:
+                    logger.exception("Journey %s crashed", name)
+                user.stats.journey_done(name)
+                await asyncio.sleep(rng.expovariate(1 / config.think_time_s) if config.think_time_s else 0)
+
+        tasks = [asyncio.create_task(virtual_user(i)) for i in range(config.users)]
+
+        # Discard samples taken while connections and caches warm up
+        if config.warmup_s:
+            await asyncio.sleep(config.warmup_s)
+            stats.endpoints.clear()
+            stats.journeys.clear()
+        measured_from = time.monotonic()
+
+        await asyncio.gather(*tasks)
+        return stats.report(time.monotonic() - measured_from)
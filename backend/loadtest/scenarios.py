@@ -0,0 +1,215 @@
+"""
+Load Test Scenarios - weighted user journeys against the storefront API
+"""
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+from loadtest.stats import StatsCollector
+
+API_PREFIX = "/api/v1"
+
+DEFAULT_WEIGHTS: Dict[str, int] = {
+    "browse": 40,
+    "view_product": 30,
+    "add_to_cart": 12,
+    "checkout_cod": 8,
+    "admin_dashboard": 5,
+    "chat": 5,
+}
+
+
+@dataclass
+class Catalog:
+    """Ids discovered once at start-up and shared by every virtual user"""
+    product_ids: List[int] = field(default_factory=list)
+    collection_ids: List[int] = field(default_factory=list)
+    category_ids: List[int] = field(default_factory=list)
+    search_terms: List[str] = field(default_factory=lambda: ["sofa", "ban", "ghe", "tu", "giuong", "den"])
+
+
+@dataclass
+class Account:
+    email: str
+    password: str
+    token: Optional[str] = None
+
+
+class VirtualUser:
+    """One simulated shopper; runs journeys sequentially with think time"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        stats: StatsCollector,
+        catalog: Catalog,
+        account: Account,
+        admin: Account,
+        ws_base_url: str,
+        rng: random.Random,
+    ):
+        self.client = client
+        self.stats = stats
+        self.catalog = catalog
+        self.account = account
+        self.admin = admin
+        self.ws_base_url = ws_base_url
+        self.rng = rng
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        name: Optional[str] = None,
+        token: Optional[str] = None,
+        expected: Tuple[int, ...] = (200, 201),
+        **kwargs,
+    ) -> Optional[httpx.Response]:
+        """Send a request and record it under ``name`` (a path template)"""
+        label = f"{method} {name or path}"
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, API_PREFIX + path, headers=headers, **kwargs)
+        except httpx.HTTPError as exc:
+            self.stats.record(label, (time.perf_counter() - started) * 1000, False, type(exc).__name__)
+            return None
+        latency_ms = (time.perf_counter() - started) * 1000
+        ok = response.status_code in expected
+        self.stats.record(label, latency_ms, ok, None if ok else str(response.status_code))
+        return response if ok else None
+
+    async def login(self, account: Account) -> Optional[str]:
+        if account.token:
+            return account.token
+        response = await self.request(
+            "POST", "/auth/login",
+            data={"username": account.email, "password": account.password},
+        )
+        if response is not None:
+            account.token = response.json()["access_token"]
+        return account.token
+
+    # ------------------------------------------------------------------
+    # Journeys
+    # ------------------------------------------------------------------
+
+    async def browse(self) -> None:
+        params = {"skip": self.rng.randrange(0, 200, 20), "limit": 20}
+        roll = self.rng.random()
+        if roll < 0.3 and self.catalog.category_ids:
+            params["category_id"] = self.rng.choice(self.catalog.category_ids)
+        elif roll < 0.5:
+            params["search"] = self.rng.choice(self.catalog.search_terms)
+        await self.request("GET", "/products", params=params)
+        if self.rng.random() < 0.3:
+            await self.request("GET", "/products/categories/")
+        if self.rng.random() < 0.3:
+            await self.request("GET", "/collections")
+
+    async def view_product(self) -> None:
+        if not self.catalog.product_ids:
+            return
+        product_id = self.rng.choice(self.catalog.product_ids)
+        await self.request("GET", f"/products/{product_id}", name="/products/{id}")
+        if self.catalog.collection_ids and self.rng.random() < 0.2:
+            collection_id = self.rng.choice(self.catalog.collection_ids)
+            await self.request("GET", f"/collections/{collection_id}", name="/collections/{id}")
+
+    async def _add_something(self, token: str) -> None:
+        if self.catalog.collection_ids and self.rng.random() < 0.25:
+            collection_id = self.rng.choice(self.catalog.collection_ids)
+            await self.request(
+                "POST", f"/cart/collections/{collection_id}", name="/cart/collections/{id}",
+                token=token, json={"quantity": 1},
+            )
+        elif self.catalog.product_ids:
+            await self.request(
+                "POST", "/cart/add", token=token,
+                json={"product_id": self.rng.choice(self.catalog.product_ids), "quantity": 1},
+            )
+
+    async def add_to_cart(self) -> None:
+        token = await self.login(self.account)
+        if not token:
+            return
+        await self._add_something(token)
+        await self.request("GET", "/cart/summary", token=token)
+
+    async def checkout_cod(self) -> None:
+        token = await self.login(self.account)
+        if not token:
+            return
+        await self._add_something(token)
+        response = await self.request("GET", "/cart", token=token)
+        if response is None:
+            return
+        items = []
+        for item in response.json()["items"]:
+            if item.get("is_collection"):
+                items.append({"product_id": item["collection_id"], "quantity": item["quantity"], "is_collection": True})
+            else:
+                items.append({"product_id": item["product_id"], "quantity": item["quantity"]})
+        if not items:
+            return
+        await self.request(
+            "POST", "/orders", token=token,
+            json={
+                "items": items,
+                "full_name": "Load Test",
+                "phone_number": "0900000000",
+                "shipping_address": "1 Load Test Street, District 1, HCMC",
+                "payment_method": "cod",
+            },
+        )
+        await self.request("DELETE", "/cart", token=token)
+
+    async def admin_dashboard(self) -> None:
+        token = await self.login(self.admin)
+        if not token:
+            return
+        await self.request("GET", "/dashboard/stats", token=token)
+        await self.request("GET", "/dashboard/recent-orders", token=token)
+        await self.request("GET", "/dashboard/top-products", token=token)
+        await self.request("GET", "/orders", token=token, params={"limit": 20})
+
+    async def chat(self) -> None:
+        token = await self.login(self.account)
+        if not token:
+            return
+        response = await self.request("POST", "/chat/sessions", token=token)
+        if response is None:
+            return
+        session_id = response.json()["session_id"]
+        label = "WS /chat/ws/{session_id} roundtrip"
+        started = time.perf_counter()
+        try:
+            async with websockets.connect(f"{self.ws_base_url}{API_PREFIX}/chat/ws/{session_id}") as ws:
+                await asyncio.wait_for(ws.recv(), timeout=10)  # welcome message
+                started = time.perf_counter()
+                await ws.send(json.dumps({"message": "Xin chào, còn hàng không?", "sender": "user"}))
+                while True:
+                    reply = json.loads(await asyncio.wait_for(ws.recv(), timeout=10))
+                    if reply.get("sender") == "user":
+                        break
+            self.stats.record(label, (time.perf_counter() - started) * 1000, True)
+        except Exception as exc:
+            self.stats.record(label, (time.perf_counter() - started) * 1000, False, type(exc).__name__)
+
+    def journeys(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        return {
+            "browse": self.browse,
+            "view_product": self.view_product,
+            "add_to_cart": self.add_to_cart,
+            "checkout_cod": self.checkout_cod,
+            "admin_dashboard": self.admin_dashboard,
+            "chat": self.chat,
+        }
@@ -0,0 +1,131 @@
+"""
+Load Test Statistics - per-endpoint latency percentiles and baseline comparison
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class EndpointStats:
+    """Samples collected for one endpoint (e.g. ``GET /products/{id}``)"""
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    error_samples: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, latency_ms: float, ok: bool, error: Optional[str] = None) -> None:
+        self.latencies_ms.append(latency_ms)
+        if not ok:
+            self.errors += 1
+            if error:
+                self.error_samples[error] = self.error_samples.get(error, 0) + 1
+
+    def summary(self, elapsed_s: float) -> dict:
+        values = sorted(self.latencies_ms)
+        count = len(values)
+        return {
+            "requests": count,
+            "rps": round(count / elapsed_s, 2) if elapsed_s else 0.0,
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "mean_ms": round(sum(values) / count, 2) if count else 0.0,
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+            "max_ms": round(values[-1], 2) if values else 0.0,
+            "errors": dict(sorted(self.error_samples.items(), key=lambda item: -item[1])[:5]),
+        }
+
+
+class StatsCollector:
+    """Aggregates samples from all virtual users (single event loop, no locking)"""
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.journeys: Dict[str, int] = {}
+
+    def record(self, name: str, latency_ms: float, ok: bool, error: Optional[str] = None) -> None:
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats(name)
+        stats.record(latency_ms, ok, error)
+
+    def journey_done(self, name: str) -> None:
+        self.journeys[name] = self.journeys.get(name, 0) + 1
+
+    def report(self, elapsed_s: float) -> dict:
+        total = EndpointStats("TOTAL")
+        for stats in self.endpoints.values():
+            total.latencies_ms.extend(stats.latencies_ms)
+            total.errors += stats.errors
+        return {
+            "elapsed_s": round(elapsed_s, 2),
+            "journeys": dict(self.journeys),
+            "total": total.summary(elapsed_s),
+            "endpoints": {
+                name: stats.summary(elapsed_s)
+                for name, stats in sorted(self.endpoints.items())
+            },
+        }
+
+
+def compare_to_baseline(
+    current: dict,
+    baseline: dict,
+    latency_tolerance: float = 0.2,
+    error_tolerance: float = 0.01,
+    throughput_tolerance: float = 0.2,
+) -> List[str]:
+    """
+    Return human readable regressions of ``current`` against ``baseline``.
+
+    A regression is a p95/p99 latency more than ``latency_tolerance`` above
+    baseline, an error rate more than ``error_tolerance`` (absolute) above
+    baseline, or total throughput more than ``throughput_tolerance`` below it.
+    """
+    regressions: List[str] = []
+
+    for name, base in baseline.get("endpoints", {}).items():
+        cur = current.get("endpoints", {}).get(name)
+        if cur is None or not cur["requests"]:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base[key] and cur[key] > base[key] * (1 + latency_tolerance):
+                regressions.append(
+                    f"{name}: {key} {cur[key]:.1f} ms vs baseline {base[key]:.1f} ms "
+                    f"(+{(cur[key] / base[key] - 1) * 100:.0f}%)"
+                )
+        if cur["error_rate"] > base["error_rate"] + error_tolerance:
+            regressions.append(
+                f"{name}: error rate {cur['error_rate']:.2%} vs baseline {base['error_rate']:.2%}"
+            )
+
+    base_rps = baseline.get("total", {}).get("rps", 0)
+    cur_rps = current.get("total", {}).get("rps", 0)
+    if base_rps and cur_rps < base_rps * (1 - throughput_tolerance):
+        regressions.append(f"TOTAL: throughput {cur_rps:.1f} rps vs baseline {base_rps:.1f} rps")
+
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    """Render a report as a fixed-width table"""
+    header = f"{'endpoint':<40} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+    lines = [header, "-" * len(header)]
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        lines.append(
+            f"{name[:40]:<40} {row['requests']:>7} {row['rps']:>8.1f} {row['error_rate'] * 100:>6.2f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    lines.append("")
+    lines.append("journeys: " + ", ".join(f"{k}={v}" for k, v in sorted(report["journeys"].items())))
+    return "\n".join(lines)
@@ -0,0 +1,495 @@
+"""
+Bulk data generator for benchmarking LuxeFurniture.
+
+Creates a realistic, deterministic data set sized by a scale factor:
+
+    scale 1.0 ->  100k users, 100k products, 2k collections,
+                  1M orders, ~5M order items, ~2M notifications,
+                  50k chat sessions with ~500k messages
+
+Rows are written with PostgreSQL COPY (default) or batched
+``insert().values`` statements, never through the ORM one by one.
+
+Usage:
+    python scripts/generate_bench_data.py --scale 0.1 --seed 42
+    python scripts/generate_bench_data.py --scale 1 --method insert --truncate
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import Table, create_engine, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.models.product import Category, Product
+from app.models.collection import Collection, CollectionItem
+from app.models.order import Order, OrderItem, OrderStatus, PaymentMethod
+from app.models.chat import ChatSession, ChatMessage, ChatStatus, MessageSender
+from app.models.notification import Notification
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# SIZING - row counts at scale 1.0
+# =============================================================================
+BASE_COUNTS = {
+    "users": 100_000,
+    "products": 100_000,
+    "collections": 2_000,
+    "orders": 1_000_000,
+    "chat_sessions": 50_000,
+}
+ITEMS_PER_ORDER = (1, 9)            # uniform -> ~5 items per order
+NOTIFICATIONS_PER_ORDER = 2
+MESSAGES_PER_SESSION = (2, 18)      # uniform -> ~10 messages per session
+ORDER_HISTORY_DAYS = 730
+CHUNK_SIZE = 50_000
+BENCH_PASSWORD = "Bench@123"
+
+ROOMS = ["Phòng Khách", "Phòng Ngủ", "Phòng Ăn", "Phòng Làm Việc", "Ngoại Thất", "Trang Trí", "Phòng Tắm", "Trẻ Em"]
+KINDS = ["Sofa", "Bàn", "Ghế", "Tủ", "Kệ", "Giường", "Đèn", "Thảm"]
+MATERIALS = ["Gỗ sồi", "Gỗ óc chó", "Da thật", "Vải nỉ", "Kim loại", "Mây tre", "Đá marble"]
+COLORS = ["Trắng", "Đen", "Xám", "Be", "Nâu", "Xanh rêu", "Vàng đồng"]
+STYLES = ["Hiện đại", "Bắc Âu", "Cổ điển", "Công nghiệp", "Tối giản"]
+CITIES = ["Hà Nội", "TP. Hồ Chí Minh", "Đà Nẵng", "Hải Phòng", "Cần Thơ", "Nha Trang"]
+CHAT_LINES = [
+    "Xin chào, sản phẩm này còn hàng không?",
+    "Bao lâu thì giao hàng đến nội thành?",
+    "Shop có hỗ trợ lắp đặt không ạ?",
+    "Cho mình hỏi kích thước chính xác với.",
+    "Đơn hàng của mình đang ở đâu rồi?",
+    "Cảm ơn shop!",
+]
+
+# Status mix for orders older than a week / placed within the last week
+HISTORIC_STATUSES = [(OrderStatus.COMPLETED, 82), (OrderStatus.CANCELLED, 12), (OrderStatus.REFUNDED, 6)]
+RECENT_STATUSES = [
+    (OrderStatus.PENDING, 25), (OrderStatus.AWAITING_PAYMENT, 10), (OrderStatus.CONFIRMED, 20),
+    (OrderStatus.PROCESSING, 15), (OrderStatus.SHIPPING, 15), (OrderStatus.COMPLETED, 10),
+    (OrderStatus.CANCELLED, 5),
+]
+PAYMENT_METHODS = [(PaymentMethod.COD, 50), (PaymentMethod.BANK_TRANSFER, 15), (PaymentMethod.MOMO, 20), (PaymentMethod.VNPAY, 15)]
+
+
+def _weighted(rng: random.Random, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights)[0]
+
+
+# =============================================================================
+# WRITERS
+# =============================================================================
+def _copy_value(value, is_array: bool) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if is_array:
+        return "{" + ",".join(str(v) for v in value) + "}"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value)
+
+
+def copy_rows(conn: Connection, table: Table, rows: List[dict]) -> None:
+    """Stream rows into ``table`` with PostgreSQL COPY ... FROM STDIN (CSV)"""
+    columns = list(rows[0])
+    arrays = [isinstance(table.c[col].type, ARRAY) for col in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[col], arr) for col, arr in zip(columns, arrays)])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(conn: Connection, table: Table, rows: List[dict], batch_size: int = 1_000) -> None:
+    """Write rows as multi-row ``INSERT ... VALUES (...), (...)`` statements"""
+    for start in range(0, len(rows), batch_size):
+        conn.execute(table.insert().values(rows[start:start + batch_size]))
+
+
+class BulkLoader:
+    """Buffers generated rows per table and flushes them in chunks"""
+
+    def __init__(self, engine: Engine, method: str, chunk_size: int = CHUNK_SIZE):
+        self.engine = engine
+        self.write = copy_rows if method == "copy" else insert_rows
+        self.chunk_size = chunk_size
+        self.counts: Dict[str, int] = {}
+
+    def load(self, table: Table, rows: Iterable[dict]) -> None:
+        self.load_many({table.name: table}, ((table.name, row) for row in rows))
+
+    def load_many(self, tables: Dict[str, Table], rows: Iterable[tuple]) -> None:
+        """
+        Route an interleaved ``(table_name, row)`` stream to chunked per-table
+        writes. ``tables`` must list parents before children: all buffers are
+        flushed together in that order so foreign keys are always satisfied.
+        """
+        started = time.perf_counter()
+        buffers: Dict[str, List[dict]] = {name: [] for name in tables}
+        with self.engine.begin() as conn:
+            for name, row in rows:
+                buffers[name].append(row)
+                if len(buffers[name]) >= self.chunk_size:
+                    self._flush(conn, tables, buffers)
+            self._flush(conn, tables, buffers)
+        elapsed = time.perf_counter() - started
+        for name in tables:
+            total = self.counts.get(name, 0)
+            logger.info("%-16s %10d rows in %6.1fs (%d rows/s)", name, total, elapsed, total / elapsed if elapsed else 0)
+
+    def _flush(self, conn: Connection, tables: Dict[str, Table], buffers: Dict[str, List[dict]]) -> None:
+        for name, table in tables.items():
+            rows = buffers[name]
+            if rows:
+                self.write(conn, table, rows)
+                self.counts[name] = self.counts.get(name, 0) + len(rows)
+                buffers[name] = []
+
+
+# =============================================================================
+# GENERATOR
+# =============================================================================
+class BenchDataGenerator:
+    """Deterministic row generators; ids continue after existing rows"""
+
+    def __init__(self, engine: Engine, scale: float, seed: int, now: Optional[datetime] = None):
+        self.engine = engine
+        self.scale = scale
+        self.seed = seed
+        self.now = now or datetime.utcnow().replace(microsecond=0)
+        self.counts = {name: max(1, int(count * scale)) for name, count in BASE_COUNTS.items()}
+        self.start_ids: Dict[str, int] = {}
+        self.password_hash = get_password_hash(BENCH_PASSWORD)
+
+        # Filled while generating, reused by dependent tables
+        self.user_ids: List[int] = []
+        self.category_ids: List[int] = []
+        self.product_ids: List[int] = []
+        self.product_prices: List[float] = []
+        self.product_names: List[str] = []
+        self.product_cum_weights: List[float] = []
+        self.popularity_rank: List[int] = []
+
+    def rng(self, table: str) -> random.Random:
+        """Independent stream per table so sizes of one table don't shift another"""
+        return random.Random(f"{self.seed}:{table}")
+
+    def _start_id(self, conn: Connection, table: Table) -> int:
+        return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {table.name}")).scalar() + 1
+
+    def prepare(self) -> None:
+        with self.engine.connect() as conn:
+            for model in (User, Category, Collection, CollectionItem, Product, Order, OrderItem,
+                          ChatSession, ChatMessage, Notification):
+                self.start_ids[model.__tablename__] = self._start_id(conn, model.__table__)
+
+    # ----- catalog ------------------------------------------------------------
+    def users(self) -> Iterator[dict]:
+        rng = self.rng("users")
+        first = self.start_ids["users"]
+        for user_id in range(first, first + self.counts["users"]):
+            created = self.now - timedelta(days=rng.uniform(0, ORDER_HISTORY_DAYS + 180))
+            points = int(rng.paretovariate(1.5) * 200) - 200
+            self.user_ids.append(user_id)
+            yield {
+                "id": user_id,
+                "email": f"bench{user_id}@example.com",
+                "hashed_password": self.password_hash,
+                "full_name": f"Khách Hàng {user_id}",
+                "phone": f"09{user_id % 100_000_000:08d}",
+                "email_verified": True,
+                "role": "CUSTOMER",
+                "is_active": True,
+                "is_verified": True,
+                "loyalty_points": points,
+                "vip_tier": "DIAMOND" if points >= 10000 else "GOLD" if points >= 5000 else "SILVER" if points >= 1000 else "MEMBER",
+                "created_at": created,
+                "updated_at": created,
+            }
+
+    def categories(self) -> Iterator[dict]:
+        next_id = self.start_ids["categories"]
+        for room in ROOMS:
+            parent_id = next_id
+            next_id += 1
+            yield {"id": parent_id, "name": f"{room} #{parent_id}", "slug": f"bench-cat-{parent_id}",
+                   "parent_id": None}
+            for kind in KINDS:
+                self.category_ids.append(next_id)
+                yield {"id": next_id, "name": f"{kind} {room} #{next_id}", "slug": f"bench-cat-{next_id}",
+                       "parent_id": parent_id}
+                next_id += 1
+
+    def products(self) -> Iterator[dict]:
+        rng = self.rng("products")
+        first = self.start_ids["products"]
+        for product_id in range(first, first + self.counts["products"]):
+            kind, material, color = rng.choice(KINDS), rng.choice(MATERIALS), rng.choice(COLORS)
+            price = round(rng.lognormvariate(15.5, 0.8), -4) or 100_000.0
+            sale_price = round(price * rng.uniform(0.7, 0.95), -4) if rng.random() < 0.3 else None
+            created = self.now - timedelta(days=rng.uniform(0, ORDER_HISTORY_DAYS + 365))
+            name = f"{kind} {material} {color} {product_id}"
+            self.product_ids.append(product_id)
+            self.product_prices.append(sale_price or price)
+            self.product_names.append(name)
+            yield {
+                "id": product_id,
+                "name": name,
+                "sku": f"BENCH-{product_id:08d}",
+                "slug": f"bench-product-{product_id}",
+                "price": price,
+                "sale_price": sale_price,
+                "stock": 0 if rng.random() < 0.05 else rng.randint(1, 500),
+                "is_active": rng.random() < 0.97,
+                "is_featured": rng.random() < 0.02,
+                "short_description": f"{kind} chất liệu {material.lower()}, màu {color.lower()}",
+                "description": f"<p>{kind} phong cách {rng.choice(STYLES).lower()} làm từ {material.lower()}.</p>",
+                "thumbnail_url": f"/static/images/bench/{product_id % 500}.jpg",
+                "images": [],
+                "dimensions": {"length": rng.randint(40, 260), "width": rng.randint(30, 200),
+                               "height": rng.randint(30, 220), "unit": "cm"},
+                "specs": {"material": material, "color": color, "style": rng.choice(STYLES)},
+                "weight": round(rng.uniform(2, 150), 1),
+                "category_id": rng.choice(self.category_ids),
+                "collection_id": None,
+                "created_at": created,
+                "updated_at": created,
+            }
+        # Zipf-like popularity so a few SKUs dominate orders (realistic hot rows);
+        # ranks are shuffled so popular products are spread over the id range
+        self.product_cum_weights = list(accumulate(1 / (rank ** 1.1) for rank in range(1, len(self.product_ids) + 1)))
+        self.popularity_rank = list(range(len(self.product_ids)))
+        random.Random(f"{self.seed}:popularity").shuffle(self.popularity_rank)
+
+    def _pick_product(self, rng: random.Random) -> int:
+        """Index into product_ids drawn from the popularity distribution"""
+        r = rng.random() * self.product_cum_weights[-1]
+        return self.popularity_rank[bisect_left(self.product_cum_weights, r)]
+
+    def collections(self) -> Iterator[dict]:
+        first = self.start_ids["collections"]
+        for collection_id in range(first, first + self.counts["collections"]):
+            yield {
+                "id": collection_id,
+                "name": f"Bộ sưu tập {collection_id}",
+                "slug": f"bench-collection-{collection_id}",
+                "description": "Combo nội thất phối sẵn",
+                "is_active": True,
+                "sale_price": None,
+            }
+
+    def collection_items(self) -> Iterator[dict]:
+        rng = self.rng("collection_items")
+        item_id = self.start_ids["collection_items"]
+        first = self.start_ids["collections"]
+        for collection_id in range(first, first + self.counts["collections"]):
+            for _ in range(rng.randint(3, 6)):
+                yield {"id": item_id, "collection_id": collection_id,
+                       "product_id": self.product_ids[rng.randrange(len(self.product_ids))],
+                       "quantity": rng.randint(1, 4)}
+                item_id += 1
+
+    # ----- orders -------------------------------------------------------------
+    def orders_with_items(self) -> Iterator[tuple]:
+        """Yields ("orders" | "order_items" | "notifications", row)"""
+        rng = self.rng("orders")
+        order_id = self.start_ids["orders"]
+        item_id = self.start_ids["order_items"]
+        notification_id = self.start_ids["notifications"]
+        for _ in range(self.counts["orders"]):
+            age_days = rng.uniform(0, ORDER_HISTORY_DAYS)
+            created = self.now - timedelta(days=age_days)
+            status = _weighted(rng, RECENT_STATUSES if age_days < 7 else HISTORIC_STATUSES)
+            payment_method = _weighted(rng, PAYMENT_METHODS)
+            user_id = rng.choice(self.user_ids)
+
+            subtotal = 0.0
+            items = []
+            for _ in range(rng.randint(*ITEMS_PER_ORDER)):
+                idx = self._pick_product(rng)
+                quantity = 1 if rng.random() < 0.8 else rng.randint(2, 4)
+                price = self.product_prices[idx]
+                subtotal += price * quantity
+                items.append({
+                    "id": item_id, "order_id": order_id, "product_id": self.product_ids[idx],
+                    "product_name": self.product_names[idx], "quantity": quantity,
+                    "price_at_purchase": price, "variant": None,
+                    "created_at": created, "updated_at": created,
+                })
+                item_id += 1
+
+            shipping_fee = 50000.0
+            discount = round(subtotal * rng.choice([0, 0, 0, 0.02, 0.05]), -3)
+            total = subtotal + shipping_fee - discount
+            is_paid = status == OrderStatus.COMPLETED or (
+                payment_method != PaymentMethod.COD and status not in (OrderStatus.PENDING, OrderStatus.AWAITING_PAYMENT)
+            )
+            yield "orders", {
+                "id": order_id, "user_id": user_id,
+                "subtotal": subtotal, "shipping_fee": shipping_fee, "discount_amount": discount,
+                "total_amount": total, "deposit_amount": 0.0,
+                "remaining_amount": 0.0 if is_paid else total,
+                "payment_method": payment_method.value, "is_paid": is_paid,
+                "full_name": f"Khách Hàng {user_id}", "phone_number": f"09{user_id % 100_000_000:08d}",
+                "shipping_address": f"{rng.randint(1, 999)} Đường số {rng.randint(1, 60)}, {rng.choice(CITIES)}",
+                "note": None, "status": status.value,
+                "cancellation_reason": "Khách đổi ý" if status == OrderStatus.CANCELLED else None,
+                "created_at": created, "updated_at": created + timedelta(hours=rng.uniform(0, 72)),
+            }
+            for item in items:
+                yield "order_items", item
+
+            for n in range(NOTIFICATIONS_PER_ORDER):
+                event_type = "ORDER_CREATED" if n == 0 else f"ORDER_{status.value.upper()}"
+                yield "notifications", {
+                    "id": notification_id, "user_id": user_id, "event_type": event_type,
+                    "title": f"Đơn hàng #{order_id}", "message": f"Đơn hàng #{order_id}: {event_type}",
+                    "data": {"order_id": order_id}, "read": age_days > 3,
+                    "created_at": created + timedelta(hours=n), "updated_at": created + timedelta(hours=n),
+                }
+                notification_id += 1
+            order_id += 1
+
+    # ----- chat ---------------------------------------------------------------
+    def chat(self) -> Iterator[tuple]:
+        rng = self.rng("chat")
+        session_pk = self.start_ids["chat_sessions"]
+        message_id = self.start_ids["chat_messages"]
+        for _ in range(self.counts["chat_sessions"]):
+            user_id = rng.choice(self.user_ids)
+            created = self.now - timedelta(days=rng.uniform(0, ORDER_HISTORY_DAYS))
+            status = ChatStatus.CLOSED if rng.random() < 0.8 else rng.choice([ChatStatus.ACTIVE, ChatStatus.WAITING])
+            yield "chat_sessions", {
+                "id": session_pk, "user_id": user_id,
+                # Low 32 bits carry the row id so re-runs with the same seed never collide
+                "session_id": str(uuid.UUID(int=(rng.getrandbits(96) << 32) | session_pk)),
+                "status": status.name, "admin_id": None,
+                "created_at": created, "updated_at": created,
+            }
+            at = created
+            for n in range(rng.randint(*MESSAGES_PER_SESSION)):
+                at += timedelta(seconds=rng.randint(5, 600))
+                sender = MessageSender.USER if n % 2 == 0 else rng.choice([MessageSender.ADMIN, MessageSender.SYSTEM])
+                yield "chat_messages", {
+                    "id": message_id, "session_id": session_pk, "sender": sender.name,
+                    "sender_id": user_id if sender == MessageSender.USER else None,
+                    "message": rng.choice(CHAT_LINES), "is_read": True,
+                    "created_at": at, "updated_at": at,
+                }
+                message_id += 1
+            session_pk += 1
+
+
+GENERATED_TABLES = [
+    "notifications", "chat_messages", "chat_sessions", "order_items", "orders",
+    "collection_items", "collections", "products", "categories", "users",
+]
+
+
+def reset_sequences(engine: Engine) -> None:
+    """Move id sequences past the explicitly generated ids, then refresh planner stats"""
+    with engine.begin() as conn:
+        for table in GENERATED_TABLES:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+            ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ANALYZE {', '.join(GENERATED_TABLES)}"))
+
+
+def generate(
+    engine: Engine,
+    scale: float = 0.01,
+    seed: int = 42,
+    method: str = "copy",
+    truncate: bool = False,
+) -> Dict[str, int]:
+    """Generate the full data set and return row counts per table"""
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("The benchmark data generator requires PostgreSQL")
+    if truncate:
+        with engine.begin() as conn:
+            conn.execute(text(f"TRUNCATE {', '.join(GENERATED_TABLES)} RESTART IDENTITY CASCADE"))
+
+    generator = BenchDataGenerator(engine, scale, seed)
+    generator.prepare()
+    loader = BulkLoader(engine, method)
+
+    loader.load(User.__table__, generator.users())
+    loader.load(Category.__table__, generator.categories())
+    loader.load(Product.__table__, generator.products())
+    loader.load(Collection.__table__, generator.collections())
+    loader.load(CollectionItem.__table__, generator.collection_items())
+    loader.load_many({
+        "orders": Order.__table__, "order_items": OrderItem.__table__, "notifications": Notification.__table__,
+    }, generator.orders_with_items())
+    loader.load_many({
+        "chat_sessions": ChatSession.__table__, "chat_messages": ChatMessage.__table__,
+    }, generator.chat())
+
+    reset_sequences(engine)
+    return loader.counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a large deterministic data set for benchmarking")
+    parser.add_argument("--scale", type=float, default=0.01,
+                        help="1.0 = 100k products / 1M orders / ~5M order items (default: 0.01)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (same seed -> same data)")
+    parser.add_argument("--method", choices=["copy", "insert"], default="copy",
+                        help="COPY FROM STDIN or batched multi-row INSERT")
+    parser.add_argument("--truncate", action="store_true",
+                        help="TRUNCATE the generated tables first (destroys existing data!)")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    logger.info("=" * 70)
+    logger.info("Generating benchmark data: scale=%s seed=%s method=%s", args.scale, args.seed, args.method)
+    logger.info("=" * 70)
+    started = time.perf_counter()
+    counts = generate(engine, scale=args.scale, seed=args.seed, method=args.method, truncate=args.truncate)
+    logger.info("=" * 70)
+    logger.info("Done in %.1fs: %s", time.perf_counter() - started, ", ".join(f"{k}={v}" for k, v in counts.items()))
+    logger.info("All generated users share the password %s", BENCH_PASSWORD)
+
+
+if __name__ == "__main__":
+    main()
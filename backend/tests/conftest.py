@@ -1,17 +1,22 @@
 """
 Pytest configuration and fixtures
 """
+import os
+import uuid
+
 import pytest
 import asyncio
+import fakeredis
 from typing import Generator, AsyncGenerator
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
 from app.core.database import Base, get_db
 from app.core.config import settings
+from app.services import flash_sale_service
 
 # Test database URL (SQLite in memory)
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -25,6 +30,9 @@ engine = create_engine(
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# PostgreSQL for ``integration`` tests of PostgreSQL-only SQL (skipped when unset)
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
 
 @pytest.fixture(scope="function")
 def db_session() -> Generator:
@@ -55,6 +63,47 @@ def client(db_session) -> Generator:
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(scope="session")
+def pg_engine() -> Generator:
+    if not TEST_POSTGRES_URL:
+        pytest.skip("TEST_POSTGRES_URL is not set")
+    pg = create_engine(TEST_POSTGRES_URL)
+    yield pg
+    pg.dispose()
+
+
+@pytest.fixture
+def pg_session(pg_engine) -> Generator:
+    """
+    Session on a fresh schema inside one transaction that is rolled back at
+    the end; commits made by the code under test only release savepoints
+    """
+    with pg_engine.connect() as conn:
+        transaction = conn.begin()
+        schema = f"test_{uuid.uuid4().hex[:12]}"
+        conn.execute(text(f"CREATE SCHEMA {schema}"))
+        conn.execute(text(f"SET LOCAL search_path TO {schema}"))
+        Base.metadata.create_all(bind=conn)
+        session = Session(bind=conn, join_transaction_mode="create_savepoint", autoflush=False)
+        try:
+            yield session
+        finally:
+            session.close()
+            transaction.rollback()
+
+
+@pytest.fixture
+def flash_redis(monkeypatch) -> Generator:
+    """In-memory Redis (with Lua) behind the flash sale service"""
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(flash_sale_service, "get_redis", lambda: client)
+    monkeypatch.setattr(flash_sale_service.FlashSaleService, "_scripts", {})
+    monkeypatch.setattr(settings, "FLASH_SALE_ENABLED", True)
+    flash_sale_service.deferred_releases.take()
+    yield client
+    flash_sale_service.deferred_releases.take()
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     """Create an event loop for async tests"""
@@ -0,0 +1,54 @@
+import json
+import logging
+import queue
+
+from app.core.logging_config import (
+    DebugSamplingFilter,
+    JsonFormatter,
+    LazyQueueHandler,
+    RequestIdFilter,
+    parse_sampling_rates,
+    request_id_var,
+)
+
+
+def _record(name="app.test", level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_queue_handler_merges_args_and_stamps_request_id():
+    q = queue.Queue()
+    handler = LazyQueueHandler(q)
+    handler.addFilter(RequestIdFilter())
+
+    token = request_id_var.set("req-123")
+    try:
+        handler.handle(_record())
+    finally:
+        request_id_var.reset(token)
+
+    queued = q.get_nowait()
+    assert queued.msg == "hello world" and queued.args is None
+    assert queued.request_id == "req-123"
+
+
+def test_json_formatter_includes_extra_fields():
+    record = _record()
+    record.request_id = "abc"
+    record.order_id = 7
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "hello world"
+    assert payload["request_id"] == "abc"
+    assert payload["order_id"] == 7
+    assert payload["level"] == "INFO" and payload["logger"] == "app.test"
+
+
+def test_debug_sampling_uses_longest_prefix():
+    rates = parse_sampling_rates("app.services=1.0, app.services.order_service=0")
+    sampler = DebugSamplingFilter(rates)
+
+    assert not sampler.filter(_record("app.services.order_service", logging.DEBUG))
+    assert sampler.filter(_record("app.services.cart_service", logging.DEBUG))
+    # Only DEBUG records are sampled
+    assert sampler.filter(_record("app.services.order_service", logging.WARNING))
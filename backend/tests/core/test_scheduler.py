@@ -0,0 +1,92 @@
+import threading
+from datetime import datetime
+
+import pytest
+
+from app.core.scheduler import CronSchedule, Scheduler
+
+
+class FakeLeaderLock:
+    def __init__(self, leader: bool):
+        self.leader = leader
+        self.released = False
+
+    def refresh(self) -> bool:
+        return self.leader
+
+    def release(self) -> None:
+        self.released = True
+
+
+def test_cron_next_after():
+    every_15 = CronSchedule("*/15 * * * *")
+    assert every_15.next_after(datetime(2025, 1, 1, 10, 7, 30)) == datetime(2025, 1, 1, 10, 15)
+    assert every_15.next_after(datetime(2025, 1, 1, 23, 45)) == datetime(2025, 1, 2, 0, 0)
+
+    nightly = CronSchedule("30 3 * * *")
+    assert nightly.next_after(datetime(2025, 1, 31, 4, 0)) == datetime(2025, 2, 1, 3, 30)
+
+    # Mondays at 08:00 (2025-01-01 is a Wednesday); 7 means Sunday too
+    assert CronSchedule("0 8 * * 1").next_after(datetime(2025, 1, 1)) == datetime(2025, 1, 6, 8, 0)
+    assert CronSchedule("0 0 * * 7").next_after(datetime(2025, 1, 1)) == datetime(2025, 1, 5, 0, 0)
+
+    # Both day fields restricted: either matches (1st of month or a Friday)
+    assert CronSchedule("0 0 1 * 5").next_after(datetime(2025, 1, 1, 12)) == datetime(2025, 1, 3, 0, 0)
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* * * 13 *", "5-1 * * * *", "0 0 30 2 *"])
+def test_cron_rejects_invalid(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(datetime(2025, 1, 1))
+
+
+def test_leader_runs_due_jobs_and_records_history():
+    done = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        done.set()
+        return {"expired": 3}
+
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(leader_lock=FakeLeaderLock(True))
+    scheduler.add_job("sweep", job, interval=60)
+    scheduler.add_job("broken", broken, interval=60)
+
+    now = scheduler.get_job("broken").next_run  # registered last, so due last
+    wait = scheduler.run_pending(now=now)
+    assert done.wait(1) and 0 < wait <= 60
+    scheduler.stop()
+
+    status = scheduler.status()
+    assert status["leader"] is False  # stop() gives up leadership
+    sweep, failing = status["jobs"]
+    assert sweep["runs"] == 1 and sweep["history"][0]["result"] == {"expired": 3}
+    assert failing["failures"] == 1 and failing["last_error"] == "RuntimeError: boom"
+    assert scheduler.leader_lock.released
+
+
+def test_follower_skips_leader_only_jobs():
+    calls = []
+    scheduler = Scheduler(leader_lock=FakeLeaderLock(False))
+    scheduler.add_job("leader-job", lambda: calls.append("leader"), interval=10)
+    scheduler.add_job("local-job", lambda: calls.append("local"), interval=10, leader_only=False)
+
+    scheduler.run_pending(now=scheduler.get_job("leader-job").next_run + 1)
+    scheduler._pool().shutdown(wait=True)
+    assert calls == ["local"]
+
+
+def test_overlapping_run_is_skipped():
+    release = threading.Event()
+    scheduler = Scheduler(leader_lock=None)
+    job = scheduler.add_job("slow", lambda: release.wait(1), interval=1)
+
+    scheduler.run_pending(now=job.next_run)
+    scheduler.run_pending(now=job.next_run)
+    release.set()
+    scheduler._pool().shutdown(wait=True)
+    assert job.runs == 1 and job.skipped == 1
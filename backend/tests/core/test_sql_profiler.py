@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.profiling import (
+    QueryFingerprintRegistry,
+    RequestQueryStats,
+    fingerprint_statement,
+    install_query_profiler,
+    query_registry,
+)
+
+
+def test_fingerprint_collapses_literals():
+    a = fingerprint_statement("SELECT * FROM products WHERE id = 1 AND name = 'Sofa'")
+    b = fingerprint_statement("SELECT *  FROM products\n WHERE id = 42 AND name = 'Bàn ''ăn'''")
+    assert a == b == "SELECT * FROM products WHERE id = ? AND name = ?"
+
+
+def test_fingerprint_collapses_in_lists_and_bind_params():
+    fp = fingerprint_statement(
+        "SELECT id FROM products WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) LIMIT %(param_1)s"
+    )
+    assert fp == "SELECT id FROM products WHERE id IN (...) LIMIT ?"
+    assert "::text" in fingerprint_statement("SELECT name::text FROM categories")
+
+
+def test_registry_orders_by_total_time_and_caps_entries():
+    registry = QueryFingerprintRegistry(max_entries=2)
+    registry.record("SELECT a", 5.0)
+    registry.record("SELECT a", 5.0)
+    registry.record("SELECT b", 8.0)
+    registry.record("SELECT c", 1.0)
+
+    top = registry.top(limit=10)
+    assert [row["fingerprint"] for row in top] == ["SELECT a", "SELECT b"]
+    assert top[0]["count"] == 2 and top[0]["mean_ms"] == 5.0
+    assert registry.top(sort="max")[0]["fingerprint"] == "SELECT b"
+    assert registry.dropped == 1
+
+
+def test_engine_hooks_feed_registry():
+    engine = create_engine("sqlite:///:memory:")
+    install_query_profiler(engine)
+    install_query_profiler(engine)  # idempotent
+    query_registry.reset()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    top = query_registry.top()[0]
+    assert top["fingerprint"] == "SELECT ?" and top["count"] == 2
+
+
+def test_failed_statement_does_not_leak_start_time():
+    engine = create_engine("sqlite:///:memory:")
+    install_query_profiler(engine)
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.info["query_start_time"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.info["query_start_time"] == []
+
+
+def test_server_timing_header_value():
+    stats = RequestQueryStats(path="/api/v1/products")
+    stats.record("SELECT ?", 3.0)
+    stats.record("SELECT ? FROM t", 7.5)
+    assert stats.slowest_statement == "SELECT ? FROM t"
+    assert stats.server_timing(20.0) == 'db;dur=10.50;desc="2 queries", db-slowest;dur=7.50, app;dur=20.00'
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from app.core import tracing
+from app.core.tracing import (
+    BatchSpanProcessor,
+    JsonlFileExporter,
+    parse_traceparent,
+    start_span,
+    traced_class,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = ListExporter()
+    processor = BatchSpanProcessor(exporter, schedule_delay=0.05)
+    monkeypatch.setattr(tracing, "_processor", processor)
+    yield exporter
+    processor.shutdown()
+
+
+def test_child_spans_share_trace_and_link_parent(exporter):
+    @traced_class
+    class Service:
+        @staticmethod
+        def work():
+            with start_span("inner", step=1):
+                pass
+
+    with start_span("root") as root:
+        Service.work()
+    tracing._processor.shutdown()
+
+    by_name = {span.name: span for span in exporter.spans}
+    assert set(by_name) == {"root", "Service.work", "inner"}
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    assert by_name["Service.work"].parent_id == root.span_id
+    assert by_name["inner"].parent_id == by_name["Service.work"].span_id
+    assert by_name["inner"].attributes == {"step": 1}
+
+
+def test_unsampled_root_drops_whole_trace(exporter):
+    with start_span("root", sampled=False):
+        with start_span("child"):
+            pass
+    tracing._processor.shutdown()
+
+    assert exporter.spans == []
+
+
+def test_exception_marks_span_as_error(exporter):
+    with pytest.raises(ValueError):
+        with start_span("boom"):
+            raise ValueError("nope")
+    tracing._processor.shutdown()
+
+    span = exporter.spans[0]
+    assert span.status == "error"
+    assert span.attributes["exception.type"] == "ValueError"
+
+
+def test_jsonl_exporter_and_traceparent(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    span = tracing.Span(name="x", trace_id="a" * 32, span_id="b" * 16, start_ns=0, end_ns=2_000_000)
+    JsonlFileExporter(str(path)).export([span])
+
+    line = json.loads(path.read_text().strip())
+    assert line["name"] == "x" and line["duration_ms"] == 2.0
+
+    assert parse_traceparent(f"00-{'a' * 32}-{'b' * 16}-01") == ("a" * 32, "b" * 16, True)
+    assert parse_traceparent("garbage") == (None, None, None)
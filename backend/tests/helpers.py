@@ -1,9 +1,15 @@
 """
 Test helper utilities
 """
-from typing import Dict, Any
+from itertools import count
+from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
 from app.core.security import create_access_token
+from app.models import Category, Order, OrderItem, OrderStatus, PaymentMethod, Product, User
+from app.schemas.order import OrderCreate, OrderItemCreate
 
 
 def create_test_token(user_id: int, email: str, is_admin: bool = False) -> str:
@@ -43,3 +49,65 @@ def create_test_product_data(
         "stock": 100,
         "is_active": True
     }
+
+
+# Rows for service-level tests on ``db_session``; committed, so a rollback
+# in the code under test keeps them
+_seq = count(1)
+
+
+def add_user(db: Session, **fields) -> User:
+    n = next(_seq)
+    user = User(email=f"user{n}@example.com", hashed_password="x", full_name=f"User {n}", **fields)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_product(db: Session, category: Optional[Category] = None, **fields) -> Product:
+    n = next(_seq)
+    if category is None:
+        category = Category(name=f"Category {n}", slug=f"category-{n}")
+        db.add(category)
+        db.flush()
+    fields = {"price": 1_000_000, "stock": 10, "is_active": True, **fields}
+    product = Product(name=f"Product {n}", slug=f"product-{n}", sku=f"SKU-{n}", category_id=category.id, **fields)
+    db.add(product)
+    db.commit()
+    return product
+
+
+def add_order(
+    db: Session,
+    user: User,
+    items: Dict[int, int],
+    status: OrderStatus = OrderStatus.PENDING,
+    payment_method: PaymentMethod = PaymentMethod.COD,
+    age: timedelta = timedelta(0),
+    **fields,
+) -> Order:
+    """Order of ``items`` (product id -> quantity) created ``age`` ago"""
+    created_at = datetime.utcnow() - age
+    order = Order(
+        user_id=user.id, subtotal=0, total_amount=0, full_name=user.full_name, phone_number="0900000000",
+        shipping_address="1 Test Street", status=status.value, payment_method=payment_method.value,
+        created_at=created_at, updated_at=created_at, **fields,
+    )
+    db.add(order)
+    db.flush()
+    for product_id, quantity in items.items():
+        db.add(OrderItem(
+            order_id=order.id, product_id=product_id, product_name=f"Product {product_id}",
+            quantity=quantity, price_at_purchase=1_000_000,
+        ))
+    db.commit()
+    return order
+
+
+def order_data(*items, **fields) -> OrderCreate:
+    """COD checkout of ``items`` ((product id, quantity) pairs)"""
+    return OrderCreate(
+        items=[OrderItemCreate(product_id=product_id, quantity=quantity) for product_id, quantity in items],
+        full_name="Test User", phone_number="0900000000", shipping_address="1 Test Street, HCMC",
+        payment_method="cod", **fields,
+    )
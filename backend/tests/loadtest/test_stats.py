@@ -0,0 +1,27 @@
+from loadtest.stats import StatsCollector, compare_to_baseline, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+def test_report_and_baseline_comparison():
+    stats = StatsCollector()
+    for latency in range(1, 101):
+        stats.record("GET /products", float(latency), ok=latency != 100, error="500")
+    baseline = stats.report(elapsed_s=10.0)
+    assert baseline["endpoints"]["GET /products"]["error_rate"] == 0.01
+    assert baseline["total"]["rps"] == 10.0
+
+    assert compare_to_baseline(baseline, baseline) == []
+
+    slower = StatsCollector()
+    for latency in range(1, 101):
+        slower.record("GET /products", float(latency) * 2, ok=True)
+    regressions = compare_to_baseline(slower.report(elapsed_s=20.0), baseline)
+    assert any("p95_ms" in line for line in regressions)
+    assert any("throughput" in line for line in regressions)
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from app.core.exceptions import BadRequestException, NotFoundException, ServiceUnavailableException
+from app.schemas.order import OrderCreate
+from app.services.checkout_queue import CheckoutQueue
+from app.services.pricing_service import BundlePrice, PricingService
+
+
+def checkout(*product_ids):
+    return OrderCreate(
+        items=[{"product_id": pid, "quantity": 1} for pid in product_ids],
+        full_name="Test User",
+        phone_number="0900000000",
+        shipping_address="1 Test Street, HCMC",
+        payment_method="cod",
+    )
+
+
+def test_same_sku_runs_in_order_on_one_lane():
+    done = []
+
+    def process(user_id, data):
+        if user_id == 3:
+            raise BadRequestException("Insufficient stock")
+        done.append(user_id)
+        return {"id": user_id}
+
+    queue = CheckoutQueue(workers=4, process=process)
+    assert queue.lane_for(checkout(9, 5)) == queue.lane_for(checkout(5)) == 1
+    tickets = [queue.submit(user_id, checkout(5)) for user_id in range(1, 5)]
+    assert [t["position"] for t in tickets] == [0, 1, 2, 3]
+
+    queue.start()
+    queue.stop()
+    assert done == [1, 2, 4]
+    assert queue.get(tickets[0]["ticket_id"], 1)["order"] == {"id": 1}
+    failed = queue.get(tickets[2]["ticket_id"], 3)
+    assert failed["status"] == "failed" and failed["error"] == {"status_code": 400, "detail": "Insufficient stock"}
+    assert queue.stats()["completed"] == 3 and queue.stats()["pending"] == 0
+
+
+def test_full_queue_rejects_and_tickets_are_private():
+    release = threading.Event()
+    queue = CheckoutQueue(workers=1, max_pending=2, process=lambda user_id, data: release.wait(1) and {})
+    first = queue.submit(1, checkout(1))
+    queue.submit(2, checkout(2))
+    with pytest.raises(ServiceUnavailableException):
+        queue.submit(3, checkout(3))
+    with pytest.raises(NotFoundException):
+        queue.get(first["ticket_id"], 2)
+    release.set()
+    queue.start()
+    queue.stop()
+    assert queue.stats()["rejected"] == 1
+
+
+def test_overlapping_baskets_keep_per_sku_order():
+    # {2} and {3} start on different lanes; {2, 3} bridges them and must wait for both
+    baskets = [(2,), (3,), (2, 3), (3,), (2,), (5,), (3, 5), (2,)]
+    started, running, overlaps = [], set(), []
+    lock = threading.Lock()
+
+    def process(user_id, data):
+        skus = {item.product_id for item in data.items}
+        with lock:
+            if running & skus:
+                overlaps.append(user_id)
+            running.update(skus)
+            started.append(user_id)
+        time.sleep(0.01)
+        with lock:
+            running.difference_update(skus)
+        return {"id": user_id}
+
+    queue = CheckoutQueue(workers=3, process=process)
+    assert queue.lane_for(checkout(2)) != queue.lane_for(checkout(3))
+    for user_id, basket in enumerate(baskets):
+        queue.submit(user_id, checkout(*basket))
+    queue.start()
+    queue.stop()
+
+    assert not overlaps
+    for sku in (2, 3, 5):
+        submitted = [user_id for user_id, basket in enumerate(baskets) if sku in basket]
+        assert [user_id for user_id in started if user_id in submitted] == submitted
+    assert queue.stats()["completed"] == len(baskets)
+
+
+def test_combo_basket_queues_behind_its_member_skus(monkeypatch):
+    # Combo 9 holds products 2 and 4; the raw id 9 must not count as a SKU
+    combo = BundlePrice(collection_id=9, sale_price=None, members=((2, 1, 100.0), (4, 1, 100.0)))
+    monkeypatch.setattr(PricingService, "get_bundles", lambda db, ids: {9: combo} if 9 in ids else {})
+    basket = checkout(7)
+    basket.items[0].product_id, basket.items[0].is_collection = 9, True
+
+    started, running, overlaps = [], set(), []
+    lock = threading.Lock()
+
+    def process(user_id, data):
+        skus = {2, 4} if data.items[0].is_collection else {item.product_id for item in data.items}
+        with lock:
+            if running & skus:
+                overlaps.append(user_id)
+            running.update(skus)
+            started.append(user_id)
+        time.sleep(0.01)
+        with lock:
+            running.difference_update(skus)
+        return {"id": user_id}
+
+    queue = CheckoutQueue(workers=4, process=process)
+    assert queue.product_ids(basket, {9: combo}) == {2, 4}
+    assert queue.lane_for(checkout(4)) != queue.lane_for(checkout(2))
+    queue.submit(1, checkout(4))
+    queue.submit(2, basket)
+    queue.submit(3, checkout(4))
+    queue.submit(4, checkout(9))  # product 9 shares nothing with combo 9
+    assert queue.get(queue.submit(5, checkout(9))["ticket_id"], 5)["position"] == 1
+    queue.start()
+    queue.stop()
+
+    assert not overlaps
+    assert [user_id for user_id in started if user_id in (1, 2, 3)] == [1, 2, 3]
@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.services import flash_sale_service
+from app.services.flash_sale_service import FlashSaleService, PENDING_KEY, SKUS_KEY, deferred_releases
+from tests.helpers import add_product
+
+
+def on_sale(redis, stock):
+    for product_id, units in stock.items():
+        redis.sadd(SKUS_KEY, product_id)
+        redis.set(f"flash:stock:{product_id}", units)
+
+
+def test_reserve_is_all_or_nothing(flash_redis):
+    on_sale(flash_redis, {1: 5, 2: 1})
+    assert FlashSaleService.reserve({1: 2, 2: 2}) == (2, 1)
+    assert flash_redis.get("flash:stock:1") == "5" and not flash_redis.hgetall(PENDING_KEY)
+
+    assert FlashSaleService.reserve({1: 2, 2: 1}) is None
+    assert flash_redis.mget("flash:stock:1", "flash:stock:2") == ["3", "0"]
+    assert flash_redis.hgetall(PENDING_KEY) == {"1": "2", "2": "1"}
+    assert FlashSaleService.reserve({1: 1, 3: 1}) == (3, -1)  # 3 is not on sale
+
+
+def test_release_returns_units_and_pending(flash_redis):
+    on_sale(flash_redis, {1: 5})
+    FlashSaleService.reserve({1: 4})
+    db = MagicMock()
+    FlashSaleService.release(db, {1: 3})
+    assert flash_redis.get("flash:stock:1") == "4"
+    assert flash_redis.hget(PENDING_KEY, "1") == "1"
+    db.execute.assert_not_called()
+
+
+def test_release_of_ended_sale_restocks_postgres(flash_redis):
+    db = MagicMock()
+    FlashSaleService.release(db, {7: 2})
+    params = db.execute.call_args.args[1]
+    assert params == [{"product_id": 7, "delta": -2}]
+    db.commit.assert_called_once()
+    assert len(deferred_releases) == 0
+
+
+def test_release_never_raises_and_retries_later(flash_redis, monkeypatch):
+    on_sale(flash_redis, {1: 5})
+    FlashSaleService.reserve({1: 2})
+    monkeypatch.setattr(flash_sale_service, "get_redis", lambda: None)
+    FlashSaleService.release(MagicMock(), {1: 2})
+
+    broken = MagicMock()
+    broken.register_script.return_value = MagicMock(side_effect=RedisConnectionError("down"))
+    monkeypatch.setattr(flash_sale_service, "get_redis", lambda: broken)
+    FlashSaleService.release(MagicMock(), {1: 1})
+    assert len(deferred_releases) == 1
+
+    monkeypatch.setattr(flash_sale_service, "get_redis", lambda: flash_redis)
+    monkeypatch.setattr(flash_sale_service, "SessionLocal", MagicMock())
+    assert FlashSaleService.retry_releases() == 1
+    assert flash_redis.get("flash:stock:1") == "6"  # 3 left + 3 deferred
+    assert flash_redis.hget(PENDING_KEY, "1") == "-1"
+    assert len(deferred_releases) == 0
+
+
+def test_failed_postgres_restock_is_deferred(flash_redis):
+    db = MagicMock()
+    db.execute.side_effect = RuntimeError("connection lost")
+    FlashSaleService.release(db, {7: 2})
+    db.rollback.assert_called_once()
+    assert deferred_releases.take() == {7: 2}
+
+
+def stock(db, product):
+    db.expire(product)
+    return product.stock
+
+
+def test_flush_writes_pending_back_once(db_session, flash_redis):
+    sofa, table = add_product(db_session, stock=10), add_product(db_session, stock=4)
+    FlashSaleService.start(db_session, sofa.id)
+    FlashSaleService.start(db_session, table.id)
+    assert FlashSaleService.reserve({sofa.id: 3, table.id: 1}) is None
+    FlashSaleService.release(db_session, {sofa.id: 1})
+
+    assert FlashSaleService.flush(db_session) == 2
+    assert (stock(db_session, sofa), stock(db_session, table)) == (8, 3)
+    assert not flash_redis.hgetall(PENDING_KEY)
+    assert FlashSaleService.flush(db_session) == 0
+    assert stock(db_session, sofa) == 8
+
+    ended = FlashSaleService.stop(db_session, sofa.id)
+    assert ended["available"] == 8 and ended["drift"] == 0
+
+
+def test_release_after_sale_ended_restocks_postgres(db_session, flash_redis):
+    sofa = add_product(db_session, stock=5)
+    FlashSaleService.start(db_session, sofa.id)
+    FlashSaleService.reserve({sofa.id: 2})
+    FlashSaleService.stop(db_session, sofa.id)
+    assert stock(db_session, sofa) == 3
+
+    FlashSaleService.release(db_session, {sofa.id: 2})  # e.g. the order is cancelled later
+    assert stock(db_session, sofa) == 5
+    assert not flash_redis.exists(f"flash:stock:{sofa.id}")
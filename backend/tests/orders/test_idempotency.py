@@ -0,0 +1,117 @@
+import threading
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.requests import Request
+
+from app.api.api_v1.endpoints import orders as orders_endpoints
+from app.api.deps import get_current_user
+from app.core.database import Base, get_db
+from app.models import Order, Product, User
+from app.services.idempotency_service import request_fingerprint
+from app.services.order_service import OrderService
+from tests.helpers import add_product, add_user, order_data
+
+
+def make_request(path, query=b""):
+    return Request({"type": "http", "method": "POST", "path": path, "query_string": query, "headers": []})
+
+
+def test_fingerprint_ignores_key_order_only():
+    body = {"items": [{"product_id": 1, "quantity": 2}], "payment_method": "momo"}
+    reordered = {"payment_method": "momo", "items": [{"quantity": 2, "product_id": 1}]}
+    orders = make_request("/api/v1/orders")
+    assert request_fingerprint(orders, body) == request_fingerprint(orders, reordered)
+    assert request_fingerprint(orders, body) != request_fingerprint(orders, {**body, "payment_method": "cod"})
+    assert request_fingerprint(orders, body) != request_fingerprint(make_request("/api/v1/payments/create"), body)
+
+
+def test_fingerprint_includes_query_string():
+    first = make_request("/api/v1/payments/vnpay/create", b"order_id=1")
+    assert request_fingerprint(first) == request_fingerprint(make_request("/api/v1/payments/vnpay/create", b"order_id=1"))
+    assert request_fingerprint(first) != request_fingerprint(make_request("/api/v1/payments/vnpay/create", b"order_id=2"))
+
+
+def orders_client(get_db_override, user_id):
+    app = FastAPI()
+    app.include_router(orders_endpoints.router, prefix="/api/v1/orders")
+    app.dependency_overrides[get_db] = get_db_override
+
+    def current_user(db: Session = Depends(get_db)):
+        return db.get(User, user_id)
+
+    app.dependency_overrides[get_current_user] = current_user
+    return TestClient(app)
+
+
+def checkout_body(product, quantity=1):
+    return order_data((product.id, quantity)).model_dump(mode="json")
+
+
+def test_repeated_key_replays_the_order(db_session):
+    sofa, shopper = add_product(db_session, stock=5), add_user(db_session)
+    client = orders_client(lambda: db_session, shopper.id)
+    headers = {"Idempotency-Key": "order-1"}
+
+    first = client.post("/api/v1/orders", json=checkout_body(sofa, 2), headers=headers)
+    retry = client.post("/api/v1/orders", json=checkout_body(sofa, 2), headers=headers)
+    assert first.status_code == retry.status_code == 201
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert db_session.query(Order).count() == 1
+    db_session.refresh(sofa)
+    assert sofa.stock == 3
+
+    changed = client.post("/api/v1/orders", json=checkout_body(sofa, 1), headers=headers)
+    assert changed.status_code == 409
+    assert db_session.query(Order).count() == 1
+
+
+def test_concurrent_duplicate_gets_the_same_order(tmp_path, monkeypatch):
+    # Two connections, so the duplicate really waits on the first request
+    engine = create_engine(f"sqlite:///{tmp_path / 'orders.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    make_session = sessionmaker(bind=engine, autoflush=False)
+    with make_session() as db:
+        sofa, shopper = add_product(db, stock=5), add_user(db)
+        sofa_id, shopper_id = sofa.id, shopper.id
+        body = checkout_body(sofa)
+
+    def get_test_db():
+        with make_session() as db:
+            yield db
+
+    first_running = threading.Event()
+    create_order = OrderService.create_order
+
+    def slow_create_order(db, user_id, data):
+        first_running.set()
+        time.sleep(0.2)  # the duplicate arrives while the key is held
+        order = create_order(db, user_id, data)
+        time.sleep(0.2)  # ... and again after the order committed, before the response is stored
+        return order
+
+    monkeypatch.setattr(OrderService, "create_order", slow_create_order)
+    client = orders_client(get_test_db, shopper_id)
+    headers = {"Idempotency-Key": "order-2"}
+    responses = {}
+
+    def post(name):
+        responses[name] = client.post("/api/v1/orders", json=body, headers=headers)
+
+    first = threading.Thread(target=post, args=("first",))
+    first.start()
+    assert first_running.wait(5)
+    post("duplicate")
+    first.join()
+
+    assert responses["first"].status_code == responses["duplicate"].status_code == 201
+    assert responses["duplicate"].json()["id"] == responses["first"].json()["id"]
+    assert responses["duplicate"].headers["Idempotent-Replayed"] == "true"
+    with make_session() as db:
+        assert db.query(Order).count() == 1
+        assert db.get(Product, sofa_id).stock == 4
+    engine.dispose()
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from app.models import Coupon, CouponStatus, CouponType, Order, OrderStatus, PaymentMethod
+from app.schemas.order import OrderUpdate
+from app.services import order_service
+from app.services.flash_sale_service import FlashSaleService
+from app.services.order_service import OrderService
+from tests.helpers import add_order, add_product, add_user
+
+ONLINE = [PaymentMethod.MOMO.value, PaymentMethod.VNPAY.value, PaymentMethod.BANK_TRANSFER.value]
+STALE = timedelta(hours=1)
+
+
+def used_coupon(db, user, order, code):
+    coupon = Coupon(
+        code=code, user_id=user.id, discount_type=CouponType.FIXED, discount_value=300000,
+        status=CouponStatus.USED, used_at=datetime.utcnow(), order_id=order.id,
+        valid_until=datetime.utcnow() + timedelta(days=30),
+    )
+    db.add(coupon)
+    db.commit()
+    return coupon
+
+
+def test_cancels_stale_unpaid_orders_once(db_session, flash_redis, monkeypatch):
+    notified = []
+    monkeypatch.setattr(order_service, "submit", lambda func, order_id, old_status: notified.append(order_id))
+    sofa, lamp = add_product(db_session, stock=10), add_product(db_session, stock=5)
+    FlashSaleService.start(db_session, lamp.id)
+    user = add_user(db_session)
+
+    momo = add_order(db_session, user, {sofa.id: 2, lamp.id: 1}, payment_method=PaymentMethod.MOMO, age=STALE)
+    FlashSaleService.reserve({lamp.id: 1})
+    vnpay = add_order(db_session, user, {sofa.id: 1}, status=OrderStatus.AWAITING_PAYMENT,
+                      payment_method=PaymentMethod.VNPAY, age=STALE)
+    paid = add_order(db_session, user, {sofa.id: 1}, payment_method=PaymentMethod.MOMO, age=STALE, is_paid=True)
+    recent = add_order(db_session, user, {sofa.id: 1}, payment_method=PaymentMethod.MOMO, age=timedelta(minutes=5))
+    cod = add_order(db_session, user, {sofa.id: 1}, age=STALE)
+    coupon = used_coupon(db_session, user, momo, "LUXEAUTO0001")
+
+    def sweep():
+        return OrderService.cancel_stale_orders(db_session, timedelta(minutes=30), ONLINE, batch_size=1)
+
+    assert sweep() == 2
+    db_session.expire_all()
+    statuses = {order.id: order.status for order in db_session.query(Order)}
+    assert statuses == {
+        momo.id: OrderStatus.CANCELLED.value, vnpay.id: OrderStatus.CANCELLED.value,
+        paid.id: OrderStatus.PENDING.value, recent.id: OrderStatus.PENDING.value, cod.id: OrderStatus.PENDING.value,
+    }
+    assert sofa.stock == 13
+    assert flash_redis.get(f"flash:stock:{lamp.id}") == "5"
+    assert (coupon.status, coupon.order_id, coupon.used_at) == (CouponStatus.ACTIVE, None, None)
+    assert sorted(notified) == sorted([momo.id, vnpay.id])
+
+    assert sweep() == 0
+    db_session.expire_all()
+    assert sofa.stock == 13
+    assert flash_redis.get(f"flash:stock:{lamp.id}") == "5"
+    assert coupon.status == CouponStatus.ACTIVE
+
+
+def test_status_cancel_gives_back_stock_and_coupon(db_session, monkeypatch):
+    monkeypatch.setattr(OrderService, "_send_order_status_notification", lambda db, order, old_status: None)
+    sofa = add_product(db_session, stock=10)
+    user = add_user(db_session)
+    order = add_order(db_session, user, {sofa.id: 2})
+    coupon = used_coupon(db_session, user, order, "LUXECANCEL01")
+
+    OrderService.update_order(db_session, order.id, OrderUpdate(status=OrderStatus.CANCELLED))
+    db_session.expire_all()
+    assert sofa.stock == 12
+    assert (coupon.status, coupon.order_id, coupon.used_at) == (CouponStatus.ACTIVE, None, None)
+
+    # Cancelling again changes nothing
+    OrderService.update_order(db_session, order.id, OrderUpdate(status=OrderStatus.CANCELLED))
+    db_session.expire_all()
+    assert sofa.stock == 12 and coupon.status == CouponStatus.ACTIVE
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from app.schemas.order import OrderItemCreate
+from app.services.pricing_service import BundlePrice, BundlePriceCache, PricingService, unit_price
+
+
+def product(product_id, price, sale_price=None):
+    return SimpleNamespace(id=product_id, price=price, sale_price=sale_price)
+
+
+def test_bundle_ratio_spreads_combo_price():
+    # 1 table (sale 8M) + 4 chairs (1M) = 12M at unit prices, combo sold at 9M
+    bundle = BundlePrice(7, 9_000_000, ((1, 1, 8_000_000), (2, 4, 1_000_000)))
+    assert bundle.original_total == 12_000_000
+    assert bundle.ratio == 0.75
+
+    lines = PricingService.expand_items([OrderItemCreate(product_id=7, quantity=2, is_collection=True)], {7: bundle})
+    assert [(line.product_id, line.quantity, line.price_override) for line in lines] == [
+        (1, 2, 6_000_000), (2, 8, 750_000)
+    ]
+    assert sum(line.price_override * line.quantity for line in lines) == 2 * bundle.price
+
+
+def test_bundle_without_sale_price_sells_at_member_prices():
+    bundle = BundlePrice(3, None, ((1, 2, 500_000),))
+    assert bundle.price == 1_000_000 and bundle.ratio == 1.0
+
+
+def test_expand_keeps_products_and_unknown_collections():
+    items = [OrderItemCreate(product_id=5, quantity=1), OrderItemCreate(product_id=99, quantity=1, is_collection=True)]
+    assert PricingService.expand_items(items, {}) == items
+
+
+def test_revalidate_reprices_from_locked_rows():
+    cached = BundlePrice(7, 900, ((1, 1, 600), (2, 1, 400)))
+    locked = {1: product(1, 1000, sale_price=800), 2: product(2, 400)}
+    fresh = PricingService.revalidate({7: cached}, locked)[7]
+    assert fresh.members == ((1, 1, 800), (2, 1, 400)) and fresh.ratio == 900 / 1200
+    assert PricingService.revalidate({7: fresh}, locked)[7] == fresh
+    assert unit_price(locked[1]) == 800 and unit_price(locked[2]) == 400
+
+
+def test_cache_hits_only_matching_version():
+    cache = BundlePriceCache(ttl=60)
+    bundle = BundlePrice(7, 900, ((1, 1, 1000),))
+    cache.put([bundle], {7: 3})
+    assert cache.get({7: 3}) == {7: bundle}
+    assert cache.get({7: 4}) == {}
+    cache.drop([7])
+    assert cache.get({7: 3}) == {}
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.exceptions import BadRequestException
+from app.models import StockReservation
+from app.models.stock_reservation import ReservationStatus
+from app.schemas.order import OrderItemCreate
+from app.services.cart_service import CartService
+from app.services.order_service import OrderService
+from app.services.stock_reservation_service import StockReservationService
+from tests.helpers import add_product, add_user, order_data
+
+
+def reserve(db, user, *products):
+    items = [OrderItemCreate(product_id=product.id, quantity=quantity) for product, quantity in products]
+    return StockReservationService.reserve(db, user.id, items)
+
+
+def statuses(db, user):
+    return {
+        hold.product_id: hold.status
+        for hold in db.query(StockReservation).filter(StockReservation.user_id == user.id)
+    }
+
+
+def test_reserve_then_commit_into_order(db_session):
+    sofa = add_product(db_session, stock=5)
+    alice, bob = add_user(db_session), add_user(db_session)
+    hold = reserve(db_session, alice, (sofa, 3))
+
+    with pytest.raises(BadRequestException, match="Available: 2"):
+        reserve(db_session, bob, (sofa, 3))
+    assert StockReservationService.get_availability(db_session, sofa.id)["available"] == 2
+
+    order = OrderService.create_order(db_session, alice.id, order_data((sofa.id, 3), reservation_token=hold["token"]))
+    assert statuses(db_session, alice) == {sofa.id: ReservationStatus.COMMITTED.value}
+    assert db_session.query(StockReservation.order_id).filter(StockReservation.token == hold["token"]).scalar() == order.id
+    assert StockReservationService.get_availability(db_session, sofa.id) == {
+        "product_id": sofa.id, "stock": 2, "reserved": 0, "available": 2,
+    }
+    reserve(db_session, bob, (sofa, 2))  # the committed hold no longer counts
+
+
+def test_order_without_token_ends_the_checkout_holds(db_session):
+    sofa, lamp = add_product(db_session, stock=5), add_product(db_session, stock=5)
+    alice = add_user(db_session)
+    reserve(db_session, alice, (sofa, 3), (lamp, 1))
+
+    order = OrderService.create_order(db_session, alice.id, order_data((sofa.id, 3)))
+    assert statuses(db_session, alice) == {
+        sofa.id: ReservationStatus.COMMITTED.value, lamp.id: ReservationStatus.RELEASED.value,
+    }
+    assert db_session.query(StockReservation.order_id).filter(StockReservation.product_id == sofa.id).scalar() == order.id
+    # stock was taken once, by the order
+    assert StockReservationService.get_availability(db_session, sofa.id)["available"] == 2
+    assert StockReservationService.get_availability(db_session, lamp.id)["available"] == 5
+
+
+def test_expired_hold_stops_counting(db_session):
+    sofa = add_product(db_session, stock=5)
+    alice, bob = add_user(db_session), add_user(db_session)
+    reserve(db_session, alice, (sofa, 4))
+    with pytest.raises(BadRequestException):
+        reserve(db_session, bob, (sofa, 2))
+
+    db_session.query(StockReservation)\
+        .filter(StockReservation.user_id == alice.id)\
+        .update({StockReservation.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db_session.commit()
+
+    reserve(db_session, bob, (sofa, 5))  # before any sweep
+    assert StockReservationService.sweep(db_session) == {"expired": 1, "purged": 0}
+    assert statuses(db_session, alice) == {sofa.id: ReservationStatus.EXPIRED.value}
+
+
+def test_cart_stock_ignores_only_own_holds(db_session):
+    sofa, lamp = add_product(db_session, stock=5), add_product(db_session, stock=1)
+    alice, bob = add_user(db_session), add_user(db_session)
+    reserve(db_session, alice, (sofa, 2))
+    reserve(db_session, bob, (lamp, 1))
+
+    assert CartService._available_stock(db_session, alice.id, [sofa, lamp]) == {sofa.id: 5, lamp.id: 0}
+    assert CartService._available_stock(db_session, bob.id, [sofa, lamp]) == {sofa.id: 3, lamp.id: 1}
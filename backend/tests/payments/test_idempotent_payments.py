@@ -0,0 +1,91 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api.api_v1.endpoints import payments
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.database import get_db
+from app.models import IdempotencyKey, OrderStatus, PaymentMethod
+from app.services.idempotency_service import IdempotencySlot
+from app.services.payment_service import PaymentService
+from tests.helpers import add_order, add_product, add_user
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    calls = []
+
+    async def create_momo_payment(**kwargs):
+        calls.append(kwargs["order_id"])
+        return {"resultCode": 0, "payUrl": f"https://momo.test/pay/{len(calls)}"}
+
+    monkeypatch.setattr(PaymentService, "create_momo_payment", create_momo_payment)
+    return calls
+
+
+@pytest.fixture
+def shopper(db_session):
+    return add_user(db_session)
+
+
+@pytest.fixture
+def payments_client(db_session, shopper):
+    app = FastAPI()
+    app.include_router(payments.router, prefix="/api/v1/payments")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: shopper
+    return TestClient(app)
+
+
+def stored_keys(db):
+    return {row.key: row.status_code for row in db.execute(select(IdempotencyKey.key, IdempotencyKey.status_code))}
+
+
+def test_retry_replays_momo_payment(db_session, shopper, gateway, payments_client):
+    order = add_order(db_session, shopper, {add_product(db_session).id: 1})
+    headers = {"Idempotency-Key": "pay-1"}
+
+    first = payments_client.post(f"/api/v1/payments/momo/create?order_id={order.id}", headers=headers)
+    retry = payments_client.post(f"/api/v1/payments/momo/create?order_id={order.id}", headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert gateway == [order.id]
+    assert stored_keys(db_session) == {"pay-1": 200}
+
+    other = payments_client.post(f"/api/v1/payments/momo/create?order_id={order.id + 1}", headers=headers)
+    assert other.status_code == 409
+
+
+def test_failed_request_frees_its_key(db_session, shopper, gateway, payments_client):
+    order = add_order(db_session, shopper, {add_product(db_session).id: 1}, status=OrderStatus.CANCELLED)
+    body = {"order_id": order.id, "gateway": "cod"}
+
+    assert payments_client.post("/api/v1/payments/create", json=body, headers={"Idempotency-Key": "pay-2"}).status_code == 400
+    assert stored_keys(db_session) == {}
+
+    order.status = OrderStatus.PENDING.value
+    db_session.commit()
+    ok = payments_client.post("/api/v1/payments/create", json=body, headers={"Idempotency-Key": "pay-2"})
+    assert ok.status_code == 200 and "Idempotent-Replayed" not in ok.headers
+    assert stored_keys(db_session) == {"pay-2": 200}
+    db_session.refresh(order)
+    assert order.payment_method == PaymentMethod.COD.value
+
+
+def test_key_commits_with_the_work_before_the_response(db_session, shopper, payments_client, monkeypatch):
+    """A retry after the work committed but the response was lost gets 409, not a second run"""
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_S", 0.2)
+    order = add_order(db_session, shopper, {add_product(db_session).id: 1}, payment_method=PaymentMethod.MOMO)
+    body = {"order_id": order.id, "gateway": "bank_transfer"}
+    with monkeypatch.context() as patch:
+        patch.setattr(IdempotencySlot, "complete", lambda self, result: result)  # "crash" before storing
+        payments_client.post("/api/v1/payments/create", json=body, headers={"Idempotency-Key": "pay-3"})
+
+    db_session.refresh(order)
+    assert order.payment_method == PaymentMethod.BANK_TRANSFER.value
+    assert stored_keys(db_session) == {"pay-3": None}
+    assert payments_client.post("/api/v1/payments/create", json=body, headers={"Idempotency-Key": "pay-3"}).status_code == 409
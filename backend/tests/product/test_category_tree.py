@@ -0,0 +1,23 @@
+from app.services.category_tree_service import CategoryTree
+
+
+def row(category_id, parent_id=None):
+    return (category_id, f"c{category_id}", f"c-{category_id}", None, None, parent_id)
+
+
+def test_subtrees_include_all_descendants():
+    # 1 Phòng khách -> 2 Sofa -> 4 Sofa góc; 1 -> 3 Bàn trà; 5 on its own
+    tree = CategoryTree.build([row(4, 2), row(2, 1), row(1), row(3, 1), row(5)])
+    assert sorted(tree.subtrees[1]) == [1, 2, 3, 4]
+    assert tree.subtrees[2] == (2, 4)
+    assert tree.subtrees[5] == (5,)
+    assert [node["id"] for node in tree.tree] == [1, 5]
+    assert [child["id"] for child in tree.tree[0]["children"]] == [2, 3]
+    assert tree.tree[0]["children"][0]["children"][0]["slug"] == "c-4"
+
+
+def test_orphans_and_cycles_become_roots():
+    tree = CategoryTree.build([row(1, 99), row(2, 3), row(3, 2), row(4, 4)])
+    assert sorted(node["id"] for node in tree.tree) == [1, 2, 4]
+    assert tree.subtrees[2] == (2, 3) and tree.subtrees[3] == (3,)
+    assert tree.subtrees[4] == (4,)
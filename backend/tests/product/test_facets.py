@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql
+
+from app.models.product import dimension_cm
+from app.services.facet_service import PRICE_BAND, MATERIAL, ProductFilters, _grouping_mask
+
+
+def test_filters_are_keyed_by_their_facet():
+    conditions = ProductFilters(category_id=3, search="sofa", min_price=1, max_price=2).conditions()
+    assert len(conditions["category"]) == 1 and len(conditions["price"]) == 2
+    assert len(conditions[None]) == 2  # is_active + search
+    assert conditions["material"] == conditions["color"] == []
+
+    conditions = ProductFilters(materials=["Da thật"], dimensions={"width": (None, 200)}).conditions()
+    assert len(conditions["material"]) == 1 and len(conditions[None]) == 2
+
+
+def test_grouped_and_indexed_expressions_render_inline():
+    # SELECT and GROUP BY (and an expression index) only match if the SQL is identical
+    for expression in (PRICE_BAND, MATERIAL, dimension_cm("width")):
+        compiled = expression.compile(dialect=postgresql.dialect())
+        assert all(bind.literal_execute for bind in compiled.binds.values())
+    assert "ARRAY[2000000,5000000,10000000,20000000,50000000]" in str(PRICE_BAND.compile(dialect=postgresql.dialect()))
+
+
+def test_grouping_masks():
+    assert [_grouping_mask(i) for i in range(4)] == [0b0111, 0b1011, 0b1101, 0b1110]
+    assert _grouping_mask() == 0b1111
@@ -0,0 +1,91 @@
+"""
+Personalized recommendations on a small user-item fixture
+
+    u1  likes A and D, buys B     A 1, B 2, D 1
+    u2  buys A, buys B twice      A 2, B 2
+    u3  likes B and C             B 1, C 1
+
+    norms   A sqrt(5), B 3, C 1, D 1
+    cosine  AB 6 / (3 sqrt(5)), AD 1 / sqrt(5), BD 2/3, BC 1/3
+"""
+from math import sqrt
+
+import pytest
+
+from app.models import ProductLike
+from app.services.recommendation_service import RecommendationService, _interactions, _similarities, _user_scores
+from tests.helpers import add_order, add_product, add_user
+
+AB, AD, BD, BC = 6 / (3 * sqrt(5)), 1 / sqrt(5), 2 / 3, 1 / 3
+
+
+@pytest.fixture
+def rec_settings(monkeypatch):
+    from app.services.recommendation_service import settings
+    monkeypatch.setattr(settings, "RECOMMENDATION_MIN_COMMON_USERS", 1)
+    monkeypatch.setattr(settings, "RECOMMENDATION_SIMILAR_K", 50)
+    monkeypatch.setattr(settings, "RECOMMENDATION_TOP_N", 24)
+    monkeypatch.setattr(settings, "RECOMMENDATION_MAX_USER_ITEMS", 30)
+    return settings
+
+
+@pytest.fixture
+def shoppers(db_session):
+    a, b, c, d = (add_product(db_session).id for _ in range(4))
+    u1, u2, u3 = (add_user(db_session) for _ in range(3))
+    db_session.add_all([
+        ProductLike(user_id=u1.id, product_id=a),
+        ProductLike(user_id=u1.id, product_id=d),
+        ProductLike(user_id=u3.id, product_id=b),
+        ProductLike(user_id=u3.id, product_id=c),
+    ])
+    db_session.commit()
+    add_order(db_session, u1, {b: 1})
+    add_order(db_session, u2, {a: 1, b: 1})
+    add_order(db_session, u2, {b: 2})  # buying again adds no weight
+    return (a, b, c, d), (u1.id, u2.id, u3.id)
+
+
+def scores(db, query):
+    """(product or user id, product id) -> score"""
+    return {(row[0], row[1]): pytest.approx(row.score) for row in db.execute(query)}
+
+
+def test_interactions_add_like_and_purchase_weights(db_session, shoppers, rec_settings):
+    (a, b, c, d), (u1, u2, u3) = shoppers
+    cells = db_session.execute(_interactions().select()).all()
+    assert {(r.user_id, r.product_id): r.weight for r in cells} == {
+        (u1, a): 1.0, (u1, b): 2.0, (u1, d): 1.0, (u2, a): 2.0, (u2, b): 2.0, (u3, b): 1.0, (u3, c): 1.0,
+    }
+
+    # Strongest cell per user, ties go to the newest order, then the lowest id
+    rec_settings.RECOMMENDATION_MAX_USER_ITEMS = 1
+    cells = db_session.execute(_interactions().select()).all()
+    assert {(r.user_id, r.product_id) for r in cells} == {(u1, b), (u2, b), (u3, b)}
+
+
+def test_similarities_are_cosine_ranked_and_cut(db_session, shoppers, rec_settings):
+    (a, b, c, d), _ = shoppers
+    assert scores(db_session, _similarities()) == {
+        (a, b): AB, (a, d): AD, (b, a): AB, (b, d): BD, (b, c): BC,
+        (c, b): BC, (d, b): BD, (d, a): AD,
+    }
+    rec_settings.RECOMMENDATION_SIMILAR_K = 1
+    assert set(scores(db_session, _similarities())) == {(a, b), (b, a), (c, b), (d, b)}
+    rec_settings.RECOMMENDATION_MIN_COMMON_USERS = 2  # only u1 and u2 share a pair (A, B)
+    assert set(scores(db_session, _similarities())) == {(a, b), (b, a)}
+
+
+def test_user_scores_rank_unseen_products(db_session, shoppers, rec_settings):
+    (a, b, c, d), (u1, u2, u3) = shoppers
+    RecommendationService.rebuild_personalized(db_session)
+    # score(u, j) = sum over the user's cells i of weight(u, i) * sim(i, j)
+    assert scores(db_session, _user_scores()) == {
+        (u1, c): 2 * BC,
+        (u2, c): 2 * BC, (u2, d): 2 * AD + 2 * BD,
+        (u3, a): AB, (u3, d): BD,
+    }
+    assert [p.id for p in RecommendationService.get_for_user(db_session, u2)] == [d, c]
+
+    rec_settings.RECOMMENDATION_TOP_N = 1
+    assert set(scores(db_session, _user_scores())) == {(u1, c), (u2, d), (u3, a)}
@@ -0,0 +1,32 @@
+import math
+from datetime import timedelta
+
+from app.core.config import settings
+from app.services.popularity_service import EPOCH, EventBuffer, log_score, merge_log_scores
+
+
+def test_log_scores_rank_like_decayed_scores():
+    half_life = timedelta(hours=settings.POPULARITY_HALF_LIFE_HOURS)
+    now = EPOCH + timedelta(days=400)
+    # 10 views one half-life ago are worth 5 views now
+    old = log_score(10, now - half_life)
+    assert math.isclose(old, log_score(5, now))
+    assert log_score(6, now) > old > log_score(4, now)
+
+    merged = merge_log_scores(old, log_score(5, now))
+    assert math.isclose(merged, log_score(10, now))
+    assert merge_log_scores(log_score(1, now), log_score(1, EPOCH)) == log_score(1, now)  # no overflow
+
+
+def test_buffer_drains_and_restores():
+    buffer = EventBuffer()
+    buffer.add("view", {1: 2, 2: 1})
+    buffer.add("view", {1: 1})
+    buffer.add("purchase", {2: 3, 3: 0})
+    drained = buffer.drain()
+    assert drained == {1: {"view": 3}, 2: {"view": 1, "purchase": 3}}
+    assert len(buffer) == 0
+
+    buffer.add("cart", {1: 1})
+    buffer.restore(drained)
+    assert buffer.drain() == {1: {"view": 3, "cart": 1}, 2: {"view": 1, "purchase": 3}}
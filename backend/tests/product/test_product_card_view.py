@@ -0,0 +1,81 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from app.api.api_v1.endpoints import products, users
+from app.api.deps import get_current_user
+from app.core.database import get_db
+from app.models import ProductStats, RelatedProduct, User, UserRecommendation
+from app.schemas.product import ProductCardResponse
+from app.services.product_service import ProductService
+from tests.helpers import add_product, add_user
+
+CARD_FIELDS = set(ProductCardResponse.model_fields)
+
+
+@pytest.fixture
+def catalog(db_session):
+    sofa = add_product(db_session, description="<p>Long HTML</p>", images=["a.jpg", "b.jpg"], specs={"material": "da"})
+    table = add_product(db_session, description="<p>Oak</p>")
+    shopper = add_user(db_session)
+    db_session.add_all([
+        ProductStats(product_id=sofa.id, log_score=2.0, like_count=3),
+        ProductStats(product_id=table.id, log_score=1.0),
+        RelatedProduct(product_id=sofa.id, related_id=table.id, score=0.5, order_count=2),
+        UserRecommendation(user_id=shopper.id, product_id=table.id, score=1.0),
+    ])
+    db_session.commit()
+    return sofa.id, table.id, shopper.id
+
+
+@pytest.fixture
+def client(db_session, catalog):
+    app = FastAPI()
+    app.include_router(products.router, prefix="/api/v1/products")
+    app.include_router(users.router, prefix="/api/v1/users")
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: db_session.get(User, catalog[2])
+    return TestClient(app)
+
+
+def test_card_query_loads_card_columns_only(db_session, catalog):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        db_session.expunge_all()
+        cards, total, _ = ProductService.get_products(db_session, view="card")
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+    assert total == 2 and [card.like_count for card in cards] == [3, 0]
+    page = next(s for s in statements if s.startswith("SELECT products.") and "LIMIT" in s)
+    assert "products.description" not in page and "products.images" not in page
+    with pytest.raises(InvalidRequestError):
+        cards[0].description  # raiseload: no lazy load per card
+    with pytest.raises(InvalidRequestError):
+        cards[0].specs
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/products?view=card",
+    "/api/v1/products/popular?view=card",
+    "/api/v1/products/{sofa}/related?view=card",
+    "/api/v1/users/me/recommendations?view=card",
+])
+def test_card_endpoints_serialize_the_card_shape(db_session, catalog, client, path):
+    db_session.expunge_all()
+    response = client.get(path.format(sofa=catalog[0]))
+    assert response.status_code == 200, response.text
+    body = response.json()
+    cards = body["products"] if isinstance(body, dict) else body
+    assert cards and all(set(card) == CARD_FIELDS for card in cards)
+
+
+def test_full_view_is_unchanged(db_session, catalog, client):
+    db_session.expunge_all()
+    body = client.get("/api/v1/products").json()
+    assert body["products"][0]["description"] == "<p>Long HTML</p>"
+    assert body["products"][0]["like_count"] == 3
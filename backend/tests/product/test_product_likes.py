@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.core.exceptions import NotFoundException
+from app.models import ProductLike
+from app.services.like_service import LikeService
+from tests.helpers import add_product, add_user
+
+# product_stats is updated with PostgreSQL's greatest()/least()
+pytestmark = pytest.mark.integration
+
+
+def stored_likes(db, product_id):
+    return db.execute(select(func.count()).where(ProductLike.product_id == product_id)).scalar()
+
+
+def test_like_and_unlike_are_idempotent(pg_session):
+    sofa = add_product(pg_session)
+    alice, bob = add_user(pg_session), add_user(pg_session)
+
+    assert LikeService.like(pg_session, alice.id, sofa.id) == 1
+    assert LikeService.like(pg_session, alice.id, sofa.id) == 1
+    assert LikeService.like(pg_session, bob.id, sofa.id) == 2
+    assert LikeService.unlike(pg_session, alice.id, sofa.id) == 1
+    assert LikeService.unlike(pg_session, alice.id, sofa.id) == 1
+    assert LikeService.like(pg_session, alice.id, sofa.id) == 2
+    assert LikeService.like_count(pg_session, sofa.id) == stored_likes(pg_session, sofa.id) == 2
+
+    assert LikeService.unlike(pg_session, alice.id, sofa.id) == 1
+    assert LikeService.unlike(pg_session, bob.id, sofa.id) == 0
+    assert LikeService.unlike(pg_session, bob.id, sofa.id) == 0
+    assert LikeService.like_count(pg_session, sofa.id) == stored_likes(pg_session, sofa.id) == 0
+
+
+def test_unlike_without_likes_keeps_count(pg_session):
+    sofa = add_product(pg_session)
+    assert LikeService.unlike(pg_session, add_user(pg_session).id, sofa.id) == 0
+    assert LikeService.like_count(pg_session, sofa.id) == 0
+
+
+def test_liked_ids_and_inactive_products(pg_session):
+    sofa, lamp, hidden = add_product(pg_session), add_product(pg_session), add_product(pg_session, is_active=False)
+    alice = add_user(pg_session)
+    LikeService.like(pg_session, alice.id, lamp.id)
+    with pytest.raises(NotFoundException):
+        LikeService.like(pg_session, alice.id, hidden.id)
+
+    assert LikeService.liked_ids(pg_session, alice.id, [sofa.id, lamp.id, hidden.id]) == [lamp.id]
+    assert LikeService.liked_ids(pg_session, alice.id, []) == []
+    assert stored_likes(pg_session, hidden.id) == 0
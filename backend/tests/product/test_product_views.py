@@ -0,0 +1,8 @@
+from app.models.product import CARD_COLUMNS
+from app.schemas.product import ProductCardResponse
+
+
+def test_card_schema_only_reads_card_columns():
+    # The card view loads CARD_COLUMNS with raiseload: any other column would fail at serialization
+    loaded = {column.key for column in CARD_COLUMNS} | {"like_count"}  # like_count comes from product_stats
+    assert set(ProductCardResponse.model_fields) <= loaded
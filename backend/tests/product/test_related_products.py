@@ -0,0 +1,99 @@
+"""
+Frequently-bought-together counts and neighbors on a small basket fixture
+
+    orders  {A, B}, {A, B}, {A, C}, {A, B, C}, and {B, C} cancelled
+    counts  A 4, B 3, C 2, AB 3, AC 2, BC 1
+    cosine  AB 3/sqrt(12), AC 2/sqrt(8), BC 1/sqrt(6)
+"""
+from math import sqrt
+
+import pytest
+from sqlalchemy import select
+
+from app.models import OrderStatus, ProductCoPurchase, RelatedProduct
+from app.services.recommendation_service import RecommendationService, _neighbors, _pair_counts
+from tests.helpers import add_order, add_product, add_user
+
+
+@pytest.fixture
+def related_settings(monkeypatch):
+    from app.services.recommendation_service import settings
+    monkeypatch.setattr(settings, "RELATED_MIN_CO_ORDERS", 1)
+    monkeypatch.setattr(settings, "RELATED_TOP_K", 20)
+    return settings
+
+
+@pytest.fixture
+def baskets(db_session):
+    a, b, c = (add_product(db_session).id for _ in range(3))
+    user = add_user(db_session)
+
+    def order(*product_ids, **fields):
+        return add_order(db_session, user, dict.fromkeys(product_ids, 1), **fields).id
+
+    order(a, b)
+    order(a, b)
+    order(a, c)
+    return a, b, c, order
+
+
+def counts(db):
+    rows = db.execute(select(ProductCoPurchase.product_id, ProductCoPurchase.other_id, ProductCoPurchase.order_count))
+    return {(pid, other): count for pid, other, count in rows}
+
+
+def neighbors(db):
+    rows = db.execute(
+        select(RelatedProduct.product_id, RelatedProduct.related_id, RelatedProduct.score)
+        .order_by(RelatedProduct.product_id, RelatedProduct.score.desc())
+    )
+    result = {}
+    for pid, related_id, score in rows:
+        result.setdefault(pid, []).append((related_id, pytest.approx(score)))
+    return result
+
+
+def test_pair_counts_skip_cancelled_orders(db_session, baskets):
+    a, b, c, order = baskets
+    order(a, b, c)
+    last = order(b, c, status=OrderStatus.CANCELLED)
+
+    rows = db_session.execute(_pair_counts(0, last)).all()
+    assert {(r.product_id, r.other_id): r.order_count for r in rows} == {
+        (a, a): 4, (b, b): 3, (c, c): 2,
+        (a, b): 3, (b, a): 3, (a, c): 2, (c, a): 2, (b, c): 1, (c, b): 1,
+    }
+    assert {(r.product_id, r.other_id): r.last_order_id for r in rows}[(b, c)] == last - 1
+
+
+def test_neighbors_are_cosine_ranked_and_cut(db_session, baskets, related_settings):
+    a, b, c, order = baskets
+    order(a, b, c)
+    RecommendationService.rebuild_related(db_session)
+    assert neighbors(db_session) == {
+        a: [(b, 3 / sqrt(12)), (c, 2 / sqrt(8))],
+        b: [(a, 3 / sqrt(12)), (c, 1 / sqrt(6))],
+        c: [(a, 2 / sqrt(8)), (b, 1 / sqrt(6))],
+    }
+
+    related_settings.RELATED_TOP_K = 1
+    related_settings.RELATED_MIN_CO_ORDERS = 2
+    assert {(r.product_id, r.other_id) for r in db_session.execute(_neighbors(None))} == {(a, b), (b, a), (c, a)}
+    assert {r.other_id for r in db_session.execute(_neighbors([c]))} == {a}
+
+
+def test_update_counts_each_order_once(db_session, baskets, related_settings):
+    a, b, c, order = baskets
+    assert RecommendationService.update_related(db_session) == 3
+    assert counts(db_session)[(a, a)] == 3
+
+    order(a, b, c)
+    order(b, c, status=OrderStatus.CANCELLED)
+    assert RecommendationService.update_related(db_session) == 3
+    assert RecommendationService.update_related(db_session) == 0
+    assert RecommendationService.update_related(db_session) == 0
+    incremental = counts(db_session), neighbors(db_session)
+
+    RecommendationService.rebuild_related(db_session)
+    assert (counts(db_session), neighbors(db_session)) == incremental
+    assert counts(db_session)[(a, b)] == 3
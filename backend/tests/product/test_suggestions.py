@@ -0,0 +1,57 @@
+from app.services.suggestion_service import Suggestion, SuggestionIndex, fold
+
+
+def _index():
+    index = SuggestionIndex()
+    index.replace([
+        Suggestion("product", 1, "Ghế Sofa Da Bò", "ghe-sofa-da-bo", 12.0),
+        Suggestion("product", 2, "Ghế ăn gỗ sồi", "ghe-an-go-soi", 30.0),
+        Suggestion("product", 3, "Sofa góc chữ L", "sofa-goc", 20.0),
+        Suggestion("category", 1, "Sofa", "sofa", 20.0),
+        Suggestion("collection", 1, "Phòng khách Đà Lạt", "da-lat"),
+    ], version=None)
+    return index
+
+
+def test_fold():
+    assert fold("Ghế Sofa Đà Lạt") == "ghe sofa da lat"
+
+
+def test_prefix_search_ranks_by_popularity():
+    index = _index()
+    assert [(s.type, s.id) for s in index.search("so")] == [
+        ("product", 2), ("category", 1), ("product", 3), ("product", 1)  # "sồi" folds to "soi"
+    ]
+    assert [s.id for s in index.search("GHE sof")] == [1]
+    assert [s.type for s in index.search("đà l")] == ["collection"]
+    assert index.search("bàn") == [] and index.search("  ") == []
+    assert len(index.search("s", limit=2)) == 2
+
+
+def test_incremental_changes_keep_scores():
+    index = _index()
+    index.apply(upserts=[Suggestion("product", 1, "Ghế Sofa Nỉ", "ghe-sofa-ni")], removals=[("product", 2)])
+    assert [s.id for s in index.search("ghe")] == [1]
+    assert index.search("ni")[0].score == 12.0
+    assert index.search("bo") == []
+
+
+def test_incremental_changes_match_a_rebuild():
+    index = _index()
+    untouched = index._snapshot.prefixes["lat"]
+    index.apply(
+        upserts=[Suggestion("product", 4, "Sofa băng", "sofa-bang", 25.0), Suggestion("product", 3, "Sofa góc", "sofa-goc")],
+        removals=[("category", 1), ("product", 9)],
+    )
+    rebuilt = SuggestionIndex()
+    rebuilt.replace([
+        Suggestion("product", 1, "Ghế Sofa Da Bò", "ghe-sofa-da-bo", 12.0),
+        Suggestion("product", 2, "Ghế ăn gỗ sồi", "ghe-an-go-soi", 30.0),
+        Suggestion("product", 3, "Sofa góc", "sofa-goc", 20.0),
+        Suggestion("product", 4, "Sofa băng", "sofa-bang", 25.0),
+        Suggestion("collection", 1, "Phòng khách Đà Lạt", "da-lat"),
+    ], version=None)
+    assert index._snapshot.prefixes == rebuilt._snapshot.prefixes
+    assert len(index) == len(rebuilt) == 5
+    assert index._snapshot.prefixes["lat"] is untouched  # lists of other prefixes are not rebuilt
+    assert "chu" not in index._snapshot.prefixes  # "Sofa góc chữ L" was renamed
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.models import Base, Coupon, CouponType, User, UserRole
+from app.services import coupon_service
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def add_users(db, *specs):
+    users = [
+        User(email=f"u{n}@example.com", hashed_password="x", full_name=f"U{n}", role=role, is_active=active)
+        for n, (role, active) in enumerate(specs)
+    ]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def test_bulk_issue_to_all_active_customers(db):
+    customer, admin, inactive, other = add_users(
+        db, (UserRole.CUSTOMER, True), (UserRole.ADMIN, True), (UserRole.CUSTOMER, False), (UserRole.CUSTOMER, True)
+    )
+    result = coupon_service.issue_bulk_coupons(db, CouponType.FIXED, 100000, valid_days=7, prefix="TET")
+    assert result == {"issued": 2, "skipped_user_ids": []}
+    coupons = db.query(Coupon).order_by(Coupon.user_id).all()
+    assert [c.user_id for c in coupons] == [customer, other]
+    assert all(c.code.startswith("TET") for c in coupons)
+
+    result = coupon_service.issue_bulk_coupons(
+        db, CouponType.FIXED, 50000, valid_days=7, user_ids=[admin, inactive, admin, 999]
+    )
+    assert result == {"issued": 1, "skipped_user_ids": [inactive, 999]}
+
+
+def test_colliding_codes_are_regenerated(db, monkeypatch):
+    [first, second] = add_users(db, (UserRole.CUSTOMER, True), (UserRole.CUSTOMER, True))
+    taken = coupon_service.create_promotional_coupon(db, first, source_order_id=None).code
+
+    batches = iter([[taken, "LUXEFRESH001"], ["LUXEFRESH002"]])
+    monkeypatch.setattr(coupon_service, "generate_coupon_codes", lambda count, prefix: next(batches)[:count])
+    result = coupon_service.issue_bulk_coupons(db, CouponType.FIXED, 100000, valid_days=7, user_ids=[first, second])
+
+    assert result["issued"] == 2
+    codes = {c.user_id: c.code for c in db.query(Coupon).filter(Coupon.code.like("LUXEFRESH%"))}
+    assert codes == {first: "LUXEFRESH002", second: "LUXEFRESH001"}
+    assert db.query(Coupon).count() == 3
+
+
+def test_gives_up_after_max_attempts(db, monkeypatch):
+    [user] = add_users(db, (UserRole.CUSTOMER, True))
+    taken = coupon_service.create_promotional_coupon(db, user, source_order_id=None).code
+    monkeypatch.setattr(coupon_service, "generate_coupon_codes", lambda count, prefix: [taken] * count)
+    with pytest.raises(RuntimeError):
+        coupon_service.issue_bulk_coupons(db, CouponType.FIXED, 100000, valid_days=7, user_ids=[user])
+    assert db.query(Coupon).count() == 1